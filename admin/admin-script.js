@@ -49,8 +49,18 @@ let projects = [];
 let skills = [];
 let currentProjectId = null;
 
+// Messages are fetched one page at a time (newest first)
+const MESSAGES_PAGE_SIZE = 50;
+let nextMessagesCursor = null;
+
+// Search results are not paged - the best matches are all shown at once
+const MESSAGES_SEARCH_LIMIT = 100;
+let messageSearchTimer = null;
+
 // Load messages from Flask API
-function loadMessages() {
+// Pass loadMore = true to append the next page instead of starting over.
+// While the search box has text, shows the matching messages instead.
+function loadMessages(loadMore = false) {
     const messagesList = document.getElementById('messagesList');
     if (!messagesList) {
         console.error('Messages list element not found');
@@ -58,10 +68,22 @@ function loadMessages() {
     }
     
     const headers = getAuthHeaders();
-    console.log('Loading messages from:', `${API_URL}/api/messages`);
-    console.log('Auth headers:', headers);
+    const searchInput = document.getElementById('messageSearch');
+    const query = searchInput ? searchInput.value.trim() : '';
+    let url = `${API_URL}/api/messages?limit=${MESSAGES_PAGE_SIZE}`;
+    if (query && !loadMore) {
+        url = `${API_URL}/api/messages/search?limit=${MESSAGES_SEARCH_LIMIT}&q=${encodeURIComponent(query)}`;
+    } else if (loadMore && nextMessagesCursor) {
+        url += `&cursor=${encodeURIComponent(nextMessagesCursor)}`;
+    }
+    // Archived messages are read from the server's archive files on demand
+    const includeArchived = document.getElementById('includeArchived');
+    if (includeArchived && includeArchived.checked) {
+        url += '&archived=include';
+    }
+    console.log('Loading messages from:', url);
     
-    fetch(`${API_URL}/api/messages`, {
+    fetch(url, {
         method: 'GET',
         headers: headers
     })
@@ -83,11 +105,14 @@ function loadMessages() {
         return response.json();
     })
     .then(data => {
-        console.log('Messages response:', data);
         if (data && data.success) {
-            messages = data.messages || [];
-            console.log('Loaded messages:', messages.length);
-            updateStats(messages);
+            const page = data.messages || [];
+            messages = loadMore ? messages.concat(page) : page;
+            nextMessagesCursor = data.next_cursor || null;
+            console.log('Loaded messages:', messages.length, 'more available:', !!nextMessagesCursor);
+            if (!loadMore) {
+                updateStats();
+            }
             displayMessages(messages);
         } else {
             console.error('Error loading messages - invalid response:', data);
@@ -102,15 +127,23 @@ function loadMessages() {
     });
 }
 
-// Update statistics
-function updateStats(messages) {
-    const total = messages.length;
-    const unread = messages.filter(m => !m.read).length;
-    const replied = messages.filter(m => m.replied).length;
-    
-    document.getElementById('totalMessages').textContent = total;
-    document.getElementById('unreadMessages').textContent = unread;
-    document.getElementById('repliedMessages').textContent = replied;
+// Update statistics (counted on the server, so they cover every page)
+function updateStats() {
+    fetch(`${API_URL}/api/messages/count`, {
+        method: 'GET',
+        headers: getAuthHeaders()
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data && data.success) {
+            document.getElementById('totalMessages').textContent = data.total;
+            document.getElementById('unreadMessages').textContent = data.unread;
+            document.getElementById('repliedMessages').textContent = data.replied;
+        }
+    })
+    .catch(error => {
+        console.error('Error loading message counts:', error);
+    });
 }
 
 // Display messages
@@ -129,6 +162,8 @@ function displayMessages(messages) {
                     <div style="display: flex; align-items: center; gap: 0.75rem;">
                         <h3>${escapeHtml(message.name)}</h3>
                         ${message.replied ? '<span class="replied-badge">✓ Replied</span>' : ''}
+                        ${message.archived ? '<span class="replied-badge" style="opacity: 0.7;">Archived</span>' : ''}
+                        ${message.duplicates ? `<span class="replied-badge" style="opacity: 0.7;" title="Sent ${message.duplicates} more time(s), last on ${formatDate(message.lastDuplicateAt)}">×${message.duplicates + 1}</span>` : ''}
                     </div>
                     <p>${escapeHtml(message.email)}</p>
                 </div>
@@ -146,10 +181,12 @@ function displayMessages(messages) {
             </div>
             <div class="message-actions">
                 <button class="btn-reply" onclick="openReplyModal(${message.id})" ${message.replied ? 'style="opacity: 0.6;"' : ''}>${message.replied ? 'Reply Again' : 'Reply'}</button>
-                <button class="btn-delete" onclick="deleteMessage(${message.id})">Delete</button>
+                ${message.archived ? '' : `<button class="btn-delete" onclick="deleteMessage(${message.id})">Delete</button>`}
             </div>
         </div>
-    `).join('');
+    `).join('') + (nextMessagesCursor ? `
+        <button class="btn-add-project" onclick="loadMessages(true)" style="font-size: 0.85rem; padding: 0.5rem 1rem;">Load more messages</button>
+    ` : '');
 }
 
 // Open reply modal
@@ -198,7 +235,8 @@ document.getElementById('replyForm').addEventListener('submit', function(e) {
     const replyData = {
         to: document.getElementById('replyTo').value,
         subject: document.getElementById('replySubject').value,
-        message: document.getElementById('replyMessage').value
+        message: document.getElementById('replyMessage').value,
+        messageId: currentMessageId
     };
     
     console.log('Sending reply email:', replyData);
@@ -238,6 +276,8 @@ document.getElementById('replyForm').addEventListener('submit', function(e) {
     .then(data => {
         console.log('Send email success response:', data);
         if (data.success) {
+            const jobId = data.job_id;
+            
             // Mark as replied
             fetch(`${API_URL}/api/messages/${currentMessageId}/replied`, {
                 method: 'PUT',
@@ -254,8 +294,9 @@ document.getElementById('replyForm').addEventListener('submit', function(e) {
                     // Close modal first
                     closeModal();
                     
-                    // Show success message
-                    showSuccessMessage('✓ Email sent! Check Render logs to verify delivery.');
+                    // Show success message, then follow the delivery in the background
+                    showSuccessMessage('✓ Email queued for delivery...');
+                    watchEmailDelivery(jobId);
                     
                     // Reload messages to update the checkbox and badge
                     loadMessages();
@@ -293,6 +334,40 @@ document.getElementById('replyForm').addEventListener('submit', function(e) {
     });
 });
 
+// Poll the queued email's delivery state until it is sent or has failed
+const EMAIL_STATUS_POLL_MS = 2000;
+const EMAIL_STATUS_MAX_POLLS = 150;
+
+function watchEmailDelivery(jobId, polls = 0) {
+    if (!jobId) return;
+    
+    fetch(`${API_URL}/api/send-email/${jobId}`, {
+        method: 'GET',
+        headers: getAuthHeaders()
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (!data || !data.success) {
+            console.error('Error checking email status:', data);
+            return;
+        }
+        const job = data.job;
+        console.log(`Email job ${jobId}: ${job.status} (attempt ${job.attempts})`);
+        if (job.status === 'sent') {
+            showSuccessMessage(`✓ Email delivered to ${job.to}`);
+        } else if (job.status === 'failed') {
+            alert(`Email to ${job.to} could not be delivered after ${job.attempts} attempts: ${job.lastError || 'unknown error'}`);
+        } else if (polls + 1 < EMAIL_STATUS_MAX_POLLS) {
+            setTimeout(() => watchEmailDelivery(jobId, polls + 1), EMAIL_STATUS_POLL_MS);
+        } else {
+            showSuccessMessage(`Email to ${job.to} is still ${job.status}. It will keep retrying on the server.`);
+        }
+    })
+    .catch(error => {
+        console.error('Error checking email status:', error);
+    });
+}
+
 // Delete message
 function deleteMessage(messageId) {
     if (!confirm('Are you sure you want to delete this message?')) return;
@@ -625,9 +700,12 @@ function saveProject(projectData) {
     })
     .then(data => {
         if (data && data.success) {
-            showSuccessMessage(currentProjectId ? 'Project updated successfully!' : 'Project created successfully!');
-            loadProjects();
-            closeProjectModal();
+            const successMessage = currentProjectId ? 'Project updated successfully!' : 'Project created successfully!';
+            return uploadPendingImages(data.project.id, projectData.images).then(() => {
+                showSuccessMessage(successMessage);
+                loadProjects();
+                closeProjectModal();
+            });
         } else {
             alert('Error: ' + (data.error || 'Failed to save project'));
         }
@@ -638,6 +716,39 @@ function saveProject(projectData) {
     });
 }
 
+// Upload the image files that were dropped/selected in the form, so the
+// paths listed for them point at real files on the server
+function uploadPendingImages(projectId, imagePaths) {
+    const formData = new FormData();
+    let count = 0;
+    imageData.forEach((entry, path) => {
+        if (entry.file && imagePaths.includes(path)) {
+            formData.append('images', entry.file, entry.fileName);
+            count++;
+        }
+    });
+    if (count === 0) {
+        return Promise.resolve();
+    }
+    
+    return fetch(`${API_URL}/api/projects/${projectId}/images`, {
+        method: 'POST',
+        // No Content-Type: the browser sets the multipart boundary
+        headers: { 'X-Auth-Token': getAuthToken() },
+        body: formData
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (!result.success) {
+            alert('Project saved, but uploading images failed: ' + (result.error || 'Unknown error'));
+        }
+    })
+    .catch(error => {
+        console.error('Error uploading images:', error);
+        alert('Project saved, but uploading images failed. Please try again.');
+    });
+}
+
 // Edit project
 function editProject(projectId) {
     openProjectModal(projectId);
@@ -909,7 +1020,8 @@ function initImageDragAndDrop() {
                 imageData.set(filePath, {
                     path: filePath,
                     preview: e.target.result,
-                    fileName: fileName
+                    fileName: fileName,
+                    file: file  // uploaded when the project is saved
                 });
                 
                 // Add path to textarea
@@ -1197,6 +1309,14 @@ function testAPIConnection() {
 setTimeout(() => {
     testAPIConnection();
     loadMessages();
+    
+    const searchInput = document.getElementById('messageSearch');
+    if (searchInput) {
+        searchInput.addEventListener('input', () => {
+            clearTimeout(messageSearchTimer);
+            messageSearchTimer = setTimeout(() => loadMessages(), 250);
+        });
+    }
 }, 100);
 
 // ============================================
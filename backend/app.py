@@ -1,45 +1,105 @@
-from flask import Flask, request, jsonify, session
+from flask import Flask, request, jsonify, session, g
 from flask_cors import CORS
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 from functools import wraps
+from string import Template
 import json
 from dotenv import load_dotenv
 import threading
 import socket
-import sys
 import logging
-import ssl
+import gzip
+import hashlib
+import base64
+import bisect
+import heapq
+import time
+from itertools import islice
+# smtplib, email.mime, ssl and requests are imported where email is sent:
+# they aren't needed to serve pages, and importing them would slow down
+# every cold start (see wsgi.py)
 try:
-    import requests
+    import brotli
 except ImportError:
-    requests = None
-
-# Configure logging to ensure output appears in Render logs
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
-logger = logging.getLogger(__name__)
+    brotli = None
+from log_config import configure_logging
+from storage import open_store, import_json
+from mail_queue import MailQueue, QueueFull
+from mail_transport import SMTPPool, send_with_pool, get_http_session
+from images import build_image_variants, SITE_ROOT
+from uploads import parse_image_uploads, store_upload, UnsupportedImage
+from public_data import summarize_project, build_bootstrap, public_documents, export_snapshot
+from archive import MessageArchive, archive_due
+from dedupe import DuplicateIndex
+from facets import FacetIndex
+from search import SearchIndex
+from rate_limit import RateLimiter, RateLimited, MemoryBuckets, SQLiteBuckets
+from metrics import (registry as metrics_registry, MetricsMiddleware, ROUTE_ENVIRON_KEY,
+                     time_storage, email_duration)
+from profiling import Profiler
+from json_codec import CodecJSONProvider
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+# Configure logging: records go through a queue to a background writer
+# thread (see log_config.py), so request threads never block on stdout
+configure_logging()
+logger = logging.getLogger('app')
 
-# Helper function to print and flush immediately
-def log_print(message):
-    """Print message and immediately flush to ensure it appears in Render logs"""
-    print(message)
-    sys.stdout.flush()
-    logger.info(message)
+# Helper kept for the many existing call sites
+def log_print(message, level=logging.INFO):
+    """Log message (INFO by default) - written to stdout off the request thread"""
+    logger.log(level, message)
 
 # Load environment variables from .env file
 load_dotenv()
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-change-this-in-production')
+# jsonify() and request JSON through json_codec (orjson when installed)
+app.json = CodecJSONProvider(app)
+
+# Number of reverse proxies in front of the app (Render has one). Their
+# X-Forwarded-For header is trusted to give the real client address.
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', '1' if os.environ.get('RENDER') else '0'))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES)
+
+# Request counts, latency and response size per route (see metrics.py),
+# served at /api/metrics
+app.wsgi_app = MetricsMiddleware(app.wsgi_app)
+
+@app.before_request
+def record_metrics_route():
+    # The URL rule, not the path, so /api/projects/1 and /2 are one series
+    if request.url_rule:
+        request.environ[ROUTE_ENVIRON_KEY] = request.url_rule.rule
+
+# Admin-triggered profiling of a sample of live requests (see profiling.py
+# and /api/admin/profiler). Off until started; then one check per request.
+profiler = Profiler(max_profiles=int(os.environ.get('PROFILER_MAX_PROFILES', 20)))
+PROFILER_EXCLUDED_ROUTES = ('/api/admin/profiler', '/api/admin/profiler/report', '/api/metrics')
+
+@app.before_request
+def begin_profiling():
+    handle = profiler.begin(request.url_rule.rule if request.url_rule else '<unmatched>')
+    if handle is not None:
+        g.profile = handle
+
+@app.after_request
+def finish_profiling(response):
+    handle = g.pop('profile', None)
+    if handle is not None:
+        profiler.finish(handle, request.method, request.path, response.status_code)
+    return response
+
+@app.teardown_request
+def finish_failed_profiling(exc):
+    # after_request doesn't run when the view raised
+    handle = g.pop('profile', None)
+    if handle is not None:
+        profiler.finish(handle, request.method, request.path, 500)
 
 # Configure CORS - Allow all origins for production
 # This allows requests from any origin (you can restrict this to specific domains for security)
@@ -57,7 +117,7 @@ def after_request_cors(response):
     
     response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
     response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Requested-With, Accept, X-Auth-Token'
-    response.headers['Access-Control-Expose-Headers'] = 'Content-Type'
+    response.headers['Access-Control-Expose-Headers'] = 'Content-Type, Retry-After'
     return response
 
 # Handle preflight OPTIONS requests
@@ -82,6 +142,8 @@ RESEND_API_KEY = os.environ.get('RESEND_API_KEY', '')  # Resend API key (alterna
 RESEND_FROM_EMAIL = os.environ.get('RESEND_FROM_EMAIL', 'onboarding@resend.dev')  # Resend "from" email (default works without verification)
 ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME', 'admin')
 ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'admin123')  # Change this!
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'json')  # 'json' or 'sqlite'
+SQLITE_PATH = os.environ.get('SQLITE_PATH', 'portfolio.db')
 
 # In-memory storage (replace with database in production)
 messages_db = []
@@ -93,50 +155,305 @@ projects_file = 'projects.json'
 skills_db = []
 skills_file = 'skills.json'
 
+# id -> record maps kept in step with the lists above, so lookups by id
+# don't scan the whole list. Rebuilt on (re)load, updated by every mutator.
+messages_by_id = {}
+projects_by_id = {}
+skills_by_id = {}
+
+def reindex(index, records):
+    """Rebuild an id -> record map from records"""
+    index.clear()
+    index.update((record['id'], record) for record in records)
+
+# Pre-encoded responses for the public GET endpoints, keyed by
+# (route, variant) e.g. ('projects', 'live'). Each entry keeps the JSON body,
+# a strong ETag and gzip/brotli variants so unchanged data is never
+# re-serialized or re-compressed. Entries are dropped whenever the backing
+# store is saved or re-loaded, which covers every project/skill mutator.
+# Each invalidation also bumps the route's generation, so a response built
+# from the old data while the invalidation ran is not cached afterwards.
+_response_cache = {}
+_response_cache_lock = threading.Lock()
+_response_cache_generations = {}  # route -> invalidation count
+_response_cache_epoch = 0  # bumped when every route is invalidated
+
+def invalidate_response_cache(*routes):
+    """Drop cached responses for the given routes (all routes if none given)"""
+    global _response_cache_epoch
+    with _response_cache_lock:
+        if not routes:
+            _response_cache_epoch += 1
+            _response_cache.clear()
+            return
+        for route in routes:
+            _response_cache_generations[route] = _response_cache_generations.get(route, 0) + 1
+        for key in [k for k in _response_cache if k[0] in routes]:
+            del _response_cache[key]
+
+def response_cache_generation(route):
+    return (_response_cache_epoch, _response_cache_generations.get(route, 0))
+
+def build_cache_entry(payload):
+    """Encode payload once and precompress it"""
+    body = app.json.dumps_bytes(payload)
+    entry = {
+        'body': body,
+        'etag': '"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+        'gzip': gzip.compress(body, compresslevel=9, mtime=0),
+        'br': brotli.compress(body) if brotli else None
+    }
+    return entry
+
+def etag_matches(etag):
+    """Check the request's If-None-Match header against etag"""
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == '*' or candidate == etag:
+            return True
+    return False
+
+def cached_json_response(key, build_payload):
+    """
+    Serve build_payload() as JSON through the response cache.
+
+    Answers If-None-Match with 304 and picks the best precompressed body
+    from Accept-Encoding.
+    """
+    entry = _response_cache.get(key)
+    if entry is None:
+        with _response_cache_lock:
+            generation = response_cache_generation(key[0])
+        entry = build_cache_entry(build_payload())
+        with _response_cache_lock:
+            # Invalidated while building: serve this response but don't keep it
+            if response_cache_generation(key[0]) == generation:
+                _response_cache[key] = entry
+
+    if etag_matches(entry['etag']):
+        response = app.response_class(status=304)
+    else:
+        accepted = request.accept_encodings
+        if entry['br'] is not None and accepted['br']:
+            response = app.response_class(entry['br'], mimetype='application/json')
+            response.headers['Content-Encoding'] = 'br'
+        elif accepted['gzip']:
+            response = app.response_class(entry['gzip'], mimetype='application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = app.response_class(entry['body'], mimetype='application/json')
+
+    response.headers['ETag'] = entry['etag']
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+# Each collection lives in a store (see storage.py): by default a JSON
+# snapshot plus an append-only journal of record changes, or a SQLite table
+# with STORAGE_BACKEND=sqlite. A single edit writes one record either way.
+messages_store = open_store(STORAGE_BACKEND, messages_file, 'messages', SQLITE_PATH)
+projects_store = open_store(STORAGE_BACKEND, projects_file, 'projects', SQLITE_PATH)
+skills_store = open_store(STORAGE_BACKEND, skills_file, 'skills', SQLITE_PATH)
+
+# First start on SQLite: import whatever the JSON files hold
+if STORAGE_BACKEND == 'sqlite':
+    for store, json_path in ((messages_store, messages_file),
+                             (projects_store, projects_file),
+                             (skills_store, skills_file)):
+        if store.signature() is None:
+            count = import_json(store, json_path)
+            if count is not None:
+                log_print(f"Imported {count} records from {json_path} into {SQLITE_PATH}")
+
+# Signatures of the stores as they were when we last parsed or wrote them.
+# Every worker stats the files before serving and only re-parses the JSON when
+# the signature changed, so gunicorn workers pick up each other's writes
+# without paying the full json.load() on every request.
+_store_signatures = {}
+
+def store_changed(store):
+    """True if store differs from the version we last loaded or saved"""
+    signature = store.signature()
+    return signature is None or _store_signatures.get(store.path) != signature
+
+def remember_store(store, signature):
+    """
+    Record the signature store had when we loaded it (taken before the load,
+    so a write landing during it makes the next check reload) or that our
+    own write returned. None from a write means another worker wrote in
+    between: we keep the old signature and the next load picks it all up.
+    """
+    if signature is not None:
+        _store_signatures[store.path] = signature
+
+def last_signature(store):
+    """The signature recorded for store, passed to its writes as expected"""
+    return _store_signatures.get(store.path)
+
+def write_store(store, records, changed=None, deleted_id=None):
+    """
+    Persist a change to store.
+
+    Pass the changed record (or the id of a deleted one) to append a single
+    journal entry; with neither, the whole list is written as a new snapshot.
+    """
+    if changed is not None:
+        with time_storage(store, 'put'):
+            signature = store.put(changed, last_signature(store))
+    elif deleted_id is not None:
+        with time_storage(store, 'delete'):
+            signature = store.delete(deleted_id, last_signature(store))
+    else:
+        with time_storage(store, 'save_all'):
+            signature = store.save_all(records)
+    remember_store(store, signature)
+
+# Full-text indexes (see search.py), updated record by record on save and
+# rebuilt lazily on the next search after a full reload
+message_search = SearchIndex({'name': 2, 'subject': 2, 'email': 1, 'message': 1}, whole_fields=('email',))
+project_search = SearchIndex({'name': 3, 'stack': 2, 'mission': 2, 'missionBrief': 1})
+
+# Recent contact messages by content, to fold repeats into the original
+# (see dedupe.py); kept up to date the same way
+message_duplicates = DuplicateIndex(
+    max_items=int(os.environ.get('DEDUPE_MAX_MESSAGES', 2000)),
+    max_age=timedelta(hours=float(os.environ.get('DEDUPE_WINDOW_HOURS', 72)))
+)
+
+# Stack tag / status filter index for projects (see facets.py), kept up to
+# date the same way
+project_facets = FacetIndex('stack')
+
+def update_index(index, changed=None, deleted_id=None):
+    """Apply a save (same arguments as write_store) to a search or facet index"""
+    if changed is not None:
+        index.update(changed)
+    elif deleted_id is not None:
+        index.remove(deleted_id)
+    else:
+        index.mark_stale()
+
+# Views derived from messages_db for the admin inbox (JSON backend only):
+# messages sorted by (date, id) and the stat counters. Rebuilt lazily after
+# a save or reload instead of on every request.
+_message_views = {}
+
+def invalidate_message_views():
+    _message_views.clear()
+
+def messages_by_date():
+    """Return (messages sorted oldest first, their (date, id) keys)"""
+    if 'by_date' not in _message_views:
+        ordered = sorted(messages_db, key=lambda m: (m['date'], m['id']))
+        _message_views['by_date'] = (ordered, [(m['date'], m['id']) for m in ordered])
+    return _message_views['by_date']
+
 # Load messages from file
-def load_messages():
+def load_messages(force=False):
     global messages_db
+    if not force and not store_changed(messages_store):
+        return
     try:
-        if os.path.exists(messages_file):
-            with open(messages_file, 'r') as f:
-                messages_db = json.load(f)
-    except:
+        signature = messages_store.signature()
+        with time_storage(messages_store, 'load'):
+            records = messages_store.load()
+        if records is not None:
+            messages_db = records
+            reindex(messages_by_id, messages_db)
+            invalidate_message_views()
+            message_search.mark_stale()
+            message_duplicates.mark_stale()
+        remember_store(messages_store, signature)
+    except Exception as e:
+        log_print(f"Error loading messages: {e}")
         messages_db = []
+        reindex(messages_by_id, messages_db)
+        invalidate_message_views()
+        message_search.mark_stale()
+        message_duplicates.mark_stale()
 
 # Save messages to file
-def save_messages():
+def save_messages(changed=None, deleted_id=None):
     try:
-        with open(messages_file, 'w') as f:
-            json.dump(messages_db, f, indent=2)
+        write_store(messages_store, messages_db, changed, deleted_id)
+        invalidate_message_views()
+        update_index(message_search, changed, deleted_id)
+        update_index(message_duplicates, changed, deleted_id)
     except Exception as e:
         log_print(f"Error saving messages: {e}")
 
 # Load projects from file
-def load_projects():
+def load_projects(force=False):
     global projects_db
+    if not force and not store_changed(projects_store):
+        return
     try:
-        if os.path.exists(projects_file):
-            with open(projects_file, 'r') as f:
-                projects_db = json.load(f)
+        signature = projects_store.signature()
+        with time_storage(projects_store, 'load'):
+            records = projects_store.load()
+        if records is not None:
+            projects_db = records
+            reindex(projects_by_id, projects_db)
+            invalidate_project_summaries()
+            project_search.mark_stale()
+            project_facets.mark_stale()
+            invalidate_response_cache('projects', 'project', 'bootstrap')
+        remember_store(projects_store, signature)
     except Exception as e:
         log_print(f"Error loading projects: {e}")
         projects_db = []
+        reindex(projects_by_id, projects_db)
+        invalidate_project_summaries()
+        project_search.mark_stale()
+        project_facets.mark_stale()
+        invalidate_response_cache('projects', 'project', 'bootstrap')
 
 # Save projects to file
-def save_projects():
+def save_projects(changed=None, deleted_id=None):
     try:
-        with open(projects_file, 'w') as f:
-            json.dump(projects_db, f, indent=2)
+        write_store(projects_store, projects_db, changed, deleted_id)
+        invalidate_project_summaries()
+        update_index(project_search, changed, deleted_id)
+        update_index(project_facets, changed, deleted_id)
+        invalidate_response_cache('projects', 'project', 'bootstrap')
+        schedule_snapshot_export()
     except Exception as e:
         log_print(f"Error saving projects: {e}")
 
+# Summaries of projects_db (same order) for the project grid: the card
+# fields plus the first image only (see public_data.summarize_project).
+# Rebuilt lazily after a save or reload.
+_project_summaries = None
+
+def invalidate_project_summaries():
+    global _project_summaries
+    _project_summaries = None
+
+def project_summaries():
+    global _project_summaries
+    if _project_summaries is None:
+        _project_summaries = [summarize_project(p) for p in projects_db]
+    return _project_summaries
+
 # Load skills from file
-def load_skills():
+def load_skills(force=False):
     global skills_db
+    if not force and not store_changed(skills_store):
+        return
     try:
-        if os.path.exists(skills_file):
-            with open(skills_file, 'r') as f:
-                skills_db = json.load(f)
+        signature = skills_store.signature()
+        with time_storage(skills_store, 'load'):
+            records = skills_store.load()
+        if records is not None:
+            skills_db = records
+            reindex(skills_by_id, skills_db)
+            remember_store(skills_store, signature)
+            invalidate_response_cache('skills', 'bootstrap')
         else:
             # Initialize with default skills if file doesn't exist
             skills_db = [
@@ -147,22 +464,80 @@ def load_skills():
                 {"id": 5, "name": "Circuit Design", "percentage": 92},
                 {"id": 6, "name": "Space Technology", "percentage": 80}
             ]
+            reindex(skills_by_id, skills_db)
             save_skills()
     except Exception as e:
         log_print(f"Error loading skills: {e}")
         skills_db = []
+        reindex(skills_by_id, skills_db)
+        invalidate_response_cache('skills', 'bootstrap')
 
 # Save skills to file
-def save_skills():
+def save_skills(changed=None, deleted_id=None):
     try:
-        with open(skills_file, 'w') as f:
-            json.dump(skills_db, f, indent=2)
+        write_store(skills_store, skills_db, changed, deleted_id)
+        invalidate_response_cache('skills', 'bootstrap')
+        schedule_snapshot_export()
     except Exception as e:
         log_print(f"Error saving skills: {e}")
 
+def allocate_id(store, index):
+    """Next unused id from the store's persisted sequence (never reused)"""
+    new_id = store.next_id()
+    # Records added by hand (e.g. editing projects.json) may be ahead of the sequence
+    while new_id in index:
+        new_id = store.next_id()
+    return new_id
+
+# Static snapshot of the public data (see public_data.py), re-exported a
+# moment after projects or skills are saved so a burst of edits is
+# exported once. Off unless SNAPSHOT_EXPORT=1: it only helps when
+# SNAPSHOT_DIR is where the site is served from, not on a separate API
+# host. Defined before the initial loads below: load_skills() saves (and
+# exports) the default skills on a fresh deploy.
+SNAPSHOT_EXPORT = os.environ.get('SNAPSHOT_EXPORT', '0') == '1'
+SNAPSHOT_EXPORT_DELAY = 2.0
+_snapshot_timer = None
+_snapshot_lock = threading.Lock()
+
+def export_public_snapshot():
+    """Write the static snapshot from the current data"""
+    global _snapshot_timer
+    with _snapshot_lock:
+        _snapshot_timer = None
+    try:
+        # Another worker may have saved since this one did
+        load_projects()
+        load_skills()
+        if export_snapshot(public_documents(projects_db, skills_db, project_summaries())):
+            log_print("Exported static snapshot of projects and skills")
+    except Exception as e:
+        log_print(f"Error exporting static snapshot: {e}", logging.WARNING)
+
+def schedule_snapshot_export():
+    global _snapshot_timer
+    if not SNAPSHOT_EXPORT:
+        return
+    with _snapshot_lock:
+        if _snapshot_timer is None:
+            _snapshot_timer = threading.Timer(SNAPSHOT_EXPORT_DELAY, export_public_snapshot)
+            _snapshot_timer.daemon = True
+            _snapshot_timer.start()
+
+def _forget_snapshot_timer():
+    # A timer pending when the process forked only fires in the parent;
+    # left set, it would stop this worker from ever scheduling an export
+    global _snapshot_timer, _snapshot_lock
+    _snapshot_timer = None
+    _snapshot_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_snapshot_timer)
+
 # Load messages on startup
 load_messages()
 load_projects()
+load_skills()
 
 
 # Simple token-based authentication (for CORS compatibility)
@@ -190,7 +565,9 @@ def send_email_via_resend(to_email, subject, message_body):
             log_print("❌ RESEND_API_KEY not set")
             return False
         
-        if requests is None:
+        try:
+            session = get_http_session()
+        except ImportError:
             log_print("❌ 'requests' library not installed. Install with: pip install requests")
             return False
         
@@ -218,7 +595,8 @@ def send_email_via_resend(to_email, subject, message_body):
             "text": message_body
         }
         
-        response = requests.post(url, json=data, headers=headers, timeout=10)
+        # Shared session keeps the HTTPS connection to Resend alive between emails
+        response = session.post(url, json=data, headers=headers, timeout=10)
         
         if response.status_code == 200:
             log_print(f"✅ Email sent successfully via Resend API to {to_email}")
@@ -231,12 +609,103 @@ def send_email_via_resend(to_email, subject, message_body):
         log_print(f"❌ Resend API exception: {type(e).__name__}: {e}")
         return False
 
+def send_emails_via_resend_batch(emails):
+    """Send up to 100 (to, subject, body) emails in one Resend batch API call"""
+    try:
+        if not RESEND_API_KEY:
+            return False
+        try:
+            session = get_http_session()
+        except ImportError:
+            return False
+        
+        from_email = RESEND_FROM_EMAIL
+        if '@' not in from_email:
+            from_email = f"{from_email}@resend.dev"
+        
+        log_print(f"Sending {len(emails)} emails via Resend batch API...")
+        headers = {
+            "Authorization": f"Bearer {RESEND_API_KEY}",
+            "Content-Type": "application/json"
+        }
+        data = [{
+            "from": f"Portfolio <{from_email}>",
+            "to": [to_email],
+            "reply_to": GMAIL_USER,
+            "subject": subject,
+            "text": message_body
+        } for to_email, subject, message_body in emails]
+        
+        response = session.post("https://api.resend.com/emails/batch",
+                                json=data, headers=headers, timeout=30)
+        if response.status_code == 200:
+            log_print(f"✅ Batch of {len(emails)} emails sent via Resend API")
+            return True
+        log_print(f"❌ Resend batch API error: {response.status_code} - {response.text}")
+        return False
+    except Exception as e:
+        log_print(f"❌ Resend batch API exception: {type(e).__name__}: {e}")
+        return False
+
+def open_gmail_smtp():
+    """Open a logged-in Gmail SMTP connection: port 587 (STARTTLS), then 465 (SSL)"""
+    import smtplib
+    import ssl
+    # Strip spaces from Gmail password (App Passwords are 16 chars, user might have copied with spaces)
+    gmail_pass_clean = GMAIL_PASS.strip().replace(' ', '') if GMAIL_PASS else ''
+    
+    log_print("Opening new SMTP connection...")
+    log_print(f"Gmail password length: {len(gmail_pass_clean)} chars (should be 16)")
+    
+    # Try port 587 with STARTTLS first
+    server = None
+    try:
+        log_print("Trying port 587 (STARTTLS, timeout: 10 seconds)...")
+        server = smtplib.SMTP('smtp.gmail.com', 587, timeout=10)
+        log_print("✅ Connected to SMTP server! Starting TLS...")
+        server.starttls(context=ssl.create_default_context())
+        log_print("✅ TLS started! Logging in...")
+        server.login(GMAIL_USER, gmail_pass_clean)
+        log_print("✅ Logged in via port 587")
+        return server
+    except smtplib.SMTPAuthenticationError:
+        # Wrong password fails on port 465 too - don't bother falling back
+        raise
+    except Exception as e:
+        log_print(f"❌ Port 587 failed: {type(e).__name__}: {e}")
+        if server:
+            try:
+                server.close()
+            except:
+                pass
+    
+    # Try port 465 with SSL as fallback
+    log_print("=" * 60)
+    log_print("Trying port 465 (SSL, timeout: 10 seconds) as fallback...")
+    context = ssl.create_default_context()
+    server = smtplib.SMTP_SSL('smtp.gmail.com', 465, timeout=10, context=context)
+    log_print("✅ Connected via SSL! Logging in...")
+    server.login(GMAIL_USER, gmail_pass_clean)
+    log_print("✅ Logged in via port 465")
+    return server
+
+# Logged-in SMTP connections are kept open between emails so a batch of
+# replies doesn't pay for a new TLS handshake and login every time
+smtp_pool = SMTPPool(
+    open_gmail_smtp,
+    max_size=int(os.environ.get('SMTP_POOL_SIZE', 2)),
+    idle_timeout=int(os.environ.get('SMTP_IDLE_TIMEOUT', 60))
+)
+
 # Email sending function
-def send_email(to_email, subject, message_body):
+def send_email(to_email, subject, message_body, use_resend=True):
     """Send email - tries Resend API first, then Gmail SMTP as fallback"""
+    import smtplib
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
     
     # Try Resend API first (works on free tier)
-    if RESEND_API_KEY:
+    if RESEND_API_KEY and use_resend:
         log_print("=" * 60)
         log_print("Attempting to send via Resend API (recommended for free tier)...")
         log_print("=" * 60)
@@ -246,9 +715,6 @@ def send_email(to_email, subject, message_body):
         log_print("=" * 60)
     
     # Fallback to SMTP
-    server = None
-    
-    # Strip spaces from Gmail password (App Passwords are 16 chars, user might have copied with spaces)
     gmail_pass_clean = GMAIL_PASS.strip().replace(' ', '') if GMAIL_PASS else ''
     
     try:
@@ -260,7 +726,6 @@ def send_email(to_email, subject, message_body):
             return False
         
         log_print(f"Attempting to send email to {to_email}...")
-        log_print(f"Gmail password length: {len(gmail_pass_clean)} chars (should be 16)")
         
         # Create message
         msg = MIMEMultipart()
@@ -271,81 +736,10 @@ def send_email(to_email, subject, message_body):
         # Add body
         msg.attach(MIMEText(message_body, 'plain'))
         
-        # Try port 587 with STARTTLS first
-        port_587_success = False
-        try:
-            log_print("Trying port 587 (STARTTLS)...")
-            log_print("Creating SMTP connection (timeout: 10 seconds)...")
-            
-            # Test connection first with socket
-            try:
-                test_socket = socket.create_connection(('smtp.gmail.com', 587), timeout=10)
-                test_socket.close()
-                log_print("Socket connection test successful!")
-            except Exception as sock_err:
-                log_print(f"❌ Socket connection test failed: {sock_err}")
-                log_print("Port 587 is blocked or unreachable, trying port 465...")
-                raise sock_err
-            
-            server = smtplib.SMTP('smtp.gmail.com', 587, timeout=10)
-            log_print("✅ Connected to SMTP server! Starting TLS...")
-            server.starttls(timeout=10)
-            log_print("✅ TLS started! Logging in...")
-            server.login(GMAIL_USER, gmail_pass_clean)
-            log_print("✅ Logged in! Sending email...")
-            
-            # Send email
-            text = msg.as_string()
-            server.sendmail(GMAIL_USER, to_email, text)
-            log_print(f"✅ Email sent successfully to {to_email} via port 587")
-            port_587_success = True
-            return True
-            
-        except Exception as e:
-            log_print(f"❌ Port 587 failed: {type(e).__name__}: {e}")
-            if 'server' in locals() and server:
-                try:
-                    server.quit()
-                except:
-                    pass
-                server = None
-            
-            # Try port 465 with SSL as fallback
-            if not port_587_success:
-                try:
-                    log_print("=" * 60)
-                    log_print("Trying port 465 (SSL) as fallback...")
-                    log_print("Creating SSL connection (timeout: 10 seconds)...")
-                    
-                    # Test SSL connection first
-                    try:
-                        test_socket = socket.create_connection(('smtp.gmail.com', 465), timeout=10)
-                        test_socket.close()
-                        log_print("SSL socket connection test successful!")
-                    except Exception as sock_err:
-                        log_print(f"❌ SSL socket connection test failed: {sock_err}")
-                        log_print("❌ Both ports 587 and 465 are blocked!")
-                        log_print("❌ Render free tier is blocking SMTP connections")
-                        raise sock_err
-                    
-                    context = ssl.create_default_context()
-                    server = smtplib.SMTP_SSL('smtp.gmail.com', 465, timeout=10, context=context)
-                    log_print("✅ Connected via SSL! Logging in...")
-                    server.login(GMAIL_USER, gmail_pass_clean)
-                    log_print("✅ Logged in! Sending email...")
-                    
-                    # Send email
-                    text = msg.as_string()
-                    server.sendmail(GMAIL_USER, to_email, text)
-                    log_print(f"✅ Email sent successfully to {to_email} via port 465")
-                    log_print("=" * 60)
-                    return True
-                    
-                except Exception as e2:
-                    log_print(f"❌ Port 465 also failed: {type(e2).__name__}: {e2}")
-                    log_print("=" * 60)
-                    # Don't re-raise, let outer exception handler catch it
-                    raise e2
+        # Send over a pooled connection (opens and logs in only if none is idle)
+        send_with_pool(smtp_pool, GMAIL_USER, to_email, msg.as_string())
+        log_print(f"✅ Email sent successfully to {to_email}")
+        return True
         
     except smtplib.SMTPAuthenticationError as e:
         log_print(f"❌ SMTP Authentication Error: {e}")
@@ -378,13 +772,109 @@ def send_email(to_email, subject, message_body):
         import traceback
         log_print(f"Traceback: {traceback.format_exc()}")
         return False
-    finally:
-        # Always close the connection
-        if server:
-            try:
-                server.quit()
-            except:
-                pass
+
+def deliver_queued_email(to_email, subject, message_body):
+    """Send one queued email (called by the mail queue workers)"""
+    log_print("=" * 80)
+    log_print(f"🔄 MAIL WORKER: sending email to {to_email}")
+    log_print("=" * 80)
+    
+    if not GMAIL_USER or not GMAIL_PASS:
+        log_print("❌ ERROR: Gmail credentials are NOT configured!")
+        log_print("❌ Please set GMAIL_USER and GMAIL_PASS in Render environment variables")
+        return False
+    
+    started = time.perf_counter()
+    success = send_email(to_email=to_email, subject=subject, message_body=message_body)
+    email_duration.observe(time.perf_counter() - started, 'single', 'sent' if success else 'failed')
+    
+    log_print("=" * 80)
+    if success:
+        log_print(f"✅ SUCCESS: Email sent successfully to {to_email}")
+        log_print(f"✅ The recipient should check their inbox AND spam folder")
+    else:
+        log_print(f"❌ FAILED: Could not send email to {to_email}")
+        log_print(f"❌ Check the error messages above for details")
+        log_print(f"❌ Most common issues:")
+        log_print(f"   1. Gmail App Password is incorrect")
+        log_print(f"   2. 2-Step Verification not enabled")
+        log_print(f"   3. Gmail account is locked or restricted")
+    log_print("=" * 80)
+    return success
+
+def deliver_queued_batch(emails):
+    """Send a batch of queued (to, subject, body) emails; returns a result per email"""
+    if not GMAIL_USER or not GMAIL_PASS:
+        log_print("❌ ERROR: Gmail credentials are NOT configured!")
+        return [False] * len(emails)
+    
+    log_print("=" * 80)
+    log_print(f"🔄 MAIL WORKER: sending batch of {len(emails)} emails")
+    log_print("=" * 80)
+    
+    started = time.perf_counter()
+    if RESEND_API_KEY and send_emails_via_resend_batch(emails):
+        results = [True] * len(emails)
+    else:
+        # One email at a time over the pooled SMTP connection (one login for all)
+        results = [send_email(to_email, subject, message_body, use_resend=False)
+                   for to_email, subject, message_body in emails]
+    email_duration.observe(time.perf_counter() - started, 'batch',
+                           'sent' if all(results) else 'failed' if not any(results) else 'partial')
+    return results
+
+# Outbound email queue: jobs are persisted like the other collections and
+# delivered by a fixed pool of worker threads with retries (see mail_queue.py)
+email_queue_store = open_store(STORAGE_BACKEND, 'email_queue.json', 'email_jobs', SQLITE_PATH)
+mail_queue = MailQueue(
+    email_queue_store,
+    send=deliver_queued_email,
+    send_batch=deliver_queued_batch,
+    workers=int(os.environ.get('MAIL_QUEUE_WORKERS', 2)),
+    max_pending=int(os.environ.get('MAIL_QUEUE_MAX_PENDING', 100)),
+    max_attempts=int(os.environ.get('MAIL_QUEUE_MAX_ATTEMPTS', 5))
+)
+
+@app.before_request
+def start_mail_queue():
+    # Started by the first request rather than at import: a preloaded app
+    # (wsgi.py) is imported in the gunicorn master, and its worker threads
+    # wouldn't survive the fork anyway. Once started this is a pid check.
+    mail_queue.start()
+
+# Rate limits (see rate_limit.py) for the endpoints anyone can POST to:
+# by client IP and by e-mail address / username. Buckets are shared by all
+# workers with RATE_LIMIT_BACKEND=sqlite (the default with the SQLite
+# storage backend), per process otherwise.
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'sqlite' if STORAGE_BACKEND == 'sqlite' else 'memory')
+rate_limiter = RateLimiter(
+    SQLiteBuckets(SQLITE_PATH) if RATE_LIMIT_BACKEND == 'sqlite' else MemoryBuckets(),
+    {
+        'contact_ip': os.environ.get('RATE_LIMIT_CONTACT_IP', '5/hour'),
+        'contact_email': os.environ.get('RATE_LIMIT_CONTACT_EMAIL', '3/hour'),
+        'login_ip': os.environ.get('RATE_LIMIT_LOGIN_IP', '10/15minute'),
+        'login_user': os.environ.get('RATE_LIMIT_LOGIN_USER', '5/15minute')
+    },
+    enabled=os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+)
+
+# Gauges read when /api/metrics is scraped
+metrics_registry.gauge('portfolio_messages', 'Messages in the working set (not archived)', lambda: len(messages_db))
+metrics_registry.gauge('portfolio_projects', 'Projects by status',
+                       lambda: project_facets.query(records=lambda: projects_db)['statuses'],
+                       labels=('status',))
+metrics_registry.gauge('mail_queue_pending', 'Emails waiting to be sent', lambda: mail_queue.stats()['pending'])
+metrics_registry.gauge('rate_limit_decisions_total', 'Rate limit checks by limit and result',
+                       lambda: {(name, result): stats[result] for name, stats in rate_limiter.stats().items()
+                                for result in ('allowed', 'limited')},
+                       labels=('limit', 'result'), metric_type='counter')
+
+def rate_limited_response(e, error):
+    """429 response for a RateLimited exception"""
+    log_print(f"Rate limit {e.limit} hit by {request.remote_addr} on {request.path}", logging.WARNING)
+    response = jsonify({'success': False, 'error': error})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 429
 
 # Routes
 
@@ -393,6 +883,7 @@ def contact():
     """Handle contact form submission"""
     try:
         data = request.json
+        load_messages()
         
         # Validate required fields
         required_fields = ['name', 'email', 'subject', 'message']
@@ -400,9 +891,33 @@ def contact():
             if field not in data or not data[field]:
                 return jsonify({'error': f'{field} is required'}), 400
         
+        # A repeat of a recent message only bumps a counter on the original,
+        # so spam waves don't add rows. The sender gets the same answer, and
+        # resubmitting doesn't use up their rate limit.
+        original_id = message_duplicates.find(data['email'], data['message'], records=lambda: messages_db)
+        original = messages_by_id.get(original_id)
+        if original is not None:
+            original['duplicates'] = original.get('duplicates', 0) + 1
+            original['lastDuplicateAt'] = datetime.now().isoformat()
+            save_messages(changed=original)
+            log_print(f"Contact message folded into message {original_id} "
+                      f"({original['duplicates']} duplicate(s))")
+            return jsonify({
+                'success': True,
+                'message': 'Thank you for your message! I will get back to you soon.'
+            }), 200
+        
+        # Checked before a new message is stored, so a flood of submissions
+        # can't grow the inbox
+        try:
+            rate_limiter.hit('contact_ip', request.remote_addr)
+            rate_limiter.hit('contact_email', str(data['email']).strip().casefold())
+        except RateLimited as e:
+            return rate_limited_response(e, 'Too many messages. Please try again later.')
+        
         # Create message object
         message = {
-            'id': len(messages_db) + 1,
+            'id': allocate_id(messages_store, messages_by_id),
             'name': data['name'],
             'email': data['email'],
             'subject': data['subject'],
@@ -414,7 +929,8 @@ def contact():
         
         # Save message
         messages_db.append(message)
-        save_messages()
+        messages_by_id[message['id']] = message
+        save_messages(changed=message)
         
         # Optional: Send notification email to admin
         # notification_subject = f"New Contact Form Submission from {data['name']}"
@@ -437,11 +953,15 @@ def admin_login():
         username = data.get('username')
         password = data.get('password')
         
-        # Debug logging (remove in production)
-        log_print(f"Login attempt - Username: {username}")
-        log_print(f"Expected username: {ADMIN_USERNAME}")
-        log_print(f"Password match: {password == ADMIN_PASSWORD}")
-        log_print(f"Username match: {username == ADMIN_USERNAME}")
+        try:
+            rate_limiter.hit('login_ip', request.remote_addr)
+            rate_limiter.hit('login_user', str(username or '').strip().casefold())
+        except RateLimited as e:
+            return rate_limited_response(e, 'Too many login attempts. Please try again later.')
+        
+        # Debug logging (off unless LOG_LEVEL=DEBUG)
+        logger.debug("Login attempt - Username: %s (username match: %s, password match: %s)",
+                     username, username == ADMIN_USERNAME, password == ADMIN_PASSWORD)
         
         if username == ADMIN_USERNAME and password == ADMIN_PASSWORD:
             session['admin_logged_in'] = True
@@ -467,30 +987,308 @@ def admin_logout():
     session.clear()
     return jsonify({'success': True, 'message': 'Logged out successfully'}), 200
 
+MESSAGES_PAGE_SIZE = 50
+MESSAGES_MAX_PAGE_SIZE = 200
+
+def encode_cursor(message):
+    """Opaque cursor pointing just past message in newest-first order"""
+    raw = json.dumps([message['date'], message['id']]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor):
+    """Turn a cursor back into its (date, id) key"""
+    try:
+        date, message_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return (str(date), int(message_id))
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def parse_bool_arg(name):
+    """Read a true/false query parameter (None if absent)"""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    if value.lower() in ('true', '1', 'yes'):
+        return True
+    if value.lower() in ('false', '0', 'no'):
+        return False
+    raise ValueError(f'{name} must be true or false')
+
+def message_filters():
+    """Collect the read/replied/email/subject filters from the query string"""
+    filters = {}
+    for name in ('read', 'replied'):
+        value = parse_bool_arg(name)
+        if value is not None:
+            filters[name] = value
+    for name in ('email', 'subject'):
+        value = request.args.get(name, '').strip()
+        if value:
+            filters[name] = value
+    return filters
+
+def message_matches(message, filters):
+    if 'read' in filters and bool(message.get('read')) != filters['read']:
+        return False
+    if 'replied' in filters and bool(message.get('replied')) != filters['replied']:
+        return False
+    if 'email' in filters and message.get('email') != filters['email']:
+        return False
+    if 'subject' in filters and filters['subject'].lower() not in message.get('subject', '').lower():
+        return False
+    return True
+
+def page_messages(filters, after, limit):
+    """
+    Return (page, has_more): up to limit messages newest first, starting
+    after the (date, id) key `after`.
+    """
+    if STORAGE_BACKEND == 'sqlite':
+        where = {name: filters[name] for name in ('read', 'replied', 'email') if name in filters}
+        contains = {'subject': filters['subject']} if 'subject' in filters else None
+        rows = messages_store.query(where, order_by='date', descending=True,
+                                    limit=limit + 1, after=after, contains=contains)
+    else:
+        load_messages()
+        ordered, keys = messages_by_date()
+        start = bisect.bisect_left(keys, after) if after else len(ordered)
+        rows = []
+        for i in range(start - 1, -1, -1):
+            if message_matches(ordered[i], filters):
+                rows.append(ordered[i])
+                if len(rows) > limit:
+                    break
+    return rows[:limit], len(rows) > limit
+
+def message_counts():
+    """Total / unread / replied counters for the dashboard badges"""
+    archived = sum(message_archive.counts().values())
+    if STORAGE_BACKEND == 'sqlite':
+        return {
+            'total': messages_store.count(),
+            'unread': messages_store.count({'read': False}),
+            'replied': messages_store.count({'replied': True}),
+            'archived': archived
+        }
+    load_messages()
+    if 'counts' not in _message_views:
+        _message_views['counts'] = {
+            'total': len(messages_db),
+            'unread': sum(1 for m in messages_db if not m.get('read')),
+            'replied': sum(1 for m in messages_db if m.get('replied'))
+        }
+    return {**_message_views['counts'], 'archived': archived}
+
+# ============================================
+# MESSAGE ARCHIVE
+# ============================================
+# Replied messages older than MESSAGE_ARCHIVE_REPLIED_DAYS and all messages
+# older than MESSAGE_RETENTION_DAYS are moved out of messages_db into
+# monthly gzip files (see archive.py). They are still listed and searched
+# with ?archived=include|only, read lazily from the files.
+MESSAGE_RETENTION_DAYS = float(os.environ.get('MESSAGE_RETENTION_DAYS', 180))
+MESSAGE_ARCHIVE_REPLIED_DAYS = float(os.environ.get('MESSAGE_ARCHIVE_REPLIED_DAYS', 30))
+MESSAGE_ARCHIVE_INTERVAL = 3600  # seconds between automatic checks (per worker)
+message_archive = MessageArchive(os.environ.get('MESSAGE_ARCHIVE_DIR', 'archive'))
+_last_archive_check = 0.0
+
+def archive_messages():
+    """Move messages that are due into the archive; returns how many"""
+    global messages_db
+    with message_archive.locked(blocking=False) as acquired:
+        if not acquired:
+            return 0  # another worker is archiving right now
+        load_messages()
+        due = archive_due(messages_db, retention_days=MESSAGE_RETENTION_DAYS,
+                          replied_days=MESSAGE_ARCHIVE_REPLIED_DAYS)
+        if not due:
+            return 0
+        # Archive first: a crash in between leaves a message in both places
+        # (listings skip the archived copy), never in neither
+        message_archive.append(due)
+        archived_ids = [m['id'] for m in due]
+        with time_storage(messages_store, 'delete_many'):
+            signature = messages_store.delete_many(archived_ids, last_signature(messages_store))
+        remember_store(messages_store, signature)
+        for message_id in archived_ids:
+            messages_by_id.pop(message_id, None)
+            message_search.remove(message_id)
+            message_duplicates.remove(message_id)
+        archived = set(archived_ids)
+        messages_db = [m for m in messages_db if m['id'] not in archived]
+        invalidate_message_views()
+    log_print(f"Archived {len(due)} message(s) to {message_archive.directory}/")
+    return len(due)
+
+def maybe_archive_messages():
+    """Run archive_messages() if the last check was over an interval ago"""
+    global _last_archive_check
+    now = time.monotonic()
+    if now - _last_archive_check < MESSAGE_ARCHIVE_INTERVAL:
+        return
+    _last_archive_check = now
+    try:
+        archive_messages()
+    except Exception as e:
+        log_print(f"Error archiving messages: {e}", logging.ERROR)
+
+def archived_messages(filters, after=None):
+    """Archived messages matching filters, newest first (read lazily)"""
+    for message in message_archive.iter_messages(before=after):
+        # Still in the working set after an interrupted archive run
+        if message['id'] in messages_by_id:
+            continue
+        if message_matches(message, filters):
+            yield message
+
+def parse_archived_arg():
+    """?archived= : None (working set only), 'include' or 'only'"""
+    value = request.args.get('archived', '').lower()
+    if value in ('', 'false', '0', 'no'):
+        return None
+    if value in ('include', 'only'):
+        return value
+    raise ValueError("archived must be 'include' or 'only'")
+
 @app.route('/api/messages', methods=['GET'])
 @admin_required
 def get_messages():
-    """Get all messages (admin only)"""
+    """
+    Get messages newest first, one page at a time (admin only)
+
+    Query params: limit, cursor (next_cursor of the previous page),
+    read/replied (true/false), email (exact), subject (substring),
+    fields (comma-separated list of fields to return) and archived
+    ('include' to page through archived messages too, 'only' for just
+    those; archived messages have 'archived': true).
+    """
     try:
-        # Sort by date (newest first)
-        sorted_messages = sorted(messages_db, key=lambda x: x['date'], reverse=True)
+        try:
+            limit = int(request.args.get('limit', MESSAGES_PAGE_SIZE))
+            limit = max(1, min(limit, MESSAGES_MAX_PAGE_SIZE))
+            filters = message_filters()
+            cursor = request.args.get('cursor')
+            after = decode_cursor(cursor) if cursor else None
+            archived = parse_archived_arg()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        maybe_archive_messages()
+        if archived is None:
+            page, has_more = page_messages(filters, after, limit)
+        else:
+            load_messages()
+            rows = archived_messages(filters, after)
+            if archived == 'include':
+                # Both sides are newest first: merge them and stop after one
+                # page, so only the archive months the page reaches are read
+                hot, _ = page_messages(filters, after, limit + 1)
+                rows = heapq.merge(hot, rows, key=lambda m: (m['date'], m['id']), reverse=True)
+            rows = list(islice(rows, limit + 1))
+            page, has_more = rows[:limit], len(rows) > limit
+        next_cursor = encode_cursor(page[-1]) if has_more else None
+        
+        fields = request.args.get('fields')
+        if fields:
+            wanted = {'id'} | {f.strip() for f in fields.split(',') if f.strip()}
+            page = [{k: v for k, v in m.items() if k in wanted} for m in page]
+        
         return jsonify({
             'success': True,
-            'messages': sorted_messages
+            'messages': page,
+            'next_cursor': next_cursor,
+            'has_more': has_more
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+def search_limit():
+    """The limit query param for the search endpoints (ValueError if bad)"""
+    limit = int(request.args.get('limit', SEARCH_DEFAULT_LIMIT))
+    return max(1, min(limit, SEARCH_MAX_LIMIT))
+
+@app.route('/api/messages/search', methods=['GET'])
+@admin_required
+def search_messages():
+    """
+    Full-text search over message name, subject, email and body (admin only)
+
+    Query params: q (required; words also match as prefixes),
+    limit, the read/replied/email/subject filters of /api/messages, fields
+    and archived. Results are best match first, each with a 'score'. With
+    archived=include, archived matches (newest first, no score) follow
+    until limit is reached; archived=only returns just those.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'success': False, 'error': 'q is required'}), 400
+    try:
+        limit = search_limit()
+        filters = message_filters()
+        archived = parse_archived_arg()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    load_messages()
+    results = []
+    total = 0
+    if archived != 'only':
+        for message_id, score in message_search.search(query, records=lambda: messages_db):
+            message = messages_by_id.get(message_id)
+            if message is None or not message_matches(message, filters):
+                continue
+            total += 1
+            if len(results) < limit:
+                results.append({**message, 'score': round(score, 3)})
+    if archived and len(results) < limit:
+        # Streamed from the archive files, only until the page is full
+        # (so total counts archived matches up to there)
+        matches = (m for m in archived_messages(filters) if message_search.matches(m, query))
+        for message in islice(matches, limit - len(results)):
+            total += 1
+            results.append({**message, 'score': None})
+    
+    fields = request.args.get('fields')
+    if fields:
+        wanted = {'id', 'score'} | {f.strip() for f in fields.split(',') if f.strip()}
+        results = [{k: v for k, v in m.items() if k in wanted} for m in results]
+    
+    return jsonify({'success': True, 'query': query, 'total': total, 'messages': results})
+
+@app.route('/api/messages/count', methods=['GET'])
+@admin_required
+def count_messages():
+    """Message counters for the dashboard badges (admin only)"""
+    try:
+        return jsonify({'success': True, **message_counts()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/messages/archive', methods=['POST'])
+@admin_required
+def run_message_archive():
+    """Archive the messages that are due now instead of at the next hourly check"""
+    try:
+        archived = archive_messages()
+        return jsonify({'success': True, 'moved': archived, **message_counts()}), 200
+    except Exception as e:
+        log_print(f"Error archiving messages: {e}", logging.ERROR)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/messages/<int:message_id>/read', methods=['PUT'])
 @admin_required
 def mark_as_read(message_id):
     """Mark message as read"""
     try:
-        for message in messages_db:
-            if message['id'] == message_id:
-                message['read'] = True
-                save_messages()
-                return jsonify({'success': True}), 200
+        load_messages()
+        message = messages_by_id.get(message_id)
+        if message:
+            message['read'] = True
+            save_messages(changed=message)
+            return jsonify({'success': True}), 200
         return jsonify({'error': 'Message not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -500,12 +1298,13 @@ def mark_as_read(message_id):
 def mark_as_replied(message_id):
     """Mark message as replied"""
     try:
-        for message in messages_db:
-            if message['id'] == message_id:
-                message['replied'] = True
-                message['repliedDate'] = datetime.now().isoformat()
-                save_messages()
-                return jsonify({'success': True}), 200
+        load_messages()
+        message = messages_by_id.get(message_id)
+        if message:
+            message['replied'] = True
+            message['repliedDate'] = datetime.now().isoformat()
+            save_messages(changed=message)
+            return jsonify({'success': True}), 200
         return jsonify({'error': 'Message not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -516,8 +1315,10 @@ def delete_message(message_id):
     """Delete a message"""
     try:
         global messages_db
-        messages_db = [m for m in messages_db if m['id'] != message_id]
-        save_messages()
+        load_messages()
+        if messages_by_id.pop(message_id, None) is not None:
+            messages_db = [m for m in messages_db if m['id'] != message_id]
+            save_messages(deleted_id=message_id)
         return jsonify({'success': True}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -525,7 +1326,7 @@ def delete_message(message_id):
 @app.route('/api/send-email', methods=['POST'])
 @admin_required
 def send_reply_email():
-    """Send reply email to user - returns immediately, sends email in background"""
+    """Queue a reply email to user - returns immediately with a job id to poll"""
     try:
         data = request.json
         
@@ -558,58 +1359,30 @@ def send_reply_email():
             log_print(f"   ⚠️  WARNING: Password should be 16 chars (Gmail App Password), got {gmail_pass_length}")
         log_print("=" * 80)
         
-        def send_email_background():
-            """Send email in background thread"""
-            try:
-                log_print("=" * 80)
-                log_print("🔄 BACKGROUND THREAD STARTED")
-                log_print(f"   Attempting to send email to: {data['to']}")
-                log_print(f"   Using Gmail account: {GMAIL_USER}")
-                log_print(f"   Gmail password is: {'SET (' + str(gmail_pass_length) + ' chars)' if gmail_pass_clean else 'NOT SET - THIS IS THE PROBLEM!'}")
-                if gmail_pass_length != 16 and gmail_pass_clean:
-                    log_print(f"   ⚠️  WARNING: Password should be 16 chars, got {gmail_pass_length} (spaces removed)")
-                log_print("=" * 80)
-                
-                if not GMAIL_USER or not GMAIL_PASS:
-                    log_print("❌ ERROR: Gmail credentials are NOT configured!")
-                    log_print("❌ Please set GMAIL_USER and GMAIL_PASS in Render environment variables")
-                    return
-                
-                success = send_email(
-                    to_email=data['to'],
-                    subject=data['subject'],
-                    message_body=data['message']
-                )
-                
-                log_print("=" * 80)
-                if success:
-                    log_print(f"✅ SUCCESS: Email sent successfully to {data['to']}")
-                    log_print(f"✅ The recipient should check their inbox AND spam folder")
-                else:
-                    log_print(f"❌ FAILED: Could not send email to {data['to']}")
-                    log_print(f"❌ Check the error messages above for details")
-                    log_print(f"❌ Most common issues:")
-                    log_print(f"   1. Gmail App Password is incorrect")
-                    log_print(f"   2. 2-Step Verification not enabled")
-                    log_print(f"   3. Gmail account is locked or restricted")
-                log_print("=" * 80)
-            except Exception as e:
-                log_print("=" * 80)
-                log_print(f"❌ EXCEPTION in background thread: {e}")
-                import traceback
-                log_print(f"Traceback:\n{traceback.format_exc()}")
-                log_print("=" * 80)
-        
-        # Start email sending in background (don't wait for it)
-        thread = threading.Thread(target=send_email_background)
-        thread.daemon = True
-        thread.start()
-        
-        # Return immediately - email will send in background
-        log_print("✅ Returning success response immediately, email sending in background thread")
+        # Hand the email to the delivery queue (persisted, retried on failure)
+        try:
+            job = mail_queue.enqueue(
+                to=data['to'],
+                subject=data['subject'],
+                body=data['message'],
+                message_id=data.get('messageId')
+            )
+        except QueueFull as e:
+            log_print(f"❌ Email queue is full ({mail_queue.max_pending} pending), rejecting request")
+            response = jsonify({
+                'success': False,
+                'error': 'Too many emails are waiting to be sent. Please try again shortly.'
+            })
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response, 429
+        
+        # Return immediately - the queue workers deliver the email
+        log_print(f"✅ Email job {job['id']} queued, returning success response immediately")
         return jsonify({
             'success': True,
-            'message': 'Email is being sent. Check Render logs to verify delivery.'
+            'message': 'Email is queued for delivery.',
+            'job_id': job['id'],
+            'status': job['status']
         }), 200
             
     except Exception as e:
@@ -621,11 +1394,204 @@ def send_reply_email():
             'error': f'Server error: {str(e)}'
         }), 500
 
+EMAIL_BATCH_MAX_RECIPIENTS = 100
+
+def render_template_text(template, variables):
+    """Fill $name / ${name} placeholders; unknown placeholders are left as-is"""
+    return Template(template).safe_substitute(variables)
+
+@app.route('/api/send-email/batch', methods=['POST'])
+@admin_required
+def send_batch_email():
+    """
+    Queue one templated email per recipient (admin only)
+
+    Body: {"subject": "Re: $subject", "message": "Hi $name, ...",
+           "recipients": [{"messageId": 3}, {"to": "...", "variables": {...}}]}
+    A recipient's variables default to the name/email/subject/message of its
+    contact message (messageId) and can be overridden with "variables".
+    """
+    try:
+        data = request.json or {}
+        subject_template = data.get('subject')
+        message_template = data.get('message')
+        recipients = data.get('recipients')
+        
+        if not subject_template or not message_template or not isinstance(recipients, list) or not recipients:
+            return jsonify({'success': False, 'error': 'Missing required fields: subject, message or recipients'}), 400
+        if len(recipients) > EMAIL_BATCH_MAX_RECIPIENTS:
+            return jsonify({'success': False, 'error': f'At most {EMAIL_BATCH_MAX_RECIPIENTS} recipients per batch'}), 400
+        
+        if not GMAIL_USER or not GMAIL_PASS:
+            return jsonify({
+                'success': False,
+                'error': 'Gmail credentials not configured. Please set GMAIL_USER and GMAIL_PASS environment variables in your Render dashboard.'
+            }), 500
+        
+        load_messages()
+        results = []
+        emails = []
+        for index, recipient in enumerate(recipients):
+            if not isinstance(recipient, dict):
+                results.append({'index': index, 'error': 'Recipient must be an object'})
+                continue
+            variables = {}
+            message_id = recipient.get('messageId')
+            if message_id is not None:
+                message = messages_by_id.get(message_id)
+                if not message:
+                    results.append({'index': index, 'error': 'Message not found'})
+                    continue
+                variables.update({key: message.get(key, '') for key in ('name', 'email', 'subject', 'message')})
+            variables.update(recipient.get('variables') or {})
+            to_email = recipient.get('to') or variables.get('email')
+            if not to_email:
+                results.append({'index': index, 'error': 'Missing recipient address'})
+                continue
+            emails.append({
+                'to': to_email,
+                'subject': render_template_text(subject_template, variables),
+                'message': render_template_text(message_template, variables),
+                'messageId': message_id
+            })
+            results.append({'index': index, 'to': to_email})
+        
+        if not emails:
+            return jsonify({'success': False, 'error': 'No valid recipients', 'results': results}), 400
+        
+        batch_id = mail_queue.new_batch_id()
+        try:
+            jobs = mail_queue.enqueue_many(emails, batch_id=batch_id)
+        except QueueFull as e:
+            log_print(f"❌ Email queue is full, rejecting batch of {len(emails)}")
+            response = jsonify({
+                'success': False,
+                'error': 'Too many emails are waiting to be sent. Please try again shortly.'
+            })
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response, 429
+        
+        queued = iter(jobs)
+        for result in results:
+            if 'error' not in result:
+                job = next(queued)
+                result['job_id'] = job['id']
+                result['status'] = job['status']
+        
+        log_print(f"✅ Email batch {batch_id} queued: {len(jobs)} emails, {len(results) - len(jobs)} rejected")
+        return jsonify({'success': True, 'batch_id': batch_id, 'results': results}), 200
+    
+    except Exception as e:
+        log_print(f"Error in send_batch_email: {e}")
+        return jsonify({'success': False, 'error': f'Server error: {str(e)}'}), 500
+
+@app.route('/api/send-email/batch/<int:batch_id>', methods=['GET'])
+@admin_required
+def get_email_batch_status(batch_id):
+    """Delivery status of every email in a batch (admin only)"""
+    jobs = mail_queue.get_batch(batch_id)
+    if not jobs:
+        return jsonify({'success': False, 'error': 'Email batch not found'}), 404
+    summary = {}
+    for job in jobs:
+        summary[job['status']] = summary.get(job['status'], 0) + 1
+    return jsonify({'success': True, 'batch_id': batch_id, 'summary': summary, 'jobs': jobs}), 200
+
+@app.route('/api/send-email/<int:job_id>', methods=['GET'])
+@admin_required
+def get_email_status(job_id):
+    """Delivery status of a queued email (admin only)"""
+    job = mail_queue.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Email job not found'}), 404
+    return jsonify({'success': True, 'job': job}), 200
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({'status': 'ok'}), 200
 
+@app.route('/api/metrics', methods=['GET'])
+@admin_required
+def get_metrics():
+    """Metrics of this worker in the Prometheus text format (admin only)"""
+    return app.response_class(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/admin/profiler', methods=['GET'])
+@admin_required
+def get_profiler():
+    """Profiler state and the kept profiles of this worker, newest first"""
+    return jsonify({'success': True, **profiler.status(), 'items': profiler.profiles()}), 200
+
+@app.route('/api/admin/profiler', methods=['POST'])
+@admin_required
+def start_profiler():
+    """
+    Start profiling live requests on this worker
+
+    Body (all optional): mode ('sample' or 'cprofile'), rate (fraction of
+    requests, default 1), route (URL rule, e.g. '/api/projects'; default
+    any), limit (stop after this many profiles) and seconds (default 300).
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        status = profiler.start(
+            mode=data.get('mode', 'sample'),
+            rate=float(data.get('rate', 1)),
+            route=data.get('route') or None,
+            limit=int(data['limit']) if data.get('limit') else None,
+            seconds=float(data.get('seconds', 300)),
+            exclude=PROFILER_EXCLUDED_ROUTES
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    log_print(f"Profiler started: {status}")
+    return jsonify({'success': True, **status}), 200
+
+@app.route('/api/admin/profiler', methods=['DELETE'])
+@admin_required
+def stop_profiler():
+    """Stop profiling; ?clear=1 also drops the kept profiles"""
+    status = profiler.stop()
+    if request.args.get('clear') in ('1', 'true'):
+        profiler.clear()
+        status = profiler.status()
+    return jsonify({'success': True, **status}), 200
+
+@app.route('/api/admin/profiler/report', methods=['GET'])
+@admin_required
+def profiler_report():
+    """
+    Kept profiles merged into one text report
+
+    Query params: format ('collapsed' for sampled profiles - flamegraph
+    input - or 'pstats' for cProfile ones), ids (comma-separated; default
+    all), route, and for pstats sort (default 'cumulative') and limit
+    (number of functions, default 50).
+    """
+    fmt = request.args.get('format', 'collapsed')
+    try:
+        ids = {int(i) for i in request.args['ids'].split(',')} if request.args.get('ids') else None
+        report = profiler.render(ids=ids, route=request.args.get('route') or None, fmt=fmt,
+                                 sort=request.args.get('sort', 'cumulative'),
+                                 limit=int(request.args.get('limit', 50)))
+    except (KeyError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if report is None:
+        return jsonify({'success': False, 'error': 'No matching profiles'}), 404
+    return app.response_class(report, mimetype='text/plain')
+
+@app.route('/api/admin/rate-limits', methods=['GET'])
+@admin_required
+def rate_limit_stats():
+    """Configured rate limits with allowed/limited counts since this worker started"""
+    return jsonify({
+        'success': True,
+        'enabled': rate_limiter.enabled,
+        'backend': RATE_LIMIT_BACKEND,
+        'limits': rate_limiter.stats()
+    }), 200
+
 @app.route('/api/test-email-endpoint', methods=['POST'])
 @admin_required
 def test_email_endpoint():
@@ -642,27 +1608,105 @@ def test_email_endpoint():
 
 @app.route('/api/projects', methods=['GET'])
 def get_projects():
-    """Get all projects (filter by status if provided)"""
-    # Reload projects from file to ensure we have latest data
+    """
+    Get all projects (filter by status if provided)
+
+    ?view=summary returns only what the project grid needs (name, mission,
+    stack, status values, first image); the full project comes from
+    /api/projects/<id>. ?fields=a,b returns just those fields of each project.
+    ?tags=a,b keeps projects whose stack has every one of those tags
+    (case-insensitive).
+    """
+    # Pick up changes from other workers (only re-parses if the file changed)
     load_projects()
     
     status = request.args.get('status', None)  # 'live' or 'draft'
+    view = request.args.get('view', 'full')
+    fields = request.args.get('fields')
+    tags = parse_tags()
+    if view not in ('full', 'summary'):
+        return jsonify({'success': False, 'error': "view must be 'full' or 'summary'"}), 400
     
-    # Debug logging
-    log_print(f"GET /api/projects - status filter: {status}")
-    log_print(f"Total projects in DB: {len(projects_db)}")
-    if projects_db:
-        log_print(f"Project statuses: {[p.get('status', 'N/A') for p in projects_db]}")
-        log_print(f"Project names: {[p.get('name', 'N/A') for p in projects_db]}")
+    def build_payload():
+        records = project_summaries() if view == 'summary' else projects_db
+        
+        # Debug dumps (only when the cached response is rebuilt, and only
+        # built at all with LOG_LEVEL=DEBUG)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("GET /api/projects - status filter: %s, %d projects in DB", status, len(records))
+            logger.debug("Project statuses: %s", [p.get('status', 'N/A') for p in records])
+            logger.debug("Project names: %s", [p.get('name', 'N/A') for p in records])
+        
+        if tags:
+            matching = set(project_facets.query(tags, status, records=lambda: projects_db)['ids'])
+            records = [p for p in records if p['id'] in matching]
+        elif status:
+            records = [p for p in records if p.get('status', 'draft') == status]
+            if debug:
+                logger.debug("Filtered projects with status '%s': %s", status,
+                             [p.get('name', 'N/A') for p in records])
+        
+        if fields:
+            wanted = {'id'} | {f.strip() for f in fields.split(',') if f.strip()}
+            records = [{k: v for k, v in p.items() if k in wanted} for p in records]
+        
+        return {'success': True, 'projects': records}
+    
+    # Only cache the known filter values so arbitrary ?status= / ?fields= /
+    # ?tags= can't grow the cache
+    if status in (None, 'live', 'draft') and not fields and not tags:
+        return cached_json_response(('projects', (status, view)), build_payload)
+    return jsonify(build_payload())
+
+def parse_tags():
+    """?tags=a,b (or repeated ?tags=) as a list"""
+    return [tag.strip() for value in request.args.getlist('tags') for tag in value.split(',') if tag.strip()]
+
+@app.route('/api/projects/facets', methods=['GET'])
+def get_project_facets():
+    """
+    Filter projects by stack tags and status, with tag counts
+
+    Query params: tags (comma-separated, all must match) and status ('live'
+    or 'draft'). Returns the matching project ids, the tags of the matching
+    projects with how many have each (for "narrow down" filter chips), and
+    the status counts of the tag matches.
+    """
+    load_projects()
+    result = project_facets.query(parse_tags(), request.args.get('status'), records=lambda: projects_db)
+    return jsonify({'success': True, 'total': len(result['ids']), **result})
+
+@app.route('/api/projects/search', methods=['GET'])
+def search_projects():
+    """
+    Full-text search over project name, stack, mission and mission brief
+
+    Query params: q (required; words also match as prefixes), status
+    ('live' or 'draft') and limit. Returns project summaries (as
+    ?view=summary), best match first, each with a 'score'.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'success': False, 'error': 'q is required'}), 400
+    try:
+        limit = search_limit()
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit must be a number'}), 400
+    status = request.args.get('status')
     
-    if status:
-        filtered_projects = [p for p in projects_db if p.get('status', 'draft') == status]
-        log_print(f"Filtered projects with status '{status}': {len(filtered_projects)}")
-        if filtered_projects:
-            log_print(f"Filtered project names: {[p.get('name', 'N/A') for p in filtered_projects]}")
-        return jsonify({'success': True, 'projects': filtered_projects})
+    load_projects()
+    results = []
+    total = 0
+    for project_id, score in project_search.search(query, records=lambda: projects_db):
+        project = projects_by_id.get(project_id)
+        if project is None or (status and project.get('status', 'draft') != status):
+            continue
+        total += 1
+        if len(results) < limit:
+            results.append({**summarize_project(project), 'score': round(score, 3)})
     
-    return jsonify({'success': True, 'projects': projects_db})
+    return jsonify({'success': True, 'query': query, 'total': total, 'projects': results})
 
 def normalize_image_path(image_path):
     """
@@ -748,13 +1792,22 @@ def to_project_image_path(image_path, project_id):
     filename = parts[-1]
     return f'image/project/pro{project_id}/{filename}'
 
+def refresh_image_variants(project):
+    """
+    (Re)build the resized/WebP copies of the project's images and store the
+    srcset map as project['imageVariants'] (see images.py). Unchanged images
+    are reused, so this is cheap when only text fields were edited.
+    """
+    project['imageVariants'] = build_image_variants(project.get('images'), project.get('imageVariants'))
+
 @app.route('/api/projects', methods=['POST'])
 @admin_required
 def create_project():
     """Create a new project"""
+    load_projects()
     data = request.json
     # Determine new project id first so we can optionally derive per-project image folders
-    new_project_id = len(projects_db) + 1 if projects_db else 1
+    new_project_id = allocate_id(projects_store, projects_by_id)
     
     # Normalize image paths into per‑project folder
     images = data.get('images', [])
@@ -784,9 +1837,11 @@ def create_project():
         'createdAt': datetime.now().isoformat(),
         'updatedAt': datetime.now().isoformat()
     }
+    refresh_image_variants(project)
     
     projects_db.append(project)
-    save_projects()
+    projects_by_id[project['id']] = project
+    save_projects(changed=project)
     
     # Debug: Print saved project info
     log_print(f"Created project: ID={project['id']}, Name={project['name']}, Status={project['status']}")
@@ -797,17 +1852,19 @@ def create_project():
 @app.route('/api/projects/<int:project_id>', methods=['GET'])
 def get_project(project_id):
     """Get a specific project"""
-    project = next((p for p in projects_db if p['id'] == project_id), None)
+    load_projects()
+    project = projects_by_id.get(project_id)
     
     if project:
-        return jsonify({'success': True, 'project': project})
+        return cached_json_response(('project', project_id), lambda: {'success': True, 'project': project})
     return jsonify({'success': False, 'error': 'Project not found'}), 404
 
 @app.route('/api/projects/<int:project_id>', methods=['PUT'])
 @admin_required
 def update_project(project_id):
     """Update a project"""
-    project = next((p for p in projects_db if p['id'] == project_id), None)
+    load_projects()
+    project = projects_by_id.get(project_id)
     
     if not project:
         return jsonify({'success': False, 'error': 'Project not found'}), 404
@@ -824,6 +1881,8 @@ def update_project(project_id):
                 if normalized:
                     normalized_images.append(normalized)
         project['images'] = normalized_images
+    # Also picks up image files replaced on disk since the last save
+    refresh_image_variants(project)
     
     # Update project fields
     project['name'] = data.get('name', project['name'])
@@ -841,7 +1900,7 @@ def update_project(project_id):
     }
     project['updatedAt'] = datetime.now().isoformat()
     
-    save_projects()
+    save_projects(changed=project)
     
     # Debug: Print updated project info
     log_print(f"Updated project: ID={project['id']}, Name={project['name']}, Status={project['status']}")
@@ -854,16 +1913,92 @@ def update_project(project_id):
 def delete_project(project_id):
     """Delete a project"""
     global projects_db
-    projects_db = [p for p in projects_db if p['id'] != project_id]
-    save_projects()
+    load_projects()
+    if projects_by_id.pop(project_id, None) is not None:
+        projects_db = [p for p in projects_db if p['id'] != project_id]
+        save_projects(deleted_id=project_id)
     
     return jsonify({'success': True})
 
+# Per-file upload limit, and the per-project image cap the admin form enforces
+IMAGE_UPLOAD_MAX_BYTES = int(os.environ.get('IMAGE_UPLOAD_MAX_MB', '10')) * 1024 * 1024
+MAX_PROJECT_IMAGES = 20
+
+@app.route('/api/projects/<int:project_id>/images', methods=['POST'])
+@admin_required
+def upload_project_images(project_id):
+    """
+    Upload images (multipart/form-data) into image/project/pro<id>/ and add
+    them to the project's images list. Files are streamed to disk as they
+    arrive; a file already in the folder (same content) is not stored again.
+    """
+    load_projects()
+    project = projects_by_id.get(project_id)
+    
+    if not project:
+        return jsonify({'success': False, 'error': 'Project not found'}), 404
+    if request.mimetype != 'multipart/form-data':
+        return jsonify({'success': False, 'error': 'Send the images as multipart/form-data'}), 400
+    
+    room = MAX_PROJECT_IMAGES - len(project.get('images') or [])
+    if room <= 0:
+        return jsonify({'success': False, 'error': f'Maximum {MAX_PROJECT_IMAGES} images per project'}), 400
+    
+    directory = os.path.join(SITE_ROOT, 'image', 'project', f'pro{project_id}')
+    try:
+        uploads = parse_image_uploads(request.environ, directory, IMAGE_UPLOAD_MAX_BYTES, room)
+    except RequestEntityTooLarge as e:
+        return jsonify({'success': False, 'error': e.description}), 413
+    except UnsupportedImage as e:
+        return jsonify({'success': False, 'error': str(e)}), 415
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Malformed upload'}), 400
+    
+    if not uploads:
+        return jsonify({'success': False, 'error': 'No images uploaded'}), 400
+    
+    uploaded = []
+    images = project.setdefault('images', [])
+    consumed = 0
+    try:
+        for filename, temp_file in uploads:
+            stored_name, deduplicated = store_upload(filename, temp_file, directory)
+            consumed += 1
+            # Same normalization as paths typed in the admin form
+            path = to_project_image_path(stored_name, project_id)
+            # The admin form lists a dropped file by its own name before it is
+            # uploaded; if the stored name differs (sanitized, deduplicated),
+            # put the real path in that placeholder's place
+            placeholder = to_project_image_path(filename, project_id)
+            if (placeholder != path and placeholder in images
+                    and not os.path.exists(os.path.join(SITE_ROOT, placeholder))):
+                if path in images:
+                    images.remove(placeholder)
+                else:
+                    images[images.index(placeholder)] = path
+            elif path not in images:
+                images.append(path)
+            uploaded.append({'path': path, 'filename': filename, 'deduplicated': deduplicated})
+    finally:
+        # If storing a file failed, remove the temp files not stored yet and
+        # still record the images already moved into the folder
+        for _, temp_file in uploads[consumed:]:
+            temp_file.discard()
+        if uploaded:
+            refresh_image_variants(project)
+            project['updatedAt'] = datetime.now().isoformat()
+            save_projects(changed=project)
+    
+    log_print(f"Uploaded {len(uploaded)} image(s) to project {project_id}")
+    
+    return jsonify({'success': True, 'uploaded': uploaded, 'project': project})
+
 @app.route('/api/projects/<int:project_id>/status', methods=['PUT'])
 @admin_required
 def update_project_status(project_id):
     """Update project status (live/draft)"""
-    project = next((p for p in projects_db if p['id'] == project_id), None)
+    load_projects()
+    project = projects_by_id.get(project_id)
     
     if not project:
         return jsonify({'success': False, 'error': 'Project not found'}), 404
@@ -876,10 +2011,21 @@ def update_project_status(project_id):
     
     project['status'] = new_status
     project['updatedAt'] = datetime.now().isoformat()
-    save_projects()
+    save_projects(changed=project)
     
     return jsonify({'success': True, 'project': project})
 
+# ============================================
+# BOOTSTRAP (PUBLIC SITE FIRST PAINT)
+# ============================================
+
+@app.route('/api/bootstrap', methods=['GET'])
+def get_bootstrap():
+    """Everything the public pages load on first paint, in one cached response"""
+    load_projects()
+    load_skills()
+    return cached_json_response(('bootstrap', None), lambda: build_bootstrap(skills_db, project_summaries()))
+
 # ============================================
 # SKILLS API ENDPOINTS
 # ============================================
@@ -888,7 +2034,7 @@ def update_project_status(project_id):
 def get_skills():
     """Get all skills"""
     load_skills()
-    return jsonify({'success': True, 'skills': skills_db})
+    return cached_json_response(('skills', None), lambda: {'success': True, 'skills': skills_db})
 
 @app.route('/api/skills', methods=['POST'])
 @admin_required
@@ -898,7 +2044,7 @@ def create_skill():
     load_skills()
     
     data = request.json
-    new_id = max([s['id'] for s in skills_db], default=0) + 1
+    new_id = allocate_id(skills_store, skills_by_id)
     
     skill = {
         'id': new_id,
@@ -907,7 +2053,8 @@ def create_skill():
     }
     
     skills_db.append(skill)
-    save_skills()
+    skills_by_id[skill['id']] = skill
+    save_skills(changed=skill)
     
     return jsonify({'success': True, 'skill': skill})
 
@@ -918,7 +2065,7 @@ def update_skill(skill_id):
     global skills_db
     load_skills()
     
-    skill = next((s for s in skills_db if s['id'] == skill_id), None)
+    skill = skills_by_id.get(skill_id)
     if not skill:
         return jsonify({'success': False, 'error': 'Skill not found'}), 404
     
@@ -926,7 +2073,7 @@ def update_skill(skill_id):
     skill['name'] = data.get('name', skill['name'])
     skill['percentage'] = data.get('percentage', skill['percentage'])
     
-    save_skills()
+    save_skills(changed=skill)
     
     return jsonify({'success': True, 'skill': skill})
 
@@ -936,11 +2083,47 @@ def delete_skill(skill_id):
     """Delete a skill"""
     global skills_db
     load_skills()
-    skills_db = [s for s in skills_db if s['id'] != skill_id]
-    save_skills()
+    if skills_by_id.pop(skill_id, None) is not None:
+        skills_db = [s for s in skills_db if s['id'] != skill_id]
+        save_skills(deleted_id=skill_id)
     
     return jsonify({'success': True})
 
+# ============================================
+# WARM-UP
+# ============================================
+
+# Public GET requests of the site's first page views; their cached
+# responses are built by warm_up()
+WARM_UP_PATHS = (
+    '/api/bootstrap',
+    '/api/projects?view=summary',
+    '/api/projects?view=summary&status=live',
+    '/api/skills',
+)
+
+def warm_up():
+    """
+    Build what the first visitors' requests would otherwise build: project
+    summaries, the project search and facet indexes and the cached public
+    responses. Run by wsgi.create_app() before gunicorn forks, so workers
+    start with all of it in memory. Admin-only data (the message indexes)
+    is still built on first use. Returns the seconds taken.
+    """
+    started = time.perf_counter()
+    load_messages()
+    load_projects()
+    load_skills()
+    project_summaries()
+    project_search.rebuild(projects_db)
+    project_facets.rebuild(projects_db)
+    for path in WARM_UP_PATHS:
+        # Straight to the view: no before/after_request hooks, so nothing
+        # is counted in the metrics and the mail queue isn't started
+        with app.test_request_context(path):
+            app.dispatch_request()
+    return time.perf_counter() - started
+
 if __name__ == '__main__':
     log_print("Starting Flask server...")
     log_print(f"Gmail User: {GMAIL_USER}")
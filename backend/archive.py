@@ -0,0 +1,200 @@
+"""
+Message archive: old and answered messages, out of the working set.
+
+messages_db (and every sort, count and save over it) only has to cover the
+messages still being worked on. archive_due() picks the ones that are done
+with - replied messages older than MESSAGE_ARCHIVE_REPLIED_DAYS, and any
+message older than MESSAGE_RETENTION_DAYS - and MessageArchive.append()
+moves them to one gzip-compressed JSON-lines file per month of the message
+date:
+
+    archive/messages-2025-01.jsonl.gz
+    archive/messages-2025-02.jsonl.gz
+    archive/index.json          message count and size of every file
+
+A file is never rewritten: an archive run copies the compressed bytes and
+adds a new gzip member at the end, then renames the copy over the file, so
+a crash leaves either the old or the new file. gzip readers read
+concatenated members as one stream.
+
+iter_messages() streams archived messages newest first, decompressing one
+month at a time and only as far as the caller reads, so a page of results
+or a search with a limit doesn't unpack the whole archive.
+
+Run by hand (uses STORAGE_BACKEND / SQLITE_PATH like app.py):
+    python archive.py run [--dry-run]
+"""
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import json_codec
+
+try:
+    import fcntl
+except ImportError:  # Windows - archive runs aren't serialized between processes
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = os.environ.get('MESSAGE_ARCHIVE_DIR', 'archive')
+
+_MONTH_FILE = re.compile(r'^messages-(\d{4}-\d{2})\.jsonl\.gz$')
+
+
+def archive_due(messages, now=None, retention_days=180, replied_days=30):
+    """Messages to move to the archive, oldest first"""
+    now = now or datetime.now()
+    old = (now - timedelta(days=retention_days)).isoformat()
+    replied_old = (now - timedelta(days=replied_days)).isoformat()
+    due = [m for m in messages
+           if m.get('date') and (m['date'] < old or (m.get('replied') and m['date'] < replied_old))]
+    due.sort(key=lambda m: (m['date'], m['id']))
+    return due
+
+
+class MessageArchive:
+    """Monthly gzip JSON-lines files of archived messages"""
+
+    def __init__(self, directory=ARCHIVE_DIR):
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index.json')
+
+    def _path(self, month):
+        return os.path.join(self.directory, f'messages-{month}.jsonl.gz')
+
+    @contextmanager
+    def locked(self, blocking=True):
+        """
+        Hold the archive lock (across processes on POSIX). Yields False
+        instead of waiting when blocking is False and another process has it.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, '.archive.lock'), 'a') as lock_file:
+            acquired = True
+            if fcntl:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+                except BlockingIOError:
+                    acquired = False
+            yield acquired
+
+    def months(self):
+        """Months that have an archive file, newest first"""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return sorted((m.group(1) for m in map(_MONTH_FILE.match, names) if m), reverse=True)
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index):
+        tmp_path = f'{self.index_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def counts(self):
+        """{month: number of messages}; files the index doesn't match are recounted"""
+        index = self._read_index()
+        counts = {}
+        for month in self.months():
+            entry = index.get(month, {})
+            try:
+                size = os.path.getsize(self._path(month))
+            except OSError:
+                continue
+            if entry.get('size') != size:
+                entry = {'count': sum(1 for _ in self._read_month(month)), 'size': size}
+            counts[month] = entry['count']
+        return counts
+
+    def append(self, messages):
+        """Add messages to their month files. Call with the archive locked."""
+        by_month = {}
+        for message in messages:
+            by_month.setdefault(message['date'][:7], []).append(message)
+
+        index = self._read_index()
+        for month, batch in by_month.items():
+            path = self._path(month)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            if os.path.exists(path):
+                shutil.copyfile(path, tmp_path)
+            with open(tmp_path, 'ab') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='ab') as f:
+                    for message in batch:
+                        f.write(json_codec.dumps_bytes(message) + b'\n')
+                raw.flush()
+                os.fsync(raw.fileno())
+            previous = index.get(month, {}).get('count', 0) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            index[month] = {'count': previous + len(batch), 'size': os.path.getsize(path)}
+        self._write_index(index)
+        return len(messages)
+
+    def _read_month(self, month):
+        try:
+            f = gzip.open(self._path(month), 'rb')
+        except OSError:
+            return
+        with f:
+            try:
+                for line in f:
+                    if line.strip():
+                        yield json_codec.loads(line)
+            except (EOFError, gzip.BadGzipFile, ValueError) as e:
+                logger.warning("Archive %s is damaged after the last good message: %s", month, e)
+
+    def iter_messages(self, before=None):
+        """
+        Archived messages newest first, each with 'archived': True. With
+        before (a (date, id) key) only messages older than it are yielded.
+        """
+        for month in self.months():
+            if before and month > before[0][:7]:
+                continue
+            # One month is sorted in memory; later months aren't read at all
+            # if the caller stops early
+            records = sorted(self._read_month(month), key=lambda m: (m.get('date', ''), m['id']), reverse=True)
+            seen = set()
+            for record in records:
+                key = (record.get('date', ''), record['id'])
+                if record['id'] in seen or (before and key >= before):
+                    continue
+                seen.add(record['id'])
+                yield {**record, 'archived': True}
+
+
+if __name__ == '__main__':
+    from storage import open_store
+
+    if len(sys.argv) < 2 or sys.argv[1] != 'run':
+        print('Usage: python archive.py run [--dry-run]')
+        sys.exit(1)
+    dry_run = '--dry-run' in sys.argv[2:]
+    store = open_store(os.environ.get('STORAGE_BACKEND', 'json'), 'messages.json', 'messages',
+                       os.environ.get('SQLITE_PATH', 'portfolio.db'))
+    messages = store.load() or []
+    due = archive_due(messages,
+                      retention_days=float(os.environ.get('MESSAGE_RETENTION_DAYS', 180)),
+                      replied_days=float(os.environ.get('MESSAGE_ARCHIVE_REPLIED_DAYS', 30)))
+    print(f'{len(due)} of {len(messages)} messages are due for the archive')
+    if due and not dry_run:
+        archive = MessageArchive()
+        with archive.locked():
+            archive.append(due)
+            store.delete_many([m['id'] for m in due])
+        print(f'Archived to {archive.directory}/')
@@ -0,0 +1,531 @@
+"""
+Endpoint benchmarks for the portfolio API.
+
+Generate a synthetic data set (projects.json, messages.json, skills.json)
+of a given size, then time the main routes against it and save the numbers
+as JSON, so two versions can be compared run against run:
+
+    python benchmark.py generate 10000 bench-data/10k
+    python benchmark.py run bench-data/10k --output before.json
+    ... change something ...
+    python benchmark.py run bench-data/10k --output after.json
+    python benchmark.py compare before.json after.json
+
+`run` copies the data set to a temp folder (the contact route writes to
+it), imports app.py there and sends each route's requests one after
+another through Flask's test client - no network, so the numbers are the
+app's own cost. With --socket the app is served by Werkzeug's threaded
+server on a local port and requests go over real HTTP connections from
+--concurrency threads; --url points the same load at an already running
+server (e.g. gunicorn) instead.
+
+Every route reports requests, throughput (requests per second),
+mean/p50/p95/p99/max latency in milliseconds, response size and non-2xx
+count. `compare` prints the change per route and exits with status 1 if
+any p50 or p95 got worse by more than --threshold percent.
+
+`startup` measures cold starts instead: each run is a fresh interpreter
+that imports the app, as a gunicorn worker without --preload does
+('import'), or imports it and runs warm_up(), as wsgi.create_app() does
+in the preloading master ('preload'), then sends the site's first page
+requests. It reports the median time from process start to ready, the
+import and warm-up times, the first-request latencies and which of the
+lazily imported modules (requests, smtplib, ...) got loaded anyway:
+
+    python benchmark.py startup bench-data/10k --runs 5 --output startup.json
+
+Sizes are 100, 10000 and 1000000 records (100, 1e4, 1e6 are accepted);
+projects are capped at 10000 since a portfolio never has more. The
+million-message set is ~300 MB of JSON and needs a few GB of memory to
+load, like the app itself would.
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+BENCH_ADMIN_TOKEN = 'benchmark-admin-token'
+
+STACK_TAGS = ['Arduino', 'ESP32', 'Raspberry Pi', 'Python', 'C++', 'Embedded C', 'RTOS', 'KiCad',
+              'PCB Design', 'NRF24L01+ PA/LNA', 'MPU6050', 'BMP280', 'LoRa', 'MQTT', 'Flask',
+              'OpenCV', 'PID Control', 'Power Management', 'RF Design', 'Sensors', 'STM32',
+              'FreeRTOS', 'Bluetooth', 'GPS', 'Solar', 'Battery', 'Motor Driver', 'Servo']
+WORDS = ('robot drone sensor circuit board power signal wireless module controller battery '
+         'motor firmware prototype antenna telemetry voltage current design project build '
+         'hello would like collaborate question price quote interested work together help').split()
+
+
+def parse_size(text):
+    size = int(float(text))
+    if size < 1:
+        raise argparse.ArgumentTypeError('size must be at least 1')
+    return size
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def _write_array(path, records):
+    """Write a JSON array one record at a time (the 1e6 set doesn't fit a list comfortably)"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[\n')
+        for i, record in enumerate(records):
+            if i:
+                f.write(',\n')
+            f.write(json.dumps(record, separators=(',', ':')))
+        f.write('\n]\n')
+
+
+def generate(size, out_dir, seed=1):
+    """Write synthetic projects.json, messages.json and skills.json into out_dir"""
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    now = datetime.now()
+
+    def projects():
+        for i in range(1, min(size, 10000) + 1):
+            yield {
+                'id': i,
+                'name': f'{rng.choice(WORDS).capitalize()} {rng.choice(WORDS).capitalize()} {i}',
+                'mission': _sentence(rng, 12),
+                'missionBrief': ' '.join(_sentence(rng, 15) for _ in range(4)),
+                'architecture': 'Controller -> Sensors -> Radio',
+                'linkedInLink': '',
+                'stack': rng.sample(STACK_TAGS, rng.randint(2, 8)),
+                'statusValues': {'stability': rng.randint(50, 100), 'range': rng.randint(50, 100),
+                                 'reliability': rng.randint(50, 100)},
+                'images': [f'image/project/pro{i}/ima{n}.jpg' for n in range(1, rng.randint(2, 6))],
+                'status': 'live' if rng.random() < 0.8 else 'draft',
+                'createdAt': (now - timedelta(days=rng.randint(0, 700))).isoformat(),
+                'updatedAt': now.isoformat()
+            }
+
+    def messages():
+        # Spread over the last year, oldest first like a real inbox file
+        step = 365 * 86400 / size
+        for i in range(1, size + 1):
+            first = rng.choice(WORDS).capitalize()
+            yield {
+                'id': i,
+                'name': f'{first} {rng.choice(WORDS).capitalize()}',
+                'email': f'{first.lower()}{i}@example.com',
+                'subject': _sentence(rng, 5),
+                'message': ' '.join(_sentence(rng, 12) for _ in range(rng.randint(1, 4))),
+                'date': (now - timedelta(seconds=(size - i) * step)).isoformat(),
+                'read': rng.random() < 0.7,
+                'replied': rng.random() < 0.4
+            }
+
+    _write_array(os.path.join(out_dir, 'projects.json'), projects())
+    _write_array(os.path.join(out_dir, 'messages.json'), messages())
+    skills = [{'id': i + 1, 'name': tag, 'percentage': rng.randint(40, 100)}
+              for i, tag in enumerate(STACK_TAGS[:12])]
+    _write_array(os.path.join(out_dir, 'skills.json'), skills)
+
+
+def routes():
+    """(name, method, path, body factory, admin) for every benchmarked route"""
+    counter = iter(range(1, 10 ** 9))
+
+    def contact_body():
+        n = next(counter)
+        # Distinct sender and text, so duplicate folding doesn't kick in
+        return {'name': f'Bench {n}', 'email': f'bench{n}@example.com', 'subject': f'Benchmark {n}',
+                'message': f'Benchmark message number {n} ' + ' '.join(random.choice(WORDS) for _ in range(20))}
+
+    return [
+        ('projects', 'GET', '/api/projects', None, False),
+        ('projects_summary_live', 'GET', '/api/projects?view=summary&status=live', None, False),
+        ('projects_tags', 'GET', '/api/projects?view=summary&tags=Arduino,Python', None, False),
+        ('projects_facets', 'GET', '/api/projects/facets?status=live&tags=ESP32', None, False),
+        ('projects_search', 'GET', '/api/projects/search?q=sensor+ardu', None, False),
+        ('project', 'GET', '/api/projects/1', None, False),
+        ('bootstrap', 'GET', '/api/bootstrap', None, False),
+        ('messages', 'GET', '/api/messages?limit=50', None, True),
+        ('messages_unread', 'GET', '/api/messages?limit=50&read=false', None, True),
+        ('messages_count', 'GET', '/api/messages/count', None, True),
+        ('messages_search', 'GET', '/api/messages/search?q=drone+batt', None, True),
+        ('contact', 'POST', '/api/contact', contact_body, False),
+    ]
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))]
+
+
+def summarize(latencies, elapsed, sizes, errors):
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3) if seconds is not None else None
+    return {
+        'requests': len(ordered),
+        'throughput': round(len(ordered) / elapsed, 1) if elapsed else None,
+        'mean_ms': ms(sum(ordered) / len(ordered)) if ordered else None,
+        'p50_ms': ms(percentile(ordered, 50)),
+        'p95_ms': ms(percentile(ordered, 95)),
+        'p99_ms': ms(percentile(ordered, 99)),
+        'max_ms': ms(ordered[-1]) if ordered else None,
+        'bytes': round(sum(sizes) / len(sizes)) if sizes else 0,
+        'errors': errors
+    }
+
+
+def bench_test_client(app, requests, warmup, selected):
+    client = app.test_client()
+    headers = {'X-Auth-Token': BENCH_ADMIN_TOKEN}
+    results = {}
+    for name, method, path, body, admin in selected:
+        for _ in range(warmup):
+            client.open(path, method=method, json=body() if body else None, headers=headers if admin else None)
+        latencies, sizes, errors = [], [], 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            payload = body() if body else None
+            t = time.perf_counter()
+            response = client.open(path, method=method, json=payload, headers=headers if admin else None)
+            data = response.get_data()
+            latencies.append(time.perf_counter() - t)
+            sizes.append(len(data))
+            errors += response.status_code >= 300
+        results[name] = summarize(latencies, time.perf_counter() - started, sizes, errors)
+        print(f"  {name:24} p50 {results[name]['p50_ms']:>9} ms  p95 {results[name]['p95_ms']:>9} ms  "
+              f"{results[name]['throughput']:>8} req/s", file=sys.stderr)
+    return results
+
+
+def _http_worker(base, count, method, path, body, headers, latencies, sizes, errors, lock):
+    parts = urlsplit(base)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    conn = connection_class(parts.hostname, parts.port, timeout=60)
+    local_latencies, local_sizes, local_errors = [], [], 0
+    for _ in range(count):
+        request_headers = dict(headers)
+        data = None
+        if body:
+            data = json.dumps(body()).encode('utf-8')
+            request_headers['Content-Type'] = 'application/json'
+        t = time.perf_counter()
+        try:
+            conn.request(method, path, body=data, headers=request_headers)
+            response = conn.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = connection_class(parts.hostname, parts.port, timeout=60)
+            local_errors += 1
+            continue
+        local_latencies.append(time.perf_counter() - t)
+        local_sizes.append(len(payload))
+        local_errors += response.status >= 300
+    conn.close()
+    with lock:
+        latencies.extend(local_latencies)
+        sizes.extend(local_sizes)
+        errors[0] += local_errors
+
+
+def bench_http(base, requests, warmup, concurrency, selected, admin_token):
+    results = {}
+    for name, method, path, body, admin in selected:
+        headers = {'X-Auth-Token': admin_token} if admin else {}
+        lock = threading.Lock()
+        _http_worker(base, warmup, method, path, body, headers, [], [], [0], lock)
+        latencies, sizes, errors = [], [], [0]
+        per_thread = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+        threads = [threading.Thread(target=_http_worker,
+                                    args=(base, n, method, path, body, headers, latencies, sizes, errors, lock))
+                   for n in per_thread if n]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results[name] = summarize(latencies, time.perf_counter() - started, sizes, errors[0])
+        print(f"  {name:24} p50 {results[name]['p50_ms']:>9} ms  p95 {results[name]['p95_ms']:>9} ms  "
+              f"{results[name]['throughput']:>8} req/s", file=sys.stderr)
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _bench_env(work_dir):
+    """Environment for an app with work_dir as its data folder and side effects turned off"""
+    return {
+        'STORAGE_BACKEND': 'json',
+        'ADMIN_TOKEN': BENCH_ADMIN_TOKEN,
+        'SITE_ROOT': work_dir,
+        'SNAPSHOT_EXPORT': '0',
+        'RATE_LIMIT_ENABLED': '0',
+        # Keep the data set as generated: nothing gets archived mid-run
+        'MESSAGE_RETENTION_DAYS': '36500',
+        'MESSAGE_ARCHIVE_REPLIED_DAYS': '36500',
+        'LOG_LEVEL': os.environ.get('LOG_LEVEL', 'WARNING'),
+    }
+
+
+def _load_app(work_dir):
+    """Import app.py with work_dir as its data folder and side effects turned off"""
+    os.environ.update(_bench_env(work_dir))
+    os.chdir(work_dir)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    started = time.perf_counter()
+    import app as app_module
+    return app_module, time.perf_counter() - started
+
+
+def run(args):
+    selected = [r for r in routes() if not args.routes or r[0] in args.routes]
+    report = {
+        'generatedAt': datetime.now().isoformat(),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'mode': 'url' if args.url else 'socket' if args.socket else 'test_client',
+        'requests': args.requests,
+        'warmup': args.warmup,
+        'concurrency': args.concurrency if (args.url or args.socket) else 1,
+    }
+
+    if args.url:
+        report['target'] = args.url
+        print(f'Benchmarking {args.url}', file=sys.stderr)
+        report['routes'] = bench_http(args.url.rstrip('/'), args.requests, args.warmup, args.concurrency,
+                                      selected, args.admin_token or BENCH_ADMIN_TOKEN)
+    else:
+        source = os.path.abspath(args.data)
+        work_dir = tempfile.mkdtemp(prefix='portfolio-bench-')
+        try:
+            for name in ('projects.json', 'messages.json', 'skills.json'):
+                shutil.copy(os.path.join(source, name), work_dir)
+            app_module, import_seconds = _load_app(work_dir)
+            report['dataset'] = {'path': source, 'projects': len(app_module.projects_db),
+                                 'messages': len(app_module.messages_db)}
+            report['startup_ms'] = round(import_seconds * 1000, 1)
+            print(f"Loaded {len(app_module.projects_db)} projects and {len(app_module.messages_db)} messages "
+                  f"in {report['startup_ms']} ms", file=sys.stderr)
+            if args.socket:
+                from werkzeug.serving import make_server, WSGIRequestHandler
+
+                class KeepAliveHandler(WSGIRequestHandler):
+                    protocol_version = 'HTTP/1.1'
+
+                    def log_request(self, *args):
+                        pass
+
+                server = make_server('127.0.0.1', 0, app_module.app, threaded=True, request_handler=KeepAliveHandler)
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+                try:
+                    report['routes'] = bench_http(f'http://127.0.0.1:{server.port}', args.requests, args.warmup,
+                                                  args.concurrency, selected, BENCH_ADMIN_TOKEN)
+                finally:
+                    server.shutdown()
+            else:
+                report['routes'] = bench_test_client(app_module.app, args.requests, args.warmup, selected)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f'Results written to {args.output}', file=sys.stderr)
+    else:
+        print(text)
+
+
+# Modules app.py imports only when email is sent; any of them in a fresh
+# process after startup slows down every cold start
+LAZY_MODULES = ('requests', 'urllib3', 'smtplib', 'email.mime.multipart', 'PIL')
+FIRST_PAGE_PATHS = ('/api/bootstrap', '/api/projects?view=summary&status=live', '/api/projects/1')
+
+# Runs in a fresh interpreter (python -c), so nothing imported by this
+# file skews what app.py itself pulls in
+_STARTUP_CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, BACKEND_DIR)
+import app
+imported = time.perf_counter()
+if MODE == 'preload':
+    app.warm_up()
+ready = time.perf_counter()
+ready_at = time.time()
+client = app.app.test_client()
+first = {}
+for path in PATHS:
+    t = time.perf_counter()
+    client.get(path).get_data()
+    first[path] = (time.perf_counter() - t) * 1000
+print(json.dumps({
+    'readyAt': ready_at,
+    'import_ms': (imported - started) * 1000,
+    'warm_up_ms': (ready - imported) * 1000,
+    'first_requests': first,
+    'lazyModulesLoaded': [m for m in LAZY_MODULES if m in sys.modules],
+}))
+'''
+
+
+def startup(args):
+    source = os.path.abspath(args.data)
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    work_dir = tempfile.mkdtemp(prefix='portfolio-startup-')
+    report = {
+        'generatedAt': datetime.now().isoformat(),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'dataset': {'path': source},
+        'runs': args.runs,
+        'startup': {}
+    }
+    try:
+        for name in ('projects.json', 'messages.json', 'skills.json'):
+            shutil.copy(os.path.join(source, name), work_dir)
+        env = {**os.environ, **_bench_env(work_dir)}
+        for mode in ('import', 'preload'):
+            code = (f'BACKEND_DIR = {backend_dir!r}; MODE = {mode!r}; PATHS = {FIRST_PAGE_PATHS!r}; '
+                    f'LAZY_MODULES = {LAZY_MODULES!r}' + _STARTUP_CHILD)
+            runs = []
+            for _ in range(args.runs):
+                spawned = time.time()
+                child = subprocess.run([sys.executable, '-c', code], cwd=work_dir, env=env,
+                                       capture_output=True, text=True, timeout=600)
+                if child.returncode != 0:
+                    raise SystemExit(f'startup run failed:\n{child.stderr}')
+                result = json.loads(child.stdout.strip().splitlines()[-1])
+                result['ready_ms'] = (result.pop('readyAt') - spawned) * 1000
+                runs.append(result)
+
+            median = lambda values: round(sorted(values)[len(values) // 2], 1)
+            summary = {key: median([r[key] for r in runs]) for key in ('ready_ms', 'import_ms', 'warm_up_ms')}
+            summary['first_requests_ms'] = {path: median([r['first_requests'][path] for r in runs])
+                                            for path in FIRST_PAGE_PATHS}
+            summary['first_page_ms'] = round(summary['ready_ms'] + sum(summary['first_requests_ms'].values()), 1)
+            summary['lazyModulesLoaded'] = runs[-1]['lazyModulesLoaded']
+            report['startup'][mode] = summary
+            print(f"  {mode:8} ready {summary['ready_ms']:>8} ms (import {summary['import_ms']} ms, "
+                  f"warm-up {summary['warm_up_ms']} ms)  first page {summary['first_page_ms']:>8} ms", file=sys.stderr)
+            if summary['lazyModulesLoaded']:
+                print(f"           imported at startup: {', '.join(summary['lazyModulesLoaded'])}", file=sys.stderr)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f'Results written to {args.output}', file=sys.stderr)
+    else:
+        print(text)
+
+
+def compare(args):
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+
+    regressions = []
+    if current.get('routes'):
+        print(f"{'route':24} {'p50 ms':>21} {'p95 ms':>21} {'req/s':>19}")
+    for name, now in current.get('routes', {}).items():
+        before = baseline.get('routes', {}).get(name)
+        if not before:
+            print(f'{name:24} (new)')
+            continue
+        cells = []
+        for key in ('p50_ms', 'p95_ms', 'throughput'):
+            old, new = before.get(key), now.get(key)
+            change = (new - old) / old * 100 if old and new is not None else 0.0
+            cells.append(f'{str(old):>8} -> {str(new):>8} {change:+6.1f}%')
+            if key != 'throughput' and change > args.threshold:
+                regressions.append(f'{name} {key} {change:+.1f}%')
+        print(f'{name:24} ' + '  '.join(cells))
+
+    for mode, now in current.get('startup', {}).items():
+        before = baseline.get('startup', {}).get(mode)
+        if not before:
+            continue
+        cells = []
+        for key in ('ready_ms', 'first_page_ms'):
+            old, new = before.get(key), now.get(key)
+            change = (new - old) / old * 100 if old and new is not None else 0.0
+            cells.append(f'{key} {str(old):>8} -> {str(new):>8} {change:+6.1f}%')
+            if change > args.threshold:
+                regressions.append(f'startup {mode} {key} {change:+.1f}%')
+        print(f"{'startup ' + mode:24} " + '  '.join(cells))
+
+    if regressions:
+        print(f"\nSlower by more than {args.threshold}%: " + ', '.join(regressions))
+        sys.exit(1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the portfolio API endpoints')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    gen = commands.add_parser('generate', help='write a synthetic data set')
+    gen.add_argument('size', type=parse_size, help='number of messages (and projects, up to 10000): 100, 1e4, 1e6')
+    gen.add_argument('out_dir')
+    gen.add_argument('--seed', type=int, default=1)
+
+    bench = commands.add_parser('run', help='time the routes')
+    bench.add_argument('data', nargs='?', help='data set folder from generate (not needed with --url)')
+    bench.add_argument('--requests', type=int, default=200, help='timed requests per route (default 200)')
+    bench.add_argument('--warmup', type=int, default=10, help='untimed requests per route first (default 10)')
+    bench.add_argument('--socket', action='store_true', help='serve the app on a local port and use real HTTP')
+    bench.add_argument('--url', help='benchmark an already running server at this base URL')
+    bench.add_argument('--admin-token', help='ADMIN_TOKEN of the server given with --url')
+    bench.add_argument('--concurrency', type=int, default=4, help='client threads in socket/url mode (default 4)')
+    bench.add_argument('--routes', nargs='*', help='only these routes (names as in the output)')
+    bench.add_argument('--output', help='write the JSON results here instead of stdout')
+
+    start = commands.add_parser('startup', help='time cold starts in fresh processes')
+    start.add_argument('data', help='data set folder from generate')
+    start.add_argument('--runs', type=int, default=5, help='processes per mode (default 5, median reported)')
+    start.add_argument('--output', help='write the JSON results here instead of stdout')
+
+    comp = commands.add_parser('compare', help='compare two result files')
+    comp.add_argument('baseline')
+    comp.add_argument('current')
+    comp.add_argument('--threshold', type=float, default=10.0,
+                      help='fail if p50/p95 got worse by more than this percent (default 10)')
+
+    args = parser.parse_args(argv)
+    if args.command == 'generate':
+        started = time.perf_counter()
+        generate(args.size, args.out_dir, args.seed)
+        print(f'Wrote {args.size} records to {args.out_dir} in {time.perf_counter() - started:.1f} s')
+    elif args.command == 'run':
+        if not args.url and not args.data:
+            parser.error('run needs a data folder (or --url)')
+        run(args)
+    elif args.command == 'startup':
+        startup(args)
+    else:
+        compare(args)
+
+
+if __name__ == '__main__':
+    main()
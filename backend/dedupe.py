@@ -0,0 +1,201 @@
+"""
+Duplicate detection for contact form submissions.
+
+Bots (and impatient people) send the same message again and again. Instead
+of storing every copy, contact() asks DuplicateIndex whether a recent
+message says the same thing, and if so bumps a counter on that message.
+
+Two messages are duplicates when, after normalizing the text (case-folded,
+punctuation and whitespace dropped):
+- the sender and the body are the same (exact fingerprint), or
+- the sender is the same and the bodies share most of their words: a
+  Jaccard similarity of the word sets of at least SAME_SENDER_SIMILARITY,
+  which a one-word edit stays above from about seven words on, or
+- the bodies are near-identical (SIMILARITY) and long enough
+  (MIN_SHARED_TOKENS words) that two people writing them independently is
+  unlikely. Short messages like "Hi, are you available?" from different
+  people are always kept.
+
+A sender's own recent messages are looked up by email. Near-identical
+messages from anyone are found without comparing against every message:
+each message gets a MinHash signature of its word set, cut into BANDS
+bands of ROWS values, and only messages agreeing exactly on a band are
+compared. A pair at SIMILARITY shares a band with over 99% probability;
+unrelated messages almost never do.
+
+Only recent messages are indexed (max_age, at most max_items), so the index
+stays small and a message sent again weeks later is stored as a new one.
+Like SearchIndex, it is updated on save and rebuilt after a reload.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+_TOKEN = re.compile(r'\w+')
+
+SAME_SENDER_SIMILARITY = 0.7
+SIMILARITY = 0.85
+MIN_SHARED_TOKENS = 12
+BANDS = 8
+ROWS = 4
+
+
+def tokenize(text):
+    return _TOKEN.findall(str(text or '').casefold())
+
+
+def fingerprint(email, body):
+    normalized = str(email or '').strip().casefold() + '\n' + ' '.join(tokenize(body))
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+@lru_cache(maxsize=50000)
+def _token_hashes(token):
+    # BANDS * ROWS 32-bit hash values per word, 16 per 64-byte digest.
+    # Cached: messages share most of their words
+    values = []
+    for salt in range(BANDS * ROWS // 16):
+        digest = hashlib.blake2b(token.encode('utf-8'), digest_size=64, salt=bytes([salt])).digest()
+        values.extend(int.from_bytes(digest[i:i + 4], 'big') for i in range(0, 64, 4))
+    return values
+
+
+def minhash(words):
+    """MinHash signature of a word set (None when empty)"""
+    if not words:
+        return None
+    return [min(column) for column in zip(*(_token_hashes(word) for word in words))]
+
+
+def _bands(signature):
+    if signature is None:
+        return []
+    return [(band, tuple(signature[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+def similarity(a, b):
+    """Jaccard similarity of two word sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class DuplicateIndex:
+    """Fingerprints of recent messages, for finding the original of a repeat"""
+
+    def __init__(self, max_items=2000, max_age=timedelta(days=3)):
+        self.max_items = max_items
+        self.max_age = max_age
+        self._entries = OrderedDict()  # id -> (date, email, fingerprint, words, bands), oldest first
+        self._exact = {}  # fingerprint -> id
+        self._by_email = {}  # email -> {id}
+        self._bands = {}  # (band, values) -> {id}
+        self._stale = True
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _parse_date(value):
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return None
+
+    def _add(self, record):
+        date = self._parse_date(record.get('date'))
+        if date is None:
+            return
+        email = str(record.get('email') or '').strip().casefold()
+        words = frozenset(tokenize(record.get('message')))
+        fp = fingerprint(email, record.get('message'))
+        bands = _bands(minhash(words)) if len(words) >= MIN_SHARED_TOKENS else []
+        self._entries[record['id']] = (date, email, fp, words, bands)
+        self._exact.setdefault(fp, record['id'])
+        self._by_email.setdefault(email, set()).add(record['id'])
+        for band in bands:
+            self._bands.setdefault(band, set()).add(record['id'])
+
+    def _remove(self, record_id):
+        entry = self._entries.pop(record_id, None)
+        if entry is None:
+            return
+        _, email, fp, _, bands = entry
+        if self._exact.get(fp) == record_id:
+            del self._exact[fp]
+        for index, key in [(self._by_email, email)] + [(self._bands, band) for band in bands]:
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(record_id)
+                if not ids:
+                    del index[key]
+
+    def _expire(self, now):
+        cutoff = now - self.max_age
+        while self._entries:
+            record_id, entry = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_items and entry[0] >= cutoff:
+                break
+            self._remove(record_id)
+
+    def rebuild(self, records, now=None):
+        now = now or datetime.now()
+        cutoff = now - self.max_age
+        recent = [r for r in records if (self._parse_date(r.get('date')) or cutoff) > cutoff]
+        recent.sort(key=lambda r: (r['date'], r['id']))
+        with self._lock:
+            self._entries = OrderedDict()
+            self._exact = {}
+            self._by_email = {}
+            self._bands = {}
+            for record in recent[-self.max_items:]:
+                self._add(record)
+            self._stale = False
+
+    def mark_stale(self):
+        """Data was reloaded: rebuild from scratch on the next lookup"""
+        with self._lock:
+            self._stale = True
+
+    def update(self, record):
+        """Index a newly saved message (messages don't change their text)"""
+        with self._lock:
+            if self._stale or record['id'] in self._entries:
+                return
+            self._add(record)
+            self._expire(datetime.now())
+
+    def remove(self, record_id):
+        with self._lock:
+            if not self._stale:
+                self._remove(record_id)
+
+    def find(self, email, body, records=None, now=None):
+        """
+        Id of a recent message this one duplicates, or None. records (a
+        list or a callable returning one) is used to rebuild the index
+        first if it is stale.
+        """
+        if self._stale and records is not None:
+            self.rebuild(records() if callable(records) else records, now)
+        email = str(email or '').strip().casefold()
+        words = frozenset(tokenize(body))
+        bands = _bands(minhash(words)) if len(words) >= MIN_SHARED_TOKENS else []
+        with self._lock:
+            self._expire(now or datetime.now())
+            original = self._exact.get(fingerprint(email, body))
+            if original is not None:
+                return original
+
+            candidates = set(self._by_email.get(email, ()))
+            for band in bands:
+                candidates |= self._bands.get(band, set())
+            best = None
+            for record_id in candidates:
+                _, other_email, _, other_words, _ = self._entries[record_id]
+                score = similarity(words, other_words)
+                threshold = SAME_SENDER_SIMILARITY if other_email == email else SIMILARITY
+                if score >= threshold and (best is None or (-score, record_id) < best):
+                    best = (-score, record_id)
+            return best[1] if best else None
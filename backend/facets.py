@@ -0,0 +1,147 @@
+"""
+Faceted filtering of projects by stack tag and status.
+
+Stack entries are free-form ("ARDUINO", "Arduino", "NRF24L01+ PA/LNA"), so
+tags are normalized - whitespace collapsed and case-folded - before they are
+indexed. FacetIndex maps every normalized tag, and every status, to the set
+of project ids that have it:
+
+    'arduino'          -> {1, 4}
+    'nrf24l01+ pa/lna' -> {1}
+    status 'live'      -> {1, 2, 4}
+
+A filter is an intersection of those sets (smallest first), and the counts
+shown next to each tag are computed over the matching projects only. Like
+SearchIndex, the index is updated project by project on save, and after a
+full reload it is rebuilt on the next query.
+"""
+import threading
+
+
+def normalize_tag(tag):
+    return ' '.join(str(tag).split()).casefold()
+
+
+class FacetIndex:
+    """Tag and status -> record id sets, for records with an 'id'"""
+
+    def __init__(self, field='stack'):
+        self.field = field
+        self._tags = {}  # normalized tag -> {record id}
+        self._labels = {}  # normalized tag -> {spelling: number of records}
+        self._statuses = {}  # status -> {record id}
+        self._records = {}  # record id -> ({tag: spelling}, status)
+        self._stale = True
+        self._lock = threading.Lock()
+
+    def _add(self, record):
+        record_id = record['id']
+        spellings = {}
+        for value in record.get(self.field) or []:
+            label = ' '.join(str(value).split())
+            if label:
+                spellings.setdefault(label.casefold(), label)
+        for tag, label in spellings.items():
+            self._tags.setdefault(tag, set()).add(record_id)
+            labels = self._labels.setdefault(tag, {})
+            labels[label] = labels.get(label, 0) + 1
+        status = record.get('status', 'draft')
+        self._statuses.setdefault(status, set()).add(record_id)
+        self._records[record_id] = (spellings, status)
+
+    def _remove(self, record_id):
+        entry = self._records.pop(record_id, None)
+        if entry is None:
+            return
+        spellings, status = entry
+        for tag, label in spellings.items():
+            self._tags[tag].discard(record_id)
+            labels = self._labels[tag]
+            labels[label] -= 1
+            if not labels[label]:
+                del labels[label]
+            if not self._tags[tag]:
+                del self._tags[tag]
+                del self._labels[tag]
+        self._statuses[status].discard(record_id)
+        if not self._statuses[status]:
+            del self._statuses[status]
+
+    def rebuild(self, records):
+        with self._lock:
+            self._tags = {}
+            self._labels = {}
+            self._statuses = {}
+            self._records = {}
+            for record in records:
+                self._add(record)
+            self._stale = False
+
+    def mark_stale(self):
+        """Data was reloaded: rebuild from scratch on the next query"""
+        with self._lock:
+            self._stale = True
+
+    def update(self, record):
+        """(Re)index one record after it was created or changed"""
+        with self._lock:
+            if self._stale:
+                return
+            self._remove(record['id'])
+            self._add(record)
+
+    def remove(self, record_id):
+        with self._lock:
+            if not self._stale:
+                self._remove(record_id)
+
+    def _label(self, tag):
+        # The spelling most projects use
+        labels = self._labels[tag]
+        return max(labels, key=lambda label: (labels[label], label))
+
+    def _select(self, tags):
+        """Ids of records having every tag (all records if there are none)"""
+        sets = []
+        for tag in tags:
+            ids = self._tags.get(tag)
+            if not ids:
+                return set()
+            sets.append(ids)
+        if not sets:
+            return set(self._records)
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def query(self, tags=(), status=None, records=None):
+        """
+        Filter by tags (all must match) and status. Returns
+
+            {'tags': [normalized filter tags],
+             'ids': [matching ids, ascending],
+             'facets': [{'tag', 'label', 'count'}, ...],  # over the matches
+             'statuses': {status: count}}  # over the tag matches, any status
+
+        records (a list or a callable returning one) is used to rebuild the
+        index first if it is stale.
+        """
+        if self._stale and records is not None:
+            self.rebuild(records() if callable(records) else records)
+        tags = list(dict.fromkeys(t for t in (normalize_tag(tag) for tag in tags) if t))
+        with self._lock:
+            matching = self._select(tags)
+            statuses = {}
+            for record_id in matching:
+                record_status = self._records[record_id][1]
+                statuses[record_status] = statuses.get(record_status, 0) + 1
+            if status:
+                matching = matching & self._statuses.get(status, set())
+
+            counts = {}
+            for record_id in matching:
+                for tag in self._records[record_id][0]:
+                    counts[tag] = counts.get(tag, 0) + 1
+            facets = [{'tag': tag, 'label': self._label(tag), 'count': count}
+                      for tag, count in counts.items()]
+        facets.sort(key=lambda facet: (-facet['count'], facet['tag']))
+        return {'tags': tags, 'ids': sorted(matching), 'facets': facets, 'statuses': statuses}
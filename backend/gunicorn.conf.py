@@ -0,0 +1,16 @@
+"""
+Gunicorn settings, read automatically from the working directory:
+
+    gunicorn 'wsgi:create_app()'
+
+The app is preloaded in the master and forked into the workers (see
+wsgi.py). WEB_CONCURRENCY (set by Render) is the number of workers.
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = True
+# Email sending and image uploads can take a while
+timeout = 60
@@ -0,0 +1,216 @@
+"""
+Responsive image variants for project images.
+
+For every project image under the site root (image/project/pro<id>/...) we
+write resized copies - thumb, card and full - in the original format plus
+WebP (and AVIF with IMAGE_AVIF=1, if the installed Pillow can encode it).
+Files are named after a hash of the source bytes:
+
+    image/variants/<ab>/<digest>-<width>.<ext>
+
+so the same picture is only processed once, a changed picture gets new URLs
+(safe to cache forever), and re-running the pipeline is cheap.
+
+build_image_variants() returns the map stored on each project as
+'imageVariants', keyed by the image path in project['images']:
+
+    {
+        "image/project/pro5/ima1.jpg": {
+            "width": 4032, "height": 3024, "digest": "...", "source": [size, mtime_ns],
+            "sizes": {"thumb": {"width": 320, "src": "...jpg", "webp": "...webp"}, ...},
+            "srcset": {"src": "a.jpg 320w, b.jpg 800w, ...", "webp": "..."}
+        }
+    }
+
+Pillow is optional: without it the map is left as it is and the frontend
+keeps loading the original files.
+
+Backfill existing projects (uses STORAGE_BACKEND / SQLITE_PATH like app.py):
+    python images.py backfill [--force]
+"""
+import hashlib
+import logging
+import os
+import sys
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+_warned_no_pillow = False
+
+# Bump when sizes or encoder settings change so old variants aren't reused
+PIPELINE_VERSION = b'1'
+
+VARIANT_WIDTHS = (('thumb', 320), ('card', 800), ('full', 1600))
+
+SITE_ROOT = os.environ.get('SITE_ROOT') or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VARIANTS_DIR = 'image/variants'
+
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff')
+
+
+def _formats():
+    """Extra formats to write next to the original-format copy"""
+    if Image is None:
+        return ()
+    Image.init()
+    formats = ['webp'] if 'WEBP' in Image.SAVE else []
+    # AVIF is ~5x slower to encode than WebP for similar sizes at our
+    # quality settings, so it is opt-in
+    if os.environ.get('IMAGE_AVIF') == '1' and 'AVIF' in Image.SAVE:
+        formats.append('avif')
+    return tuple(formats)
+
+
+EXTRA_FORMATS = _formats()
+
+_SAVE_OPTIONS = {
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'png': ('PNG', {'optimize': True}),
+    'webp': ('WEBP', {'quality': 80, 'method': 2}),
+    'avif': ('AVIF', {'quality': 60, 'speed': 8}),
+}
+
+
+def is_local_image(path):
+    lower = (path or '').lower()
+    return not (lower.startswith('http://') or lower.startswith('https://') or lower.startswith('data:'))
+
+
+def resolve_source(path, root=SITE_ROOT):
+    """Absolute file path for a site-relative image path, or None if outside root"""
+    full = os.path.realpath(os.path.join(root, path.lstrip('/')))
+    if not full.startswith(os.path.realpath(root) + os.sep):
+        return None
+    return full
+
+
+def file_digest(path):
+    digest = hashlib.sha256(PIPELINE_VERSION)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:20]
+
+
+def _save(image, full_path, ext):
+    """Encode image to full_path via a temp file so readers never see half a file"""
+    fmt, options = _SAVE_OPTIONS[ext]
+    tmp_path = f'{full_path}.{os.getpid()}.tmp'
+    image.save(tmp_path, fmt, **options)
+    os.replace(tmp_path, full_path)
+
+
+def make_variants(source_path, digest, root=SITE_ROOT):
+    """
+    Write the resized copies of one image (skipping files that already
+    exist) and return its variants map entry.
+    """
+    with Image.open(source_path) as original:
+        if original.format == 'JPEG':
+            # Let the JPEG decoder downscale while decoding - much faster
+            # for camera-sized photos
+            original.draft('RGB', (VARIANT_WIDTHS[-1][1], VARIANT_WIDTHS[-1][1]))
+        image = ImageOps.exif_transpose(original)
+        image.load()
+    width, height = image.size
+
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+    base_ext = 'png' if has_alpha else 'jpg'
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    out_dir = os.path.join(root, VARIANTS_DIR, digest[:2])
+    os.makedirs(out_dir, exist_ok=True)
+
+    sizes = {}
+    # Largest first, each size resized from the previous one; images
+    # narrower than a size are never upscaled
+    for name, target in reversed(VARIANT_WIDTHS):
+        target = min(target, width)
+        if target != image.width:
+            image = image.resize((target, max(1, round(height * target / width))), Image.LANCZOS)
+        entry = {'width': image.width}
+        for ext in (base_ext,) + EXTRA_FORMATS:
+            rel_path = f'{VARIANTS_DIR}/{digest[:2]}/{digest}-{image.width}.{ext}'
+            full_path = os.path.join(root, rel_path)
+            if not os.path.exists(full_path):
+                _save(image, full_path, ext)
+            entry['src' if ext == base_ext else ext] = rel_path
+        sizes[name] = entry
+
+    srcset = {}
+    for key in ('src',) + EXTRA_FORMATS:
+        candidates = {}
+        for entry in sizes.values():
+            candidates[entry['width']] = f"{entry[key]} {entry['width']}w"
+        srcset[key] = ', '.join(candidates[w] for w in sorted(candidates))
+
+    return {'width': width, 'height': height, 'digest': digest,
+            'sizes': dict(reversed(list(sizes.items()))), 'srcset': srcset}
+
+
+def build_image_variants(images, previous=None, force=False, root=SITE_ROOT):
+    """
+    Variants map for a project's image list. Entries in previous are reused
+    when the source file hasn't changed; images that are remote or missing
+    on disk get no entry.
+    """
+    global _warned_no_pillow
+    previous = previous or {}
+    if Image is None:
+        if not _warned_no_pillow:
+            logger.warning("Pillow is not installed - skipping image variants (pip install Pillow)")
+            _warned_no_pillow = True
+        return previous
+
+    variants = {}
+    for path in images or []:
+        if not path or not is_local_image(path) or not path.lower().endswith(SOURCE_EXTENSIONS):
+            continue
+        source_path = resolve_source(path, root)
+        try:
+            st = os.stat(source_path) if source_path else None
+        except OSError:
+            st = None
+        if st is None:
+            continue
+        source = [st.st_size, st.st_mtime_ns]
+        entry = previous.get(path)
+        if entry and not force and entry.get('source') == source:
+            variants[path] = entry
+            continue
+        try:
+            digest = file_digest(source_path)
+            entry = make_variants(source_path, digest, root)
+        except Exception as e:
+            logger.warning("Could not make variants for %s: %s", path, e)
+            continue
+        entry['source'] = source
+        variants[path] = entry
+    return variants
+
+
+if __name__ == '__main__':
+    from storage import open_store
+
+    if len(sys.argv) < 2 or sys.argv[1] != 'backfill':
+        print('Usage: python images.py backfill [--force]')
+        sys.exit(1)
+    if Image is None:
+        print('Pillow is not installed: pip install Pillow')
+        sys.exit(1)
+    logging.basicConfig(level=logging.INFO)
+    force = '--force' in sys.argv[2:]
+    store = open_store(os.environ.get('STORAGE_BACKEND', 'json'), 'projects.json', 'projects',
+                       os.environ.get('SQLITE_PATH', 'portfolio.db'))
+    for project in store.load() or []:
+        variants = build_image_variants(project.get('images'), project.get('imageVariants'), force=force)
+        if variants != project.get('imageVariants'):
+            project['imageVariants'] = variants
+            store.put(project)
+        print(f"Project {project['id']} ({project.get('name', '')}): "
+              f"{len(variants)}/{len(project.get('images') or [])} images processed")
@@ -0,0 +1,114 @@
+"""
+Logging setup for the portfolio API.
+
+Request threads only put log records on an in-memory queue (QueueHandler);
+a background QueueListener thread formats them and writes them to stdout,
+so a slow or blocked stdout never holds up a request.
+
+Environment variables:
+    LOG_LEVEL   root level (default INFO)
+    LOG_FORMAT  'json' (one JSON object per line, default) or 'text'
+    LOG_LEVELS  per-module levels, e.g. "mail_queue=DEBUG,storage=WARNING"
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+
+import json_codec
+
+# Attributes every LogRecord has; anything else was passed with extra={...}
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_listener = None
+_settings = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message + any extra fields"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json_codec.dumps(entry, default=str)
+
+
+def parse_module_levels(spec):
+    """Turn "a=DEBUG,b.c=WARNING" into {'a': 'DEBUG', 'b.c': 'WARNING'}"""
+    levels = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level=None, fmt=None, module_levels=None):
+    """Route all logging through a queue to a stdout writer thread (idempotent)"""
+    global _listener, _settings
+    level = (level or os.environ.get('LOG_LEVEL', 'INFO')).upper()
+    fmt = fmt or os.environ.get('LOG_FORMAT', 'json')
+    if module_levels is None:
+        module_levels = parse_module_levels(os.environ.get('LOG_LEVELS', ''))
+    _settings = (level, fmt, module_levels)
+
+    if _listener is not None:
+        _listener.stop()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if fmt == 'json':
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+    return _listener
+
+
+def _stop_listener():
+    """Flush and stop the current writer thread (once, at exit)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+def _restart_in_child():
+    """
+    The writer thread doesn't survive a fork (gunicorn --preload): without
+    a new one a worker's records would pile up in the queue unwritten.
+    """
+    global _listener
+    if _listener is not None:
+        _listener = None
+        configure_logging(*_settings)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_in_child)
@@ -0,0 +1,436 @@
+"""
+Durable outbound email queue for the portfolio API.
+
+Reply emails are written to a store (see storage.py) as jobs and delivered
+by a fixed pool of worker threads. A job that fails is retried with
+exponential backoff until max_attempts is reached. Jobs still pending when
+the server stops are picked up again on the next start, so delivery is
+at-least-once. When too many jobs are pending, enqueue() raises QueueFull
+and the API answers 429 instead of piling up more work.
+
+Job states: queued -> sending -> sent, or sending -> retrying -> sending ...
+-> failed once max_attempts is used up. Only the last keep_finished sent or
+failed jobs are kept (in memory and, trimmed in batches, in the store).
+
+With several worker processes sharing the store (gunicorn), each job records
+the pid of the process sending it ('owner'). One process at a time holds the
+recovery lock: it re-sends the jobs left pending by the previous run when it
+starts, and every recover_interval seconds re-queues pending jobs whose
+owner has died, or that nobody has touched for orphan_after seconds past
+their due time. When the lock holder dies, another process takes the lock
+on its next check.
+
+Jobs queued together with enqueue_many() share a batchId. When a send_batch
+function is given, a worker hands all due jobs of the same batch to it in
+one call (up to batch_size), so the whole batch can go out over a single
+connection or a single batch API request.
+"""
+import heapq
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows - every process recovers pending jobs
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+PENDING_STATES = ('queued', 'sending', 'retrying')
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # exists, owned by another user
+    return True
+
+
+class QueueFull(Exception):
+    """Raised by enqueue() when max_pending jobs are already waiting"""
+
+    def __init__(self, retry_after):
+        super().__init__('Email queue is full')
+        self.retry_after = retry_after
+
+
+class MailQueue:
+    """Bounded, persistent email queue served by a fixed worker pool"""
+
+    def __init__(self, store, send, workers=2, max_pending=100, max_attempts=5,
+                 base_delay=5.0, max_delay=600.0, keep_finished=500, log=None,
+                 send_batch=None, batch_size=100, recover_interval=60.0, orphan_after=900.0):
+        self.store = store
+        self.send = send
+        self.send_batch = send_batch
+        self.batch_size = batch_size
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.keep_finished = keep_finished
+        self.recover_interval = recover_interval
+        self.orphan_after = orphan_after
+        self.log = log or logger.info
+        self._start_lock = threading.Lock()
+        self._started_pid = None
+        self._recovery_lock = None
+        self._reset()
+
+    def _reset(self):
+        self._jobs = {}
+        self._finished = deque()  # ids of sent/failed jobs still in _jobs, oldest first
+        self._evicted = []  # ids dropped from _finished, not yet deleted from the store
+        self._ready = []  # heap of (next_attempt_at, job_id)
+        self._pending = 0
+        self._last_id = 0
+        self._cond = threading.Condition()
+        self._threads = []
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Load persisted jobs and start the worker threads (once per process)"""
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return
+        with self._start_lock:
+            if self._started_pid == pid:
+                return
+            if self._started_pid is not None:
+                # Forked after starting: the worker threads didn't come along
+                self._reset()
+            with self._cond:
+                self._load_jobs()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f'mail-worker-{i + 1}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            if fcntl is not None:
+                # Without flock every process recovers at start (and only then)
+                thread = threading.Thread(target=self._recovery_loop, name='mail-recovery', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            self._started_pid = pid
+
+    def enqueue(self, to, subject, body, message_id=None):
+        """Persist a new job and hand it to the workers; returns the job"""
+        return self.enqueue_many([{'to': to, 'subject': subject, 'message': body,
+                                   'messageId': message_id}])[0]
+
+    def enqueue_many(self, emails, batch_id=None):
+        """
+        Queue several emails ({'to', 'subject', 'message', 'messageId'}) at
+        once, all or nothing. Returns the jobs.
+        """
+        self.start()
+        with self._cond:
+            if self._pending + len(emails) > self.max_pending:
+                raise QueueFull(retry_after=max(1, int(self.base_delay * 2)))
+            now = time.time()
+            jobs = [{
+                'id': self._next_id(),
+                'to': email['to'],
+                'subject': email['subject'],
+                'message': email['message'],
+                'messageId': email.get('messageId'),
+                'batchId': batch_id,
+                'owner': os.getpid(),
+                'status': 'queued',
+                'attempts': 0,
+                'lastError': None,
+                'nextAttemptAt': now,
+                'createdAt': datetime.now().isoformat(),
+                'updatedAt': datetime.now().isoformat()
+            } for email in emails]
+            # One journal append (one fsync) for the whole batch
+            self.store.put_many(jobs)
+            for job in jobs:
+                self._jobs[job['id']] = job
+                self._pending += 1
+                heapq.heappush(self._ready, (now, job['id']))
+            self._cond.notify_all()
+        return jobs
+
+    def new_batch_id(self):
+        """Allocate an id for a group of jobs passed to enqueue_many()"""
+        with self._cond:
+            return self._next_id()
+
+    def get(self, job_id):
+        """Return a job's public status, or None if unknown"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+        if job is None:
+            # Queued by another worker process - look it up in the store
+            job = next((j for j in self.store.load() or [] if j['id'] == job_id), None)
+        if job is None:
+            return None
+        return {key: value for key, value in job.items() if key != 'message'}
+
+    def get_batch(self, batch_id):
+        """Return the public status of every job in a batch (empty if unknown)"""
+        with self._cond:
+            jobs = [job for job in self._jobs.values() if job.get('batchId') == batch_id]
+        if not jobs:
+            jobs = [job for job in self.store.load() or [] if job.get('batchId') == batch_id]
+        jobs.sort(key=lambda job: job['id'])
+        return [{key: value for key, value in job.items() if key != 'message'} for job in jobs]
+
+    def stats(self):
+        """Counts of pending jobs and the queue limits"""
+        with self._cond:
+            return {
+                'pending': self._pending,
+                'maxPending': self.max_pending,
+                'workers': self.workers
+            }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _next_id(self):
+        # Time-based so ids from several processes sharing the store don't clash
+        self._last_id = max(self._last_id + 1, time.time_ns() // 1000)
+        return self._last_id
+
+    def _claim_recovery(self):
+        """Only one process (the first to start) re-sends leftover jobs"""
+        if fcntl is None or self._recovery_lock is not None:
+            return True
+        lock_path = (getattr(self.store, 'journal_path', None) or self.store.path) + '.lock'
+        lock_path = lock_path.replace('#', '-')
+        try:
+            self._recovery_lock = open(lock_path, 'a')
+            fcntl.flock(self._recovery_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            if self._recovery_lock:
+                self._recovery_lock.close()
+                self._recovery_lock = None
+            return False
+
+    def _load_jobs(self):
+        jobs = self.store.load() or []
+        if jobs:
+            self._last_id = max(job['id'] for job in jobs)
+        finished = [job for job in jobs if job['status'] not in PENDING_STATES]
+        pending = [job for job in jobs if job['status'] in PENDING_STATES]
+
+        # Forget the oldest finished jobs so the store doesn't grow forever
+        finished.sort(key=lambda job: job['id'])
+        kept = finished[-self.keep_finished:] if self.keep_finished else []
+        self.store.delete_many([job['id'] for job in finished[:len(finished) - len(kept)]])
+        for job in kept:
+            self._jobs[job['id']] = job
+            self._finished.append(job['id'])
+
+        # Always try to take the recovery lock so the first process to start
+        # keeps it even if there is nothing to recover right now
+        owns_recovery = self._claim_recovery()
+        if pending and owns_recovery:
+            self.log(f"📧 Recovering {len(pending)} pending email job(s)")
+            for job in pending:
+                self._adopt(job)
+
+    def _adopt(self, job):
+        """Take over a pending job from the store (call with _cond held)"""
+        # A job caught mid-send may or may not have gone out; sending it
+        # again is better than losing it
+        if job['status'] == 'sending':
+            job['status'] = 'queued'
+        job['owner'] = os.getpid()
+        self._jobs[job['id']] = job
+        self._pending += 1
+        heapq.heappush(self._ready, (job.get('nextAttemptAt') or 0, job['id']))
+
+    def _is_orphan(self, job, now):
+        """True if no live process is going to send this pending job"""
+        owner = job.get('owner')
+        # Our own pid on a job we don't know: left by an earlier process
+        # that had the same pid
+        if owner == os.getpid() or (owner is not None and not _pid_alive(owner)):
+            return True
+        try:
+            updated = datetime.fromisoformat(job['updatedAt']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            updated = 0
+        return max(job.get('nextAttemptAt') or 0, updated) + self.orphan_after < now
+
+    def _recover_orphans(self):
+        """Re-queue pending jobs whose process died; returns how many"""
+        jobs = self.store.load() or []
+        now = time.time()
+        with self._cond:
+            orphans = [job for job in jobs
+                       if job['status'] in PENDING_STATES and job['id'] not in self._jobs
+                       and self._is_orphan(job, now)]
+            for job in orphans:
+                self._adopt(job)
+            if orphans:
+                self._cond.notify_all()
+        if orphans:
+            self.store.put_many(orphans)
+            self.log(f"📧 Recovered {len(orphans)} email job(s) left by a stopped worker process")
+        return len(orphans)
+
+    def _recovery_loop(self):
+        while True:
+            time.sleep(self.recover_interval)
+            try:
+                if self._claim_recovery():
+                    self._recover_orphans()
+            except Exception:
+                logger.exception("Email job recovery failed")
+
+    def _forget_finished(self, job):
+        """Keep only the last keep_finished sent/failed jobs (call with _cond held)"""
+        self._finished.append(job['id'])
+        while len(self._finished) > self.keep_finished:
+            job_id = self._finished.popleft()
+            self._jobs.pop(job_id, None)
+            self._evicted.append(job_id)
+        # Deleted from the store in batches rather than one write per email
+        if len(self._evicted) >= max(1, self.keep_finished // 10):
+            try:
+                self.store.delete_many(self._evicted)
+                self._evicted = []
+            except Exception:
+                logger.exception("Could not delete finished email jobs (retried with the next batch)")
+
+    def _update(self, job, **changes):
+        job.update(changes)
+        job['updatedAt'] = datetime.now().isoformat()
+        try:
+            self.store.put(job)
+        except Exception:
+            # The job's state in memory is what the workers go by; the stored
+            # copy catches up with its next write (or is recovered, and at
+            # worst sent again, after a restart)
+            logger.exception(f"Could not save email job {job['id']} ({job['status']})")
+
+    def _backoff(self, attempts):
+        delay = min(self.max_delay, self.base_delay * 2 ** (max(attempts, 1) - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _retry_later(self, jobs, error, delivered):
+        """Put jobs a worker couldn't finish back in the queue with a backoff"""
+        with self._cond:
+            for job in jobs:
+                if not delivered:
+                    # Never handed to send(): the attempt doesn't count
+                    job['attempts'] = max(0, job['attempts'] - 1)
+                next_attempt = time.time() + self._backoff(job['attempts'])
+                job.update(status='retrying', lastError=error, nextAttemptAt=next_attempt,
+                           updatedAt=datetime.now().isoformat())
+                heapq.heappush(self._ready, (next_attempt, job['id']))
+            self._cond.notify()
+        try:
+            self.store.put_many(jobs)
+        except Exception:
+            logger.exception("Could not save email jobs put back in the queue")
+
+    def _take_due_jobs(self):
+        """
+        Block until a job is due, then mark it (and, for batches, the other
+        due jobs of the same batch) as sending and return them. The caller
+        persists the claim, outside the queue lock.
+        """
+        with self._cond:
+            while True:
+                if self._ready:
+                    due_at, job_id = self._ready[0]
+                    now = time.time()
+                    wait = due_at - now
+                    if wait <= 0:
+                        heapq.heappop(self._ready)
+                        jobs = [self._jobs[job_id]]
+                        batch_id = jobs[0].get('batchId')
+                        if batch_id is not None and self.send_batch:
+                            rest = []
+                            for entry in self._ready:
+                                job = self._jobs[entry[1]]
+                                if (len(jobs) < self.batch_size and entry[0] <= now
+                                        and job.get('batchId') == batch_id):
+                                    jobs.append(job)
+                                else:
+                                    rest.append(entry)
+                            if len(rest) != len(self._ready):
+                                heapq.heapify(rest)
+                                self._ready = rest
+                        updated_at = datetime.now().isoformat()
+                        for job in jobs:
+                            job.update(status='sending', attempts=job['attempts'] + 1,
+                                       updatedAt=updated_at, owner=os.getpid())
+                        return jobs
+                    self._cond.wait(timeout=wait)
+                else:
+                    self._cond.wait()
+
+    def _deliver(self, jobs):
+        """Send jobs, returning a (ok, error) pair per job"""
+        if len(jobs) > 1:
+            try:
+                results = self.send_batch([(job['to'], job['subject'], job['message']) for job in jobs])
+                return [(ok, None if ok else 'Delivery failed (see server logs)') for ok in results]
+            except Exception as e:
+                return [(False, f'{type(e).__name__}: {e}')] * len(jobs)
+        job = jobs[0]
+        try:
+            ok = self.send(job['to'], job['subject'], job['message'])
+            return [(ok, None if ok else 'Delivery failed (see server logs)')]
+        except Exception as e:
+            return [(False, f'{type(e).__name__}: {e}')]
+
+    def _worker(self):
+        while True:
+            jobs = self._take_due_jobs()
+            unfinished = list(jobs)
+            delivered = False
+            try:
+                # One write for the whole batch
+                self.store.put_many(jobs)
+                results = self._deliver(jobs)
+                delivered = True
+                for job, (ok, error) in zip(jobs, results):
+                    self._finish(job, ok, error)
+                    unfinished.remove(job)
+            except Exception as e:
+                # A store write failing (disk full, database locked) must not
+                # kill the thread and strand its jobs in 'sending'
+                logger.exception(f"Email worker error with job(s) {[job['id'] for job in unfinished]}")
+                self._retry_later(unfinished, f'{type(e).__name__}: {e}', delivered)
+
+    def _finish(self, job, ok, error):
+        """Record the outcome of one delivery attempt"""
+        with self._cond:
+            if ok:
+                self._update(job, status='sent', lastError=None)
+                self._pending -= 1
+                self._forget_finished(job)
+                self.log(f"✅ Email job {job['id']} sent to {job['to']}")
+            elif job['attempts'] >= self.max_attempts:
+                self._update(job, status='failed', lastError=error)
+                self._pending -= 1
+                self._forget_finished(job)
+                self.log(f"❌ Email job {job['id']} failed after {job['attempts']} attempts: {error}")
+            else:
+                delay = self._backoff(job['attempts'])
+                next_attempt = time.time() + delay
+                self._update(job, status='retrying', lastError=error, nextAttemptAt=next_attempt)
+                heapq.heappush(self._ready, (next_attempt, job['id']))
+                self._cond.notify()
+                self.log(f"⚠️  Email job {job['id']} attempt {job['attempts']} failed, "
+                         f"retrying in {delay:.0f}s: {error}")
@@ -0,0 +1,167 @@
+"""
+Reusable connections for outbound email.
+
+SMTPPool keeps authenticated SMTP connections open between emails so a
+burst of replies pays for the TCP + TLS handshake and login once instead of
+once per email. Idle connections are checked with NOOP before reuse and
+closed (QUIT) after idle_timeout seconds by a timer that runs only while
+connections sit in the pool.
+
+get_http_session() returns one shared requests.Session (with connection
+pooling) for HTTP email APIs such as Resend.
+
+Both are per process: a forked worker (gunicorn --preload) drops the
+connections it inherited instead of sharing the sockets with its parent.
+smtplib and requests are imported on first use.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPPool:
+    """Small pool of logged-in SMTP connections created by connect()"""
+
+    def __init__(self, connect, max_size=2, idle_timeout=60, log=None):
+        self.connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.log = log or logger.info
+        self._idle = []  # list of (server, last_used)
+        self._lock = threading.Lock()
+        self._timer = None
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._forget_idle)
+
+    def _forget_idle(self):
+        # Not closed: QUIT would end the parent's session on the shared socket
+        self._idle = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def _close(self, server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _take_idle(self):
+        """Pop a live idle connection, closing stale or dead ones on the way"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                server, last_used = self._idle.pop()
+            if time.monotonic() - last_used > self.idle_timeout:
+                self._close(server)
+                continue
+            try:
+                code, _ = server.noop()
+                if code == 250:
+                    return server
+            except Exception:
+                pass
+            self._close(server)
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection. It goes back to the pool if the block finishes
+        normally and is closed if it raises.
+        """
+        server = self._take_idle()
+        if server is None:
+            server = self.connect()
+        try:
+            yield server
+        except Exception:
+            self._close(server)
+            raise
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((server, time.monotonic()))
+                server = None
+                self._schedule_eviction(self.idle_timeout)
+        if server is not None:
+            self._close(server)
+
+    def _schedule_eviction(self, delay):
+        # Called with _lock held; one pending timer at a time
+        if self._timer is None:
+            self._timer = threading.Timer(delay, self._evict_idle)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _evict_idle(self):
+        """Timer: close connections idle past idle_timeout, re-arm for the rest"""
+        with self._lock:
+            self._timer = None
+        closed = self.close_idle(self.idle_timeout)
+        if closed:
+            logger.debug("Closed %d idle SMTP connection(s)", closed)
+        with self._lock:
+            if self._idle:
+                oldest = min(last_used for _, last_used in self._idle)
+                self._schedule_eviction(max(0.1, oldest + self.idle_timeout - time.monotonic()))
+
+    def close_idle(self, max_idle=None):
+        """Close idle connections (only those idle longer than max_idle if given)"""
+        now = time.monotonic()
+        with self._lock:
+            if max_idle is None:
+                closing, self._idle = self._idle, []
+            else:
+                closing = [(s, t) for s, t in self._idle if now - t > max_idle]
+                self._idle = [(s, t) for s, t in self._idle if now - t <= max_idle]
+        for server, _ in closing:
+            self._close(server)
+        return len(closing)
+
+
+def send_with_pool(pool, from_addr, to_addrs, message):
+    """sendmail() through the pool, retrying once if a reused connection was dropped"""
+    import smtplib
+    try:
+        with pool.connection() as server:
+            return server.sendmail(from_addr, to_addrs, message)
+    except smtplib.SMTPServerDisconnected:
+        with pool.connection() as server:
+            return server.sendmail(from_addr, to_addrs, message)
+
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session(pool_size=4):
+    """Shared requests.Session with keep-alive connection pooling"""
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _http_session = session
+    return _http_session
+
+
+def _forget_http_session():
+    global _http_session, _http_session_lock
+    _http_session = None
+    _http_session_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_http_session)
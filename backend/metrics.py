@@ -0,0 +1,248 @@
+"""
+In-process metrics in the Prometheus text format.
+
+A small Counter / Histogram / callback-gauge registry, so the API can
+report request rates, latencies and sizes without a client library:
+
+    http_requests_total{route, method, status}
+    http_request_duration_seconds{route, method}    histogram
+    http_response_size_bytes{route, method}         histogram
+    storage_operation_duration_seconds{collection, operation}    histogram
+    email_send_duration_seconds{kind, outcome}      histogram
+
+Recording is a dict lookup, a bisect over the bucket bounds and a few
+additions under one lock per metric - a few microseconds per request.
+
+MetricsMiddleware wraps the WSGI app and times every request; the route
+label is the matched URL rule (e.g. /api/projects/<int:project_id>), put
+into the environ by the app, so the number of label values stays bounded.
+
+Values are per process: with several gunicorn workers each one reports
+its own, and Prometheus adds them up across scrapes of the workers (or
+read one worker as a sample). A worker forked from a preloaded app starts
+from zero rather than with the parent's counts.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; from a cached response (~0.5 ms) to a slow SMTP send
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+ROUTE_ENVIRON_KEY = 'metrics.route'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def reset(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f'{self.name}{_labels(self.label_names, label_values)} {_number(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [count per bucket..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def reset(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def time(self, *label_values):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *label_values)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for label_values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                le = (('le', _number(bound)),)
+                lines.append(f'{self.name}_bucket{_labels(self.label_names, label_values, le)} {cumulative}')
+            labels = _labels(self.label_names, label_values)
+            lines.append(f'{self.name}_sum{labels} {_number(series[-1])}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Gauge:
+    """
+    Value read from a callback when metrics are rendered. metric_type
+    'counter' is for totals another component already keeps.
+    """
+
+    def __init__(self, name, help_text, read, labels=(), metric_type='gauge'):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.read = read  # () -> number, or {label value(s): number} with labels
+        self.metric_type = metric_type
+
+    def reset(self):
+        pass
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.metric_type}']
+        try:
+            value = self.read()
+        except Exception:
+            return []
+        items = sorted(value.items()) if self.label_names else [((), value)]
+        for label_values, number in items:
+            if not isinstance(label_values, tuple):
+                label_values = (label_values,)
+            lines.append(f'{self.name}{_labels(self.label_names, label_values)} {_number(number)}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def gauge(self, name, help_text, read, labels=(), metric_type='gauge'):
+        return self.register(Gauge(name, help_text, read, labels, metric_type))
+
+    def reset(self):
+        for metric in self._metrics:
+            metric.reset()
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests = registry.counter('http_requests_total', 'HTTP requests by route, method and status',
+                                 ('route', 'method', 'status'))
+http_duration = registry.histogram('http_request_duration_seconds', 'Time to produce the response',
+                                   ('route', 'method'))
+http_size = registry.histogram('http_response_size_bytes', 'Response body size (Content-Length)',
+                               ('route', 'method'), SIZE_BUCKETS)
+storage_duration = registry.histogram('storage_operation_duration_seconds',
+                                      'Storage loads and writes by collection and operation',
+                                      ('collection', 'operation'))
+email_duration = registry.histogram('email_send_duration_seconds',
+                                    'Email deliveries (one email or one batch) by outcome',
+                                    ('kind', 'outcome'))
+
+_START_TIME = time.time()
+registry.gauge('process_start_time_seconds', 'Start time of this worker (Unix time)', lambda: _START_TIME)
+registry.gauge('process_id', 'PID of the worker that answered this scrape', os.getpid)
+
+
+def _reset_in_child():
+    global _START_TIME
+    _START_TIME = time.time()
+    registry.reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_in_child)
+
+
+def store_collection(store):
+    """Collection label for a storage backend instance"""
+    return getattr(store, 'collection', None) or os.path.splitext(os.path.basename(store.path))[0]
+
+
+def time_storage(store, operation):
+    return storage_duration.time(store_collection(store), operation)
+
+
+class MetricsMiddleware:
+    """Times every request of the wrapped WSGI app"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        started = time.perf_counter()
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured['status'] = status.split(' ', 1)[0]
+            for name, value in headers:
+                if name.lower() == 'content-length':
+                    captured['size'] = int(value)
+                    break
+            return start_response(status, headers, exc_info)
+
+        try:
+            return self.wsgi_app(environ, capture)
+        finally:
+            route = environ.get(ROUTE_ENVIRON_KEY, '<unmatched>')
+            method = environ.get('REQUEST_METHOD', '')
+            http_requests.inc(route, method, captured.get('status', '500'))
+            http_duration.observe(time.perf_counter() - started, route, method)
+            if 'size' in captured:
+                http_size.observe(captured['size'], route, method)
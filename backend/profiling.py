@@ -0,0 +1,252 @@
+"""
+On-demand profiling of live requests.
+
+An admin switches profiling on for a while (POST /api/admin/profiler) and
+the app profiles a sample of the requests it serves - a fraction of all
+requests (rate) and/or only one route - until the time runs out or
+enough profiles are collected. The last max_profiles profiles are kept in
+memory (a ring, oldest dropped) and served as text.
+
+Two modes:
+- 'cprofile': cProfile over the request. Exact call counts and times per
+  function, rendered like pstats' print_stats(). Deterministic profiling
+  slows the profiled request down noticeably (2x is common), and only one
+  request per process is profiled at a time (Python 3.12 allows a single
+  active profiler); others arriving meanwhile are skipped.
+- 'sample': a background thread reads the stacks of the threads serving
+  sampled requests every interval seconds. Cheap for the request itself,
+  any number at once, and rendered as collapsed stacks
+  ("frame;frame;frame count" per line) for flamegraph.pl / speedscope.
+
+Profiling state and profiles are per process: with several gunicorn
+workers, start and read the profiler on the worker that serves the
+requests (or run one worker while diagnosing).
+"""
+import cProfile
+import io
+import itertools
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+MODES = ('cprofile', 'sample')
+SAMPLE_INTERVAL = 0.005
+MAX_STACK_DEPTH = 100
+
+
+def _frame_name(code):
+    # Parent directory kept: flask/app.py and our app.py both exist
+    path = '/'.join(code.co_filename.replace('\\', '/').rsplit('/', 2)[-2:])
+    return f'{code.co_name} ({path}:{code.co_firstlineno})'
+
+
+def collapse_stack(frame):
+    """'outer;...;inner' for a frame and its callers"""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """Samples the stacks of registered threads from one background thread"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self._active = {}  # thread id -> Counter of collapsed stacks
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def start(self, thread_id):
+        stacks = Counter()
+        with self._cond:
+            self._active[thread_id] = stacks
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return stacks
+
+    def stop(self, thread_id):
+        with self._cond:
+            return self._active.pop(thread_id, None)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._active:
+                    self._cond.wait()
+                # Under the lock, so a stopped request's stacks aren't
+                # written to while they are being read
+                frames = sys._current_frames()
+                for thread_id, stacks in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[collapse_stack(frame)] += 1
+                del frames
+            time.sleep(self.interval)
+
+
+class Profiler:
+    """Decides which requests to profile and keeps the recent profiles"""
+
+    def __init__(self, max_profiles=20, sampler=None):
+        self._profiles = deque(maxlen=max_profiles)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._cprofile_lock = threading.Lock()
+        self._sampler = sampler or StackSampler()
+        self._settings = None
+        self._skipped = 0
+
+    def start(self, mode='sample', rate=1.0, route=None, limit=None, seconds=300, exclude=()):
+        """
+        Profile a fraction (rate, 0-1] of the requests to route (any route
+        when None) for the next `seconds`, stopping early after `limit`
+        profiles. Routes in exclude are never profiled.
+        """
+        if mode not in MODES:
+            raise ValueError(f'mode must be one of {", ".join(MODES)}')
+        if not 0 < rate <= 1:
+            raise ValueError('rate must be in (0, 1]')
+        if seconds <= 0 or (limit is not None and limit < 1):
+            raise ValueError('seconds and limit must be positive')
+        with self._lock:
+            self._settings = {
+                'mode': mode,
+                'rate': rate,
+                'route': route,
+                'limit': limit,
+                'remaining': limit,
+                'until': time.time() + seconds,
+                'exclude': tuple(exclude),
+            }
+            self._skipped = 0
+        return self.status()
+
+    def stop(self):
+        with self._lock:
+            self._settings = None
+        return self.status()
+
+    def status(self):
+        with self._lock:
+            settings = self._settings
+            if settings and time.time() >= settings['until']:
+                settings = self._settings = None
+            state = {'enabled': settings is not None, 'profiles': len(self._profiles),
+                     'maxProfiles': self._profiles.maxlen, 'skipped': self._skipped}
+            if settings:
+                state.update({key: settings[key] for key in ('mode', 'rate', 'route', 'limit', 'remaining')})
+                state['secondsLeft'] = round(settings['until'] - time.time(), 1)
+            return state
+
+    def begin(self, route):
+        """
+        Start profiling the current request if it is sampled. Returns a
+        handle for finish(), or None (the common case: one attribute check).
+        """
+        if self._settings is None:
+            return None
+        with self._lock:
+            settings = self._settings
+            if settings is None:
+                return None
+            if time.time() >= settings['until'] or settings['remaining'] == 0:
+                self._settings = None
+                return None
+            if route in settings['exclude'] or (settings['route'] and route != settings['route']):
+                return None
+            if settings['rate'] < 1 and random.random() >= settings['rate']:
+                return None
+            mode = settings['mode']
+            if mode == 'cprofile' and not self._cprofile_lock.acquire(blocking=False):
+                self._skipped += 1
+                return None
+            if settings['remaining'] is not None:
+                settings['remaining'] -= 1
+
+        handle = {'mode': mode, 'route': route, 'started': time.perf_counter(),
+                  'date': datetime.now().isoformat()}
+        if mode == 'cprofile':
+            handle['profile'] = cProfile.Profile()
+            handle['profile'].enable()
+        else:
+            handle['thread'] = threading.get_ident()
+            handle['stacks'] = self._sampler.start(handle['thread'])
+        return handle
+
+    def finish(self, handle, method='', path='', status=None):
+        """Stop profiling a request and keep its profile"""
+        duration = time.perf_counter() - handle['started']
+        if handle['mode'] == 'cprofile':
+            handle['profile'].disable()
+            self._cprofile_lock.release()
+            data = handle['profile']
+        else:
+            self._sampler.stop(handle['thread'])
+            data = handle['stacks']
+        with self._lock:
+            self._profiles.append({
+                'id': next(self._ids),
+                'mode': handle['mode'],
+                'route': handle['route'],
+                'method': method,
+                'path': path,
+                'status': status,
+                'date': handle['date'],
+                'durationMs': round(duration * 1000, 3),
+                'data': data,
+            })
+
+    def profiles(self):
+        """Metadata of the kept profiles, newest first"""
+        with self._lock:
+            return [{key: value for key, value in profile.items() if key != 'data'}
+                    for profile in reversed(self._profiles)]
+
+    def _select(self, ids=None, route=None, mode=None):
+        with self._lock:
+            return [p for p in self._profiles
+                    if (ids is None or p['id'] in ids)
+                    and (route is None or p['route'] == route)
+                    and (mode is None or p['mode'] == mode)]
+
+    def render(self, ids=None, route=None, fmt='collapsed', sort='cumulative', limit=50):
+        """
+        Profiles (all matching ids / route) merged into one text report:
+        fmt 'pstats' for cProfile profiles, 'collapsed' for sampled ones.
+        None when nothing matches.
+        """
+        if fmt == 'pstats':
+            selected = self._select(ids, route, 'cprofile')
+            if not selected:
+                return None
+            out = io.StringIO()
+            stats = pstats.Stats(selected[0]['data'], stream=out)
+            for profile in selected[1:]:
+                stats.add(profile['data'])
+            try:
+                stats.sort_stats(sort)
+            except KeyError:
+                raise ValueError(f'Unknown sort key: {sort}') from None
+            stats.print_stats(limit)
+            return out.getvalue()
+        if fmt == 'collapsed':
+            selected = self._select(ids, route, 'sample')
+            if not selected:
+                return None
+            merged = Counter()
+            for profile in selected:
+                merged.update(profile['data'])
+            return ''.join(f'{stack} {count}\n' for stack, count in merged.most_common())
+        raise ValueError("format must be 'pstats' or 'collapsed'")
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
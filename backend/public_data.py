@@ -0,0 +1,209 @@
+"""
+What the public site reads, and the static snapshot of it.
+
+The public pages only ever read skills and live projects, which change a few
+times a month. export_snapshot() writes that data as static JSON files next
+to the site (data/ by default) so the CDN can serve it and visitors never
+have to wake up the API:
+
+    data/manifest.json                  names below -> current file (short cache)
+    data/bootstrap.<hash>.json          skills + live project summaries
+    data/projects.live.<hash>.json      live project summaries
+    data/skills.<hash>.json             skills
+    data/project-<id>.<hash>.json       one full live project
+
+Each document has the same shape as the matching API response. File names
+carry a hash of their content, so they never change once written and can
+be cached forever; only the small manifest has to be re-fetched. Draft
+projects are never exported.
+
+The pages only read the snapshot when STATIC_SNAPSHOT is switched on in
+script.js and projects-script.js, and even then the API has the last word:
+a snapshot is shown until the API answers, then replaced if it is behind.
+
+Export by hand, from the local stores (STORAGE_BACKEND / SQLITE_PATH like
+app.py) or from the live public API - a checkout only has the git copy of
+projects.json and skills.json, not what was edited in the admin:
+    python public_data.py export [out_dir] [--from-api URL]
+"""
+import hashlib
+import os
+import re
+import sys
+import urllib.request
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows - exports aren't serialized between processes
+    fcntl = None
+
+import json_codec
+from facets import FacetIndex
+from images import SITE_ROOT
+
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR') or os.path.join(SITE_ROOT, 'data')
+
+# Fields the project grid needs; the rest (mission brief, architecture, all
+# images) is only in the full project
+PROJECT_SUMMARY_FIELDS = ('id', 'name', 'mission', 'stack', 'status', 'statusValues', 'updatedAt')
+
+_SNAPSHOT_FILE = re.compile(r'^[\w.-]+\.[0-9a-f]{12}\.json$')
+
+
+def summarize_project(project):
+    """Card fields of a project plus its first image (and that image's variants)"""
+    summary = {key: project[key] for key in PROJECT_SUMMARY_FIELDS if key in project}
+    images = project.get('images') or []
+    summary['images'] = images[:1]
+    summary['imageCount'] = len(images)
+    variant = (project.get('imageVariants') or {}).get(images[0]) if images else None
+    if variant:
+        summary['imageVariants'] = {images[0]: {key: variant[key] for key in ('width', 'height', 'sizes', 'srcset')}}
+    return summary
+
+
+def dumps(payload):
+    """Compact, key-sorted JSON - the same data always gives the same bytes"""
+    return json_codec.dumps(payload, sort_keys=True)
+
+
+def build_bootstrap(skills, summaries):
+    """
+    Skills plus live project summaries and their stack tag counts. 'version'
+    is a hash of the data, so it only changes when something the public
+    pages show has changed.
+    """
+    live = [p for p in summaries if p.get('status', 'draft') == 'live']
+    facets = FacetIndex()
+    facets.rebuild(live)
+    data = {
+        'skills': skills,
+        'projects': live,
+        'facets': facets.query()['facets']
+    }
+    version = hashlib.sha256(dumps(data).encode('utf-8')).hexdigest()[:16]
+    return {'success': True, 'version': version, **data}
+
+
+def public_documents(projects, skills, summaries=None):
+    """All documents of the static snapshot, by name"""
+    if summaries is None:
+        summaries = [summarize_project(p) for p in projects]
+    bootstrap = build_bootstrap(skills, summaries)
+    documents = {
+        'bootstrap': bootstrap,
+        'projects.live': {'success': True, 'projects': bootstrap['projects']},
+        'skills': {'success': True, 'skills': skills}
+    }
+    for project in projects:
+        if project.get('status', 'draft') == 'live':
+            documents[f"project-{project['id']}"] = {'success': True, 'project': project}
+    return documents
+
+
+def _write_file(path, body):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _read_manifest(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json_codec.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def export_snapshot(documents, out_dir=None):
+    """
+    Write documents as hashed files plus manifest.json into out_dir.
+
+    Returns True if anything changed. Files referenced by neither the new
+    nor the previous manifest are deleted, so a client that fetched the
+    previous manifest a moment ago can still load its files.
+    """
+    out_dir = out_dir or SNAPSHOT_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    lock_file = open(os.path.join(out_dir, '.export.lock'), 'a')
+    try:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        manifest_path = os.path.join(out_dir, 'manifest.json')
+        previous = _read_manifest(manifest_path).get('files', {})
+
+        files = {}
+        for name, payload in sorted(documents.items()):
+            body = dumps(payload).encode('utf-8')
+            filename = f'{name}.{hashlib.sha256(body).hexdigest()[:12]}.json'
+            path = os.path.join(out_dir, filename)
+            if not os.path.exists(path):
+                _write_file(path, body)
+            files[name] = filename
+
+        if files == previous:
+            return False
+
+        manifest = {
+            'version': hashlib.sha256(dumps(files).encode('utf-8')).hexdigest()[:16],
+            'generatedAt': datetime.now().isoformat(),
+            'files': files
+        }
+        _write_file(manifest_path, json_codec.dumps_bytes(manifest, pretty=True, sort_keys=True))
+
+        keep = set(files.values()) | set(previous.values())
+        for filename in os.listdir(out_dir):
+            if _SNAPSHOT_FILE.match(filename) and filename not in keep:
+                try:
+                    os.remove(os.path.join(out_dir, filename))
+                except OSError:
+                    pass
+        return True
+    finally:
+        lock_file.close()
+
+
+def fetch_public_data(api_url, timeout=90):
+    """
+    (live projects, skills) as the public API serves them: the bootstrap
+    document, then each live project in full. The timeout allows for the
+    API waking up from sleep.
+    """
+    def get(path):
+        with urllib.request.urlopen(api_url.rstrip('/') + path, timeout=timeout) as response:
+            return json_codec.load(response)
+
+    bootstrap = get('/api/bootstrap')
+    projects = [get(f"/api/projects/{summary['id']}")['project'] for summary in bootstrap['projects']]
+    return projects, bootstrap['skills']
+
+
+if __name__ == '__main__':
+    from storage import open_store
+
+    args = sys.argv[1:]
+    api_url = None
+    if '--from-api' in args:
+        index = args.index('--from-api')
+        api_url = args[index + 1] if index + 1 < len(args) else None
+        del args[index:index + 2]
+        if not api_url:
+            args = []
+    if not args or args[0] != 'export':
+        print('Usage: python public_data.py export [out_dir] [--from-api URL]')
+        sys.exit(1)
+    out_dir = args[1] if len(args) > 1 else SNAPSHOT_DIR
+    if api_url:
+        projects, skills = fetch_public_data(api_url)
+    else:
+        backend = os.environ.get('STORAGE_BACKEND', 'json')
+        sqlite_path = os.environ.get('SQLITE_PATH', 'portfolio.db')
+        projects = open_store(backend, 'projects.json', 'projects', sqlite_path).load() or []
+        skills = open_store(backend, 'skills.json', 'skills', sqlite_path).load() or []
+    changed = export_snapshot(public_documents(projects, skills), out_dir)
+    print(f"{'Exported' if changed else 'Unchanged'}: {out_dir}/manifest.json")
@@ -0,0 +1,173 @@
+"""
+Token-bucket rate limiting for the public write endpoints.
+
+Every (limit, key) pair - e.g. ('contact_ip', '203.0.113.7') - has a bucket
+holding up to `capacity` tokens that refills at capacity/period tokens per
+second. A request takes one token; with none left it is refused and told
+how long until the next token arrives (the Retry-After value). A client can
+burst up to `capacity` requests and is then held to the average rate.
+
+Limits are written as "<count>/<period>", the period in seconds or as
+second, minute, hour or day (optionally with a count: "10/15minute").
+
+Buckets live in one of two stores:
+- MemoryBuckets: a dict in this process (the default). With several
+  gunicorn workers each worker has its own buckets, so the effective
+  limit is multiplied by the number of workers.
+- SQLiteBuckets: a table in a SQLite database shared by all workers on the
+  host; each take is one short write transaction.
+
+RateLimiter counts allowed and refused requests per limit (stats()).
+"""
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+_RATE = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*([a-z]*?)s?\s*$')
+
+
+class RateLimited(Exception):
+    """Raised by RateLimiter.hit() when a bucket is empty"""
+
+    def __init__(self, limit, retry_after):
+        super().__init__(f'Rate limit {limit} exceeded')
+        self.limit = limit
+        self.retry_after = retry_after
+
+
+def parse_rate(text):
+    """'5/hour' -> (5, 3600.0); '10/15minute' -> (10, 900.0); '3/60' -> (3, 60.0)"""
+    match = _RATE.match(str(text).lower())
+    if not match:
+        raise ValueError(f'Invalid rate: {text!r}')
+    count, multiple, unit = match.groups()
+    if unit and unit not in _PERIODS:
+        raise ValueError(f'Invalid rate period: {text!r}')
+    if not unit and not multiple:
+        raise ValueError(f'Invalid rate: {text!r}')
+    period = (int(multiple) if multiple else 1) * (_PERIODS[unit] if unit else 1)
+    if int(count) < 1 or period <= 0:
+        raise ValueError(f'Invalid rate: {text!r}')
+    return int(count), float(period)
+
+
+def _refill(tokens, updated, now, capacity, period):
+    return min(capacity, tokens + (now - updated) * capacity / period)
+
+
+class MemoryBuckets:
+    """Buckets in a dict, least recently used dropped past max_keys"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # (limit, key) -> (tokens, updated)
+        self._lock = threading.Lock()
+
+    def take(self, limit, key, capacity, period, now):
+        """Take one token; returns seconds until one is available (0 = taken)"""
+        bucket_key = (limit, key)
+        with self._lock:
+            tokens, updated = self._buckets.pop(bucket_key, (capacity, now))
+            tokens = _refill(tokens, updated, now, capacity, period)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) * period / capacity
+            self._buckets[bucket_key] = (tokens, now)
+            # A dropped bucket comes back full, which is only generous to
+            # clients idle long enough to be the least recently seen
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteBuckets:
+    """Buckets in a SQLite table, shared by every process using the file"""
+
+    # Drop rows idle this long (every bucket is full again by then)
+    PRUNE_AFTER = 86400
+    PRUNE_EVERY = 1000
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._takes = 0
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS rate_buckets '
+            '(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+
+    def _connection(self):
+        """One connection per thread and process, as in storage.SQLiteStore"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def take(self, limit, key, capacity, period, now):
+        name = f'{limit}:{key}'
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM rate_buckets WHERE name = ?', (name,)).fetchone()
+            tokens = _refill(row[0], row[1], now, capacity, period) if row else capacity
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) * period / capacity
+            conn.execute('INSERT OR REPLACE INTO rate_buckets (name, tokens, updated) VALUES (?, ?, ?)',
+                         (name, tokens, now))
+            self._takes += 1
+            if self._takes % self.PRUNE_EVERY == 0:
+                conn.execute('DELETE FROM rate_buckets WHERE updated < ?', (now - self.PRUNE_AFTER,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+    def clear(self):
+        self._connection().execute('DELETE FROM rate_buckets')
+
+
+class RateLimiter:
+    """Named limits over a bucket store, with allowed/limited counters"""
+
+    def __init__(self, store, limits, enabled=True, clock=time.time):
+        self.store = store
+        self.limits = {name: parse_rate(rate) if isinstance(rate, str) else rate
+                       for name, rate in limits.items()}
+        self.enabled = enabled
+        self.clock = clock
+        self._counters = {name: {'allowed': 0, 'limited': 0} for name in self.limits}
+        self._lock = threading.Lock()
+
+    def hit(self, limit, key):
+        """Take a token from the bucket of (limit, key) or raise RateLimited"""
+        if not self.enabled or not key:
+            return
+        capacity, period = self.limits[limit]
+        wait = self.store.take(limit, str(key), capacity, period, self.clock())
+        with self._lock:
+            self._counters[limit]['limited' if wait else 'allowed'] += 1
+        if wait:
+            raise RateLimited(limit, max(1, math.ceil(wait)))
+
+    def stats(self):
+        with self._lock:
+            return {name: {'rate': f'{capacity}/{period:g}s', **self._counters[name]}
+                    for name, (capacity, period) in self.limits.items()}
@@ -0,0 +1,168 @@
+"""
+In-memory full-text search for projects and messages.
+
+SearchIndex is an inverted index: every token of the indexed fields maps to
+the records containing it, with a weighted term count per record. A query
+only touches the postings of its own terms, so lookups don't scan records.
+
+- Tokens are case-folded runs of letters/digits ("NRF24L01+ PA/LNA" ->
+  nrf24l01, pa, lna); e-mail fields are also indexed whole.
+- Every query term must match (AND). A term matches a token exactly, or as
+  a prefix ("ardu" finds "arduino") at a lower weight; prefixes are found
+  by bisecting a sorted token list.
+- Score = sum over query terms of weighted term count x IDF, so rare words
+  and matches in heavier fields (e.g. name) rank first.
+
+The index is kept up to date record by record (add/update/remove). After a
+full reload of the data, mark_stale() defers the rebuild to the next search.
+"""
+import bisect
+import math
+import re
+import threading
+
+_TOKEN = re.compile(r'\w+')
+
+# Prefix matches count for less than whole-word matches
+PREFIX_WEIGHT = 0.5
+
+
+def tokenize(text):
+    return _TOKEN.findall(str(text or '').casefold())
+
+
+class SearchIndex:
+    """Inverted index over records with an 'id', for the given weighted fields"""
+
+    def __init__(self, fields, whole_fields=()):
+        self.fields = fields  # {field: weight}
+        self.whole_fields = whole_fields  # also indexed as one token (emails)
+        self._postings = {}  # token -> {record id: weighted count}
+        self._record_tokens = {}  # record id -> tokens, for removal
+        self._terms = []  # sorted tokens, for prefix lookups
+        self._stale = True
+        self._lock = threading.Lock()
+
+    def _field_tokens(self, record):
+        weights = {}
+        for field, weight in self.fields.items():
+            value = record.get(field)
+            if isinstance(value, (list, tuple)):
+                value = ' '.join(str(v) for v in value)
+            tokens = tokenize(value)
+            if field in self.whole_fields and value:
+                tokens.append(str(value).strip().casefold())
+            for token in tokens:
+                weights[token] = weights.get(token, 0) + weight
+        return weights
+
+    def _add(self, record, keep_sorted=True):
+        record_id = record['id']
+        weights = self._field_tokens(record)
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                if keep_sorted:
+                    bisect.insort(self._terms, token)
+                else:
+                    self._terms.append(token)
+            postings[record_id] = weight
+        self._record_tokens[record_id] = tuple(weights)
+
+    def _remove(self, record_id):
+        for token in self._record_tokens.pop(record_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(record_id, None)
+            if not postings:
+                del self._postings[token]
+                i = bisect.bisect_left(self._terms, token)
+                if i < len(self._terms) and self._terms[i] == token:
+                    del self._terms[i]
+
+    def rebuild(self, records):
+        with self._lock:
+            self._postings = {}
+            self._record_tokens = {}
+            self._terms = []
+            for record in records:
+                self._add(record, keep_sorted=False)
+            self._terms.sort()
+            self._stale = False
+
+    def mark_stale(self):
+        """Data was reloaded: rebuild from scratch on the next search"""
+        with self._lock:
+            self._stale = True
+
+    def update(self, record):
+        """(Re)index one record after it was created or changed"""
+        with self._lock:
+            if self._stale:
+                return
+            self._remove(record['id'])
+            self._add(record)
+
+    def remove(self, record_id):
+        with self._lock:
+            if not self._stale:
+                self._remove(record_id)
+
+    def _term_matches(self, term, prefix):
+        """{record id: weight} for one query term (exact plus prefix matches)"""
+        matches = dict(self._postings.get(term, {}))
+        # Single letters would expand to half the vocabulary
+        if prefix and len(term) > 1:
+            i = bisect.bisect_right(self._terms, term)
+            while i < len(self._terms) and self._terms[i].startswith(term):
+                for record_id, weight in self._postings[self._terms[i]].items():
+                    weight *= PREFIX_WEIGHT
+                    if weight > matches.get(record_id, 0):
+                        matches[record_id] = weight
+                i += 1
+        return matches
+
+    def matches(self, record, query, prefix=True):
+        """
+        Whether a record that isn't in the index (e.g. an archived message)
+        matches every term of query, by the same rules as search()
+        """
+        tokens = self._field_tokens(record)
+        for term in dict.fromkeys(tokenize(query)):
+            if term in tokens:
+                continue
+            if not (prefix and len(term) > 1 and any(token.startswith(term) for token in tokens)):
+                return False
+        return True
+
+    def search(self, query, records=None, prefix=True, limit=None):
+        """
+        Return [(record id, score)] for records matching every query term,
+        best first. records (a list or a callable returning one) is used to
+        rebuild the index first if it is stale.
+        """
+        if self._stale and records is not None:
+            self.rebuild(records() if callable(records) else records)
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            total = max(1, len(self._record_tokens))
+            scores = None
+            # Rarest term first keeps the candidate set small
+            per_term = sorted((self._term_matches(term, prefix) for term in terms), key=len)
+            for matches in per_term:
+                if not matches:
+                    return []
+                idf = math.log(1 + total / len(matches))
+                if scores is None:
+                    scores = {record_id: weight * idf for record_id, weight in matches.items()}
+                else:
+                    scores = {record_id: score + matches[record_id] * idf
+                              for record_id, score in scores.items() if record_id in matches}
+                if not scores:
+                    return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return ranked[:limit] if limit else ranked
@@ -0,0 +1,533 @@
+"""
+Storage backends for the portfolio API.
+
+Both backends store one collection (messages, projects, skills) of records
+keyed by 'id' and expose the same methods: load, put, put_many, delete,
+delete_many, save_all, compact, signature and next_id. next_id hands out ids
+from a persisted, monotonic sequence, so an id is never reused after a
+delete.
+
+put, put_many, delete and delete_many take the signature the caller last saw
+(expected) and return the store's signature after the write if the store
+was still at expected when the write lock was taken, else None (another
+worker wrote in between, so the caller's copy is missing that change).
+save_all replaces everything and always returns the new signature.
+
+JournalStore keeps a collection as a JSON snapshot file plus an append-only
+journal of per-record changes next to it (e.g. messages.json +
+messages.json.journal). A change appends one line to the journal instead of
+rewriting the whole file. Every so often the journal is folded into a new
+snapshot, which is written to a temp file and renamed over the old one, so a
+crash can never leave a half-written snapshot.
+
+SQLiteStore keeps every collection as a table in one SQLite database (WAL
+mode) with the record id as primary key and indexes on the fields the API
+filters and sorts by. Several workers can read and write it concurrently.
+
+Records are encoded with json_codec, compact in both backends.
+
+Run `python storage.py import-sqlite [portfolio.db]` to copy the JSON files
+into a SQLite database once, and `python storage.py export DIR` to write
+indented copies of messages, projects and skills (from STORAGE_BACKEND /
+SQLITE_PATH like app.py) for reading or editing by hand.
+"""
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+
+import json_codec
+
+try:
+    import fcntl
+except ImportError:  # Windows - fall back to in-process locking only
+    fcntl = None
+
+
+def file_signature(path):
+    """Return (mtime_ns, ctime_ns, size, inode) for path, or None if missing"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino)
+
+
+def apply_entries(records, entries):
+    """Replay journal entries on top of records (ids keep their position)"""
+    by_id = {record['id']: record for record in records}
+    for entry in entries:
+        op = entry.get('op')
+        if op == 'put':
+            record = entry['record']
+            by_id[record['id']] = record
+        elif op == 'delete':
+            by_id.pop(entry['id'], None)
+    return list(by_id.values())
+
+
+class JournalStore:
+    """JSON snapshot + append-only journal for one collection"""
+
+    def __init__(self, path, compact_every=200):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.sequence_path = path + '.seq'
+        self.compact_every = compact_every
+        self._journal_entries = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        """Serialize journal writes across threads and (on POSIX) processes"""
+        with self._lock:
+            with open(self.journal_path, 'a', encoding='utf-8') as journal:
+                if fcntl:
+                    fcntl.flock(journal, fcntl.LOCK_EX)
+                try:
+                    yield journal
+                finally:
+                    if fcntl:
+                        fcntl.flock(journal, fcntl.LOCK_UN)
+
+    def signature(self):
+        """Change token covering the snapshot and the journal (None if neither exists)"""
+        signature = (file_signature(self.path), file_signature(self.journal_path))
+        if signature == (None, None):
+            return None
+        return signature
+
+    def _read_snapshot(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'rb') as f:
+            return json_codec.load(f)
+
+    def _read_journal(self):
+        entries = []
+        if not os.path.exists(self.journal_path):
+            return entries
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json_codec.loads(line))
+                except ValueError:
+                    # A torn last line from a crash mid-append - the change
+                    # never completed, so skip it
+                    continue
+        return entries
+
+    def load(self):
+        """Return all records (snapshot + journal), or None if nothing is stored"""
+        records = self._read_snapshot()
+        entries = self._read_journal()
+        self._journal_entries = len(entries)
+        if records is None and not entries:
+            return None
+        return apply_entries(records or [], entries)
+
+    def _append(self, entries, expected=None):
+        lines = ''.join(json_codec.dumps(entry) + '\n' for entry in entries)
+        with self._locked() as journal:
+            in_sync = self.signature() == expected
+            journal.write(lines)
+            journal.flush()
+            os.fsync(journal.fileno())
+            signature = self.signature() if in_sync else None
+        self._journal_entries += len(entries)
+        if self._journal_entries >= self.compact_every:
+            signature = self.compact(expected=signature)
+        return signature
+
+    def put(self, record, expected=None):
+        """Insert or replace one record (matched by id)"""
+        return self._append([{'op': 'put', 'record': record}], expected)
+
+    def put_many(self, records, expected=None):
+        """Insert or replace several records with one journal write"""
+        if not records:
+            return None
+        return self._append([{'op': 'put', 'record': record} for record in records], expected)
+
+    def delete(self, record_id, expected=None):
+        """Remove one record by id"""
+        self._ensure_sequence()
+        return self._append([{'op': 'delete', 'id': record_id}], expected)
+
+    def delete_many(self, record_ids, expected=None):
+        """Remove several records with one journal write"""
+        if not record_ids:
+            return None
+        self._ensure_sequence()
+        return self._append([{'op': 'delete', 'id': record_id} for record_id in record_ids], expected)
+
+    def _update_sequence(self, update):
+        """Replace the stored last id with update(last_id or None), across workers"""
+        with self._lock:
+            with open(self.sequence_path, 'a+', encoding='utf-8') as seq:
+                if fcntl:
+                    fcntl.flock(seq, fcntl.LOCK_EX)
+                try:
+                    seq.seek(0)
+                    text = seq.read().strip()
+                    last_id = update(int(text) if text else None)
+                    seq.seek(0)
+                    seq.truncate()
+                    seq.write(str(last_id))
+                    seq.flush()
+                    os.fsync(seq.fileno())
+                finally:
+                    if fcntl:
+                        fcntl.flock(seq, fcntl.LOCK_UN)
+        return last_id
+
+    def _max_stored_id(self):
+        return max((record['id'] for record in self.load() or []), default=0)
+
+    def _ensure_sequence(self):
+        """Start the sequence before a delete could lower the highest id"""
+        if not os.path.exists(self.sequence_path):
+            self._update_sequence(lambda last_id: self._max_stored_id() if last_id is None else last_id)
+
+    def next_id(self):
+        """Allocate the next id from the sequence file"""
+        # The first allocation continues after the highest stored id
+        return self._update_sequence(
+            lambda last_id: (self._max_stored_id() if last_id is None else last_id) + 1)
+
+    def _write_snapshot(self, records):
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(json_codec.dumps_bytes(records))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def save_all(self, records):
+        """Replace the whole collection with records (atomic)"""
+        self._ensure_sequence()
+        with self._locked() as journal:
+            self._write_snapshot(records)
+            journal.truncate(0)
+            signature = self.signature()
+        self._journal_entries = 0
+        highest = max((record['id'] for record in records), default=0)
+        self._update_sequence(lambda last_id: max(last_id or 0, highest))
+        return signature
+
+    def compact(self, expected=None):
+        """Fold the journal into a fresh snapshot"""
+        with self._locked() as journal:
+            in_sync = expected is not None and self.signature() == expected
+            # Re-read from disk rather than trusting our in-memory copy so
+            # entries appended by other workers are kept
+            records = apply_entries(self._read_snapshot() or [], self._read_journal())
+            self._write_snapshot(records)
+            journal.truncate(0)
+            signature = self.signature() if in_sync else None
+        self._journal_entries = 0
+        return signature
+
+
+# Fields indexed in SQLite for each collection, in addition to the id
+INDEXED_FIELDS = {
+    'messages': ('date', 'read', 'replied', 'email'),
+    'projects': ('status',),
+    'skills': (),
+    'email_jobs': ('status',),
+}
+
+
+class SQLiteStore:
+    """One collection stored as a table in a shared SQLite database"""
+
+    def __init__(self, db_path, collection, indexed_fields=None):
+        if not collection.isidentifier():
+            raise ValueError(f'Invalid collection name: {collection}')
+        self.path = f'{db_path}#{collection}'
+        self.db_path = db_path
+        self.collection = collection
+        if indexed_fields is None:
+            indexed_fields = INDEXED_FIELDS.get(collection, ())
+        self.indexed_fields = tuple(indexed_fields)
+        self._local = threading.local()
+        self._create_schema()
+
+    def _connection(self):
+        """One connection per thread (sqlite3 connections aren't shareable)"""
+        conn = getattr(self._local, 'conn', None)
+        # Never reuse a connection inherited from the parent across a fork
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _create_schema(self):
+        conn = self._connection()
+        columns = ''.join(f', "{field}"' for field in self.indexed_fields)
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{self.collection}" '
+                     f'(id INTEGER PRIMARY KEY, data TEXT NOT NULL{columns})')
+        for field in self.indexed_fields:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{self.collection}_{field}" '
+                         f'ON "{self.collection}" ("{field}", id)')
+        conn.execute('CREATE TABLE IF NOT EXISTS store_versions '
+                     '(collection TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+        conn.execute('CREATE TABLE IF NOT EXISTS store_sequences '
+                     '(collection TEXT PRIMARY KEY, last_id INTEGER NOT NULL)')
+
+    def _row(self, record):
+        # Text, not bytes: SQLite's json functions read a BLOB as JSONB
+        values = [record['id'], json_codec.dumps(record)]
+        for field in self.indexed_fields:
+            value = record.get(field)
+            if isinstance(value, (dict, list)):
+                value = json_codec.dumps(value)
+            values.append(value)
+        return values
+
+    def _insert_sql(self, verb):
+        columns = ''.join(f', "{field}"' for field in self.indexed_fields)
+        placeholders = ', '.join('?' * (len(self.indexed_fields) + 2))
+        return f'{verb} INTO "{self.collection}" (id, data{columns}) VALUES ({placeholders})'
+
+    @contextmanager
+    def _write(self):
+        """Run a write transaction and bump the collection's version"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.execute('INSERT OR IGNORE INTO store_versions (collection, version) VALUES (?, 0)',
+                         (self.collection,))
+            conn.execute('UPDATE store_versions SET version = version + 1 WHERE collection = ?',
+                         (self.collection,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _version(self, conn):
+        row = conn.execute(
+            'SELECT version FROM store_versions WHERE collection = ?', (self.collection,)
+        ).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _written(before, expected):
+        # Each write transaction bumps the version by one under the write lock
+        return (before or 0) + 1 if before == expected else None
+
+    def signature(self):
+        """Change token: the collection's write counter (None if never written)"""
+        return self._version(self._connection())
+
+    def load(self):
+        """Return all records in id order, or None if nothing is stored"""
+        if self.signature() is None:
+            return None
+        rows = self._connection().execute(
+            f'SELECT data FROM "{self.collection}" ORDER BY id'
+        ).fetchall()
+        return [json_codec.loads(row[0]) for row in rows]
+
+    def get(self, record_id):
+        """Return one record by id (primary key lookup), or None"""
+        row = self._connection().execute(
+            f'SELECT data FROM "{self.collection}" WHERE id = ?', (record_id,)
+        ).fetchone()
+        return json_codec.loads(row[0]) if row else None
+
+    def _where_sql(self, where, contains=None):
+        allowed = ('id',) + self.indexed_fields
+        clauses = []
+        params = []
+        for field, value in (where or {}).items():
+            if field not in allowed:
+                raise ValueError(f'{field} is not indexed in {self.collection}')
+            clauses.append(f'"{field}" = ?')
+            params.append(value)
+        for field, text in (contains or {}).items():
+            if not field.isidentifier():
+                raise ValueError(f'Invalid field name: {field}')
+            # Substring search can't use an index; it only narrows a page scan
+            clauses.append(f"instr(lower(json_extract(data, '$.{field}')), ?) > 0")
+            params.append(str(text).lower())
+        return clauses, params
+
+    def query(self, where=None, order_by='id', descending=False, limit=None,
+              after=None, contains=None):
+        """
+        Return records matching where ({field: value}, indexed fields only),
+        sorted by order_by (an indexed field or 'id'), highest first when
+        descending.
+
+        after=(value, id) continues from that record (keyset pagination) and
+        contains={field: text} adds case-insensitive substring filters.
+        """
+        if order_by not in ('id',) + self.indexed_fields:
+            raise ValueError(f'{order_by} is not indexed in {self.collection}')
+        clauses, params = self._where_sql(where, contains)
+        if after is not None:
+            op = '<' if descending else '>'
+            if order_by == 'id':
+                clauses.append(f'id {op} ?')
+                params.append(after[1])
+            else:
+                clauses.append(f'("{order_by}" {op} ? OR ("{order_by}" = ? AND id {op} ?))')
+                params.extend([after[0], after[0], after[1]])
+        sql = f'SELECT data FROM "{self.collection}"'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        direction = 'DESC' if descending else 'ASC'
+        sql += f' ORDER BY "{order_by}" {direction}, id {direction}'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+        rows = self._connection().execute(sql, params).fetchall()
+        return [json_codec.loads(row[0]) for row in rows]
+
+    def count(self, where=None):
+        """Count records matching where ({field: value}, indexed fields only)"""
+        clauses, params = self._where_sql(where)
+        sql = f'SELECT COUNT(*) FROM "{self.collection}"'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        return self._connection().execute(sql, params).fetchone()[0]
+
+    def put(self, record, expected=None):
+        """Insert or replace one record (matched by id)"""
+        with self._write() as conn:
+            before = self._version(conn)
+            conn.execute(self._insert_sql('INSERT OR REPLACE'), self._row(record))
+        return self._written(before, expected)
+
+    def put_many(self, records, expected=None):
+        """Insert or replace several records in one transaction"""
+        if not records:
+            return None
+        with self._write() as conn:
+            before = self._version(conn)
+            conn.executemany(self._insert_sql('INSERT OR REPLACE'), [self._row(record) for record in records])
+        return self._written(before, expected)
+
+    def _ensure_sequence(self, conn):
+        """Raise the sequence to the highest stored id (before deletes can lower it)"""
+        conn.execute(f'INSERT INTO store_sequences (collection, last_id) '
+                     f'SELECT ?, COALESCE(MAX(id), 0) FROM "{self.collection}" WHERE true '
+                     f'ON CONFLICT(collection) DO UPDATE SET last_id = MAX(last_id, excluded.last_id)',
+                     (self.collection,))
+
+    def delete(self, record_id, expected=None):
+        """Remove one record by id"""
+        with self._write() as conn:
+            before = self._version(conn)
+            self._ensure_sequence(conn)
+            conn.execute(f'DELETE FROM "{self.collection}" WHERE id = ?', (record_id,))
+        return self._written(before, expected)
+
+    def delete_many(self, record_ids, expected=None):
+        """Remove several records in one transaction"""
+        if not record_ids:
+            return None
+        with self._write() as conn:
+            before = self._version(conn)
+            self._ensure_sequence(conn)
+            conn.executemany(f'DELETE FROM "{self.collection}" WHERE id = ?',
+                             [(record_id,) for record_id in record_ids])
+        return self._written(before, expected)
+
+    def save_all(self, records):
+        """Replace the whole collection with records (one transaction)"""
+        with self._write() as conn:
+            before = self._version(conn)
+            self._ensure_sequence(conn)
+            conn.execute(f'DELETE FROM "{self.collection}"')
+            conn.executemany(self._insert_sql('INSERT'), [self._row(record) for record in records])
+            self._ensure_sequence(conn)
+        return (before or 0) + 1
+
+    def next_id(self):
+        """Allocate the next id from the collection's sequence row"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._ensure_sequence(conn)
+            conn.execute('UPDATE store_sequences SET last_id = last_id + 1 WHERE collection = ?',
+                         (self.collection,))
+            last_id = conn.execute('SELECT last_id FROM store_sequences WHERE collection = ?',
+                                   (self.collection,)).fetchone()[0]
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return last_id
+
+    def compact(self):
+        """Checkpoint the WAL back into the main database file"""
+        self._connection().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+
+def open_store(backend, json_path, collection, sqlite_path='portfolio.db'):
+    """Create the store for a collection: backend is 'json' or 'sqlite'"""
+    if backend == 'sqlite':
+        return SQLiteStore(sqlite_path, collection)
+    if backend == 'json':
+        return JournalStore(json_path)
+    raise ValueError(f'Unknown storage backend: {backend}')
+
+
+def import_json(store, json_path):
+    """
+    Copy a JSON collection (snapshot + journal) into store.
+
+    Returns the number of records imported, or None if there was no JSON data.
+    """
+    records = JournalStore(json_path).load()
+    if records is None:
+        return None
+    store.save_all(records)
+    return len(records)
+
+
+def export_json(store, out_path):
+    """
+    Write a collection as one indented JSON array (a readable copy; the
+    stores themselves keep compact JSON). Returns the number of records.
+    """
+    records = store.load() or []
+    tmp_path = f'{out_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(json_codec.dumps_bytes(records, pretty=True) + b'\n')
+    os.replace(tmp_path, out_path)
+    return len(records)
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == 'import-sqlite':
+        db_path = sys.argv[2] if len(sys.argv) > 2 else 'portfolio.db'
+        for collection in ('messages', 'projects', 'skills'):
+            count = import_json(SQLiteStore(db_path, collection), f'{collection}.json')
+            if count is None:
+                print(f'{collection}.json: nothing to import')
+            else:
+                print(f'{collection}.json: imported {count} records into {db_path}')
+    elif command == 'export' and len(sys.argv) > 2:
+        out_dir = sys.argv[2]
+        os.makedirs(out_dir, exist_ok=True)
+        for collection in ('messages', 'projects', 'skills'):
+            store = open_store(os.environ.get('STORAGE_BACKEND', 'json'), f'{collection}.json', collection,
+                               os.environ.get('SQLITE_PATH', 'portfolio.db'))
+            out_path = os.path.join(out_dir, f'{collection}.json')
+            print(f'{collection}: exported {export_json(store, out_path)} records to {out_path}')
+    else:
+        print('Usage: python storage.py import-sqlite [portfolio.db]\n'
+              '       python storage.py export DIR')
+        sys.exit(1)
@@ -0,0 +1,198 @@
+"""
+Streaming image uploads into the per-project asset folders.
+
+parse_image_uploads() reads a multipart/form-data request straight from the
+WSGI input in 64 KB chunks. Each file part is written to a temp file inside
+the destination folder while its SHA-256 is computed, so the upload is
+never held in memory and the hash is ready when the last chunk arrives.
+Parts over the size limit are aborted as soon as they cross it.
+
+store_upload() then moves the temp file into place:
+    image/project/pro<id>/<filename>
+keeping the original (sanitized) filename, so a path typed or dropped in
+the admin form matches the uploaded file. A file whose content already
+exists in the folder is not stored twice; a different file with a name that
+is taken gets a hash suffix. Digests of the files already in a folder are
+cached by path, size and mtime, so only new or changed files are hashed.
+"""
+import hashlib
+import os
+
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.formparser import parse_form_data
+from werkzeug.utils import secure_filename
+
+# Magic bytes -> extension. SVG is deliberately not accepted (it can carry
+# scripts and is served from the same origin as the site).
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'GIF87a', '.gif'),
+    (b'GIF89a', '.gif'),
+)
+EXTENSION_ALIASES = {'.jpeg': '.jpg'}
+
+# path -> ((size, mtime_ns), sha256 hex) for files seen by _find_same_content
+_digests = {}
+
+
+class UploadTooLarge(RequestEntityTooLarge):
+    """A single uploaded file went over the per-file limit"""
+
+    def __init__(self, max_bytes):
+        super().__init__(f'Image larger than {max_bytes // (1024 * 1024)} MB')
+        self.max_bytes = max_bytes
+
+
+class UnsupportedImage(ValueError):
+    """An uploaded file is not a JPEG, PNG, GIF or WebP image"""
+
+
+class _HashingFile:
+    """Temp file that hashes and counts what is written to it"""
+
+    def __init__(self, directory, max_bytes):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f'.upload-{os.getpid()}-{id(self)}.tmp')
+        self.file = open(self.path, 'w+b')
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.head = b''
+        self.max_bytes = max_bytes
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadTooLarge(self.max_bytes)
+        if len(self.head) < 16:
+            self.head += data[:16 - len(self.head)]
+        self.sha256.update(data)
+        return self.file.write(data)
+
+    def seek(self, *args):
+        return self.file.seek(*args)
+
+    def read(self, *args):
+        return self.file.read(*args)
+
+    def close(self):
+        self.file.close()
+
+    def discard(self):
+        self.file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def detect_image_type(head):
+    """Extension for the image format in the first bytes, or None"""
+    for signature, ext in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return '.webp'
+    return None
+
+
+def parse_image_uploads(environ, directory, max_bytes, max_files):
+    """
+    Stream the files of a multipart request into temp files in directory.
+
+    Returns a list of (original_filename, temp_file). The caller must pass
+    each temp_file to store_upload() or call its discard(). Raises
+    UploadTooLarge / RequestEntityTooLarge when limits are exceeded and
+    UnsupportedImage if any file isn't an accepted image; either way no temp
+    file is left behind.
+    """
+    temp_files = []
+
+    def stream_factory(total_content_length, content_type, filename, content_length=None):
+        if len(temp_files) >= max_files:
+            raise RequestEntityTooLarge(f'At most {max_files} images per upload')
+        temp_file = _HashingFile(directory, max_bytes)
+        temp_files.append(temp_file)
+        return temp_file
+
+    try:
+        _, _, files = parse_form_data(environ, stream_factory=stream_factory,
+                                      max_content_length=max_files * max_bytes + 1024 * 1024,
+                                      max_form_memory_size=64 * 1024, silent=False)
+        uploads = [(storage.filename or '', storage.stream) for _, storage in files.items(multi=True)]
+        for filename, temp_file in uploads:
+            if detect_image_type(temp_file.head) is None:
+                raise UnsupportedImage(f'{filename or "upload"}: only JPEG, PNG, GIF and WebP images are accepted')
+    except Exception:
+        for temp_file in temp_files:
+            temp_file.discard()
+        raise
+    return uploads
+
+
+def _file_digest(path, st):
+    """SHA-256 of a file, hashed again only if its size or mtime changed"""
+    key = (st.st_size, st.st_mtime_ns)
+    cached = _digests.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    _digests[path] = (key, sha256.hexdigest())
+    return _digests[path][1]
+
+
+def _find_same_content(directory, size, digest):
+    """Name of an existing file in directory with this size and hash"""
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return None
+    for entry in entries:
+        if entry.name.startswith('.'):
+            continue
+        try:
+            if not entry.is_file():
+                continue
+            st = entry.stat()
+            if st.st_size != size:
+                continue
+            if _file_digest(entry.path, st) == digest:
+                return entry.name
+        except OSError:
+            continue
+    return None
+
+
+def store_upload(filename, temp_file, directory):
+    """
+    Move an uploaded temp file into directory.
+
+    Returns (stored_filename, deduplicated).
+    """
+    temp_file.close()
+    ext = detect_image_type(temp_file.head)
+
+    digest = temp_file.sha256.hexdigest()
+    existing = _find_same_content(directory, temp_file.size, digest)
+    if existing:
+        temp_file.discard()
+        return existing, True
+
+    stem, given_ext = os.path.splitext(secure_filename(filename) or '')
+    given_ext = given_ext.lower()
+    stem = stem or digest[:16]
+    # Keep the uploader's extension unless it doesn't match the content
+    name = stem + (given_ext if EXTENSION_ALIASES.get(given_ext, given_ext) == ext else ext)
+    if os.path.exists(os.path.join(directory, name)):
+        name = f'{stem}-{digest[:8]}{ext}'
+    path = os.path.join(directory, name)
+    os.replace(temp_file.path, path)
+    try:
+        st = os.stat(path)
+        _digests[path] = ((st.st_size, st.st_mtime_ns), digest)
+    except OSError:
+        pass
+    return name, False
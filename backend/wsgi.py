@@ -0,0 +1,38 @@
+"""
+Production entry point: a WSGI app factory for gunicorn.
+
+    gunicorn 'wsgi:create_app()'        (settings in gunicorn.conf.py)
+
+gunicorn.conf.py sets preload_app, so create_app() runs once in the
+gunicorn master: app.py is imported, the data is loaded and warm_up()
+builds the indexes and cached responses. The workers are then forked
+with all of it already in memory (shared copy-on-write) instead of each
+importing and loading on its own. On a small instance that is what makes
+the first request after a sleep slow.
+
+What doesn't survive a fork is restarted in each worker: the log writer
+thread (log_config.py) and the mail queue workers (started on the first
+request). Pooled SMTP/HTTP connections, metrics and a pending snapshot
+export are dropped (see the register_at_fork hooks).
+
+WARM_UP=0 skips warm_up() (data is still loaded at import).
+"""
+import logging
+import os
+import time
+
+_started = time.perf_counter()
+
+
+def create_app():
+    import app as app_module
+
+    logger = logging.getLogger('app')
+    imported = time.perf_counter() - _started
+    warmed = 0.0
+    if os.environ.get('WARM_UP', '1') == '1':
+        warmed = app_module.warm_up()
+    logger.info("App ready in %.0f ms (import %.0f ms, warm-up %.0f ms; %d projects, %d messages)",
+                (imported + warmed) * 1000, imported * 1000, warmed * 1000,
+                len(app_module.projects_db), len(app_module.messages_db))
+    return app_module.app
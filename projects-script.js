@@ -260,87 +260,158 @@ let projectsData = {
 // ============================================
 // LOAD PROJECTS FROM API
 // ============================================
+// Live project summaries come from the API's bootstrap document (skills +
+// live projects in one request, see script.js). The last copy is kept in
+// sessionStorage, so the grid renders at once and is only rebuilt when the
+// version changed. The full project is fetched from /api/projects/<id>
+// when a card is clicked.
+const BOOTSTRAP_CACHE_KEY = 'portfolioBootstrap';
+
+// Set to true once the static snapshot (data/, see backend/public_data.py)
+// is published with the site. Off, the page reads the API only and never
+// asks for data/manifest.json.
+const STATIC_SNAPSHOT = false;
+
+// Manifest of the snapshot while it matches the API's data (project
+// details are then read from it too)
+let snapshotManifest = null;
+
+function fetchJson(url, options = {}) {
+    return fetch(url, options).then(response => {
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+    });
+}
+
+// Fetch the bootstrap document from the API and call onData with it. With
+// STATIC_SNAPSHOT, the snapshot is fetched at the same time and shown first
+// if it arrives before the API answers; the API stays the source of truth.
+function fetchBootstrap(onData) {
+    // Plain GET without custom headers: no CORS preflight
+    const fromApi = fetchJson(`${API_URL}/api/bootstrap`, { mode: 'cors' });
+    if (!STATIC_SNAPSHOT) {
+        return fromApi.then(onData);
+    }
+    let answered = false;
+    let snapshotVersion = null;
+    fromApi.then(() => { answered = true; }, () => {});
+    fetchJson('data/manifest.json', { cache: 'no-cache' })
+        .then(manifest => fetchJson(`data/${manifest.files.bootstrap}`).then(data => {
+            if (!answered) {
+                snapshotManifest = manifest;
+                snapshotVersion = data.version;
+                onData(data);
+            }
+        }))
+        .catch(() => {});
+    return fromApi.then(data => {
+        // Behind the latest edit: read project details from the API
+        if (snapshotVersion !== data.version) {
+            snapshotManifest = null;
+        }
+        onData(data);
+    });
+}
+
+function showLiveProjects(projects, facets = []) {
+    console.log(`Found ${projects.length} live project(s)`);
+    
+    if (projects.length === 0) {
+        console.warn('No live projects found. Make sure projects have status="live"');
+    }
+    
+    // Update project count in hero section
+    updateProjectCount(projects.length);
+    
+    // Convert API projects to projectsData format
+    const apiProjects = {};
+    projects.forEach((project, index) => {
+        console.log(`Processing project ${index + 1}:`, project.name, 'Status:', project.status);
+        apiProjects[project.id] = {
+            missionBrief: project.missionBrief || '',
+            architecture: project.architecture || '',
+            stack: project.stack || [],
+            status: project.statusValues || {
+                stability: project.statusValues?.stability || 0,
+                range: project.statusValues?.range || 0,
+                reliability: project.statusValues?.reliability || 0
+            }
+        };
+    });
+    
+    // Merge with existing projectsData (fallback)
+    projectsData = { ...projectsData, ...apiProjects };
+    liveProjects = projects;
+    stackFacets = facets;
+    selectedTags.clear();
+    renderProjectFilters(projects);
+    
+    // Update project cards with API data - this will replace static HTML
+    updateProjectCards(projects);
+}
+
 function loadProjectsFromAPI() {
     console.log('Loading projects from API...');
-    console.log('API URL:', `${API_URL}/api/projects?status=live`);
     
-    fetch(`${API_URL}/api/projects?status=live`, {
-        method: 'GET',
-        headers: {
-            'Content-Type': 'application/json',
-        },
-        mode: 'cors'
-    })
-        .then(response => {
-            console.log('API Response status:', response.status);
-            console.log('API Response headers:', response.headers);
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
+    let cached = null;
+    try {
+        cached = JSON.parse(sessionStorage.getItem(BOOTSTRAP_CACHE_KEY));
+    } catch (e) {
+        cached = null;
+    }
+    let shownVersion = null;
+    if (cached && Array.isArray(cached.projects)) {
+        showLiveProjects(cached.projects, cached.facets || []);
+        shownVersion = cached.version;
+    }
+    
+    fetchBootstrap(data => {
+        console.log('API Response data:', data);
+        
+        if (data && data.success && data.projects && Array.isArray(data.projects)) {
+            try {
+                sessionStorage.setItem(BOOTSTRAP_CACHE_KEY, JSON.stringify(data));
+            } catch (e) {
+                // Storage full or disabled - just skip caching
             }
-            return response.json();
-        })
-        .then(data => {
-            console.log('API Response data:', data);
-            console.log('Projects array:', data.projects);
-            
-            if (data && data.success && data.projects && Array.isArray(data.projects)) {
-                console.log(`Found ${data.projects.length} live project(s)`);
-                
-                if (data.projects.length === 0) {
-                    console.warn('No live projects found. Make sure projects have status="live"');
-                }
-                
-                // Update project count in hero section
-                updateProjectCount(data.projects.length);
-                
-                // Convert API projects to projectsData format
-                const apiProjects = {};
-                data.projects.forEach((project, index) => {
-                    console.log(`Processing project ${index + 1}:`, project.name, 'Status:', project.status);
-                    apiProjects[project.id] = {
-                        missionBrief: project.missionBrief || '',
-                        architecture: project.architecture || '',
-                        stack: project.stack || [],
-                        status: project.statusValues || {
-                            stability: project.statusValues?.stability || 0,
-                            range: project.statusValues?.range || 0,
-                            reliability: project.statusValues?.reliability || 0
-                        }
-                    };
-                });
-                
-                // Merge with existing projectsData (fallback)
-                projectsData = { ...projectsData, ...apiProjects };
-                
-                // Update project cards with API data - this will replace static HTML
-                updateProjectCards(data.projects);
-            } else {
-                console.warn('No projects found or invalid response:', data);
-                console.warn('Response structure:', {
-                    hasData: !!data,
-                    hasSuccess: data?.success,
-                    hasProjects: !!data?.projects,
-                    projectsType: typeof data?.projects,
-                    projectsIsArray: Array.isArray(data?.projects)
-                });
-                // If no projects, set count to 0
-                updateProjectCount(0);
-                // Clear the grid
-                const projectsGrid = document.getElementById('projectsGrid');
-                if (projectsGrid) {
-                    projectsGrid.innerHTML = '<div style="grid-column: 1/-1; text-align: center; padding: 4rem; color: #888;">No projects available. Make sure projects are set to "Live" status in admin dashboard.</div>';
-                }
+            if (shownVersion !== data.version) {
+                showLiveProjects(data.projects, data.facets || []);
+                shownVersion = data.version;
             }
-        })
+        } else {
+            console.warn('No projects found or invalid response:', data);
+            console.warn('Response structure:', {
+                hasData: !!data,
+                hasSuccess: data?.success,
+                hasProjects: !!data?.projects,
+                projectsType: typeof data?.projects,
+                projectsIsArray: Array.isArray(data?.projects)
+            });
+            // If no projects, set count to 0
+            updateProjectCount(0);
+            // Clear the grid
+            const projectsGrid = document.getElementById('projectsGrid');
+            if (projectsGrid) {
+                projectsGrid.innerHTML = '<div style="grid-column: 1/-1; text-align: center; padding: 4rem; color: #888;">No projects available. Make sure projects are set to "Live" status in admin dashboard.</div>';
+            }
+        }
+    })
         .catch(error => {
             console.error('Error loading projects from API:', error);
             console.error('Error details:', error.message);
-            console.log('API URL was:', `${API_URL}/api/projects?status=live`);
+            console.log('API URL was:', `${API_URL}/api/bootstrap`);
             console.log('Make sure the Flask server is running on port 5000');
             
+            // Already showing the cached copy or the snapshot
+            if (shownVersion !== null) {
+                return;
+            }
+            
             // Try to load all projects (without status filter) as fallback
             console.log('Trying fallback: loading all projects...');
-            fetch(`${API_URL}/api/projects`)
+            fetch(`${API_URL}/api/projects?view=summary`)
                 .then(response => response.json())
                 .then(data => {
                     if (data && data.success && data.projects && Array.isArray(data.projects)) {
@@ -387,6 +458,132 @@ function loadProjectsFromAPI() {
         });
 }
 
+// ============================================
+// PROJECT SEARCH
+// ============================================
+// Live projects as last shown from the bootstrap document, restored when
+// the search box is cleared
+let liveProjects = [];
+let projectSearchTimer = null;
+let projectSearchSeq = 0;
+
+function initProjectSearch() {
+    const input = document.getElementById('projectSearch');
+    if (!input) return;
+    
+    input.addEventListener('input', () => {
+        // Search and tag filters don't combine: typing starts over
+        if (selectedTags.size > 0) {
+            selectedTags.clear();
+            renderProjectFilters(liveProjects);
+        }
+        clearTimeout(projectSearchTimer);
+        projectSearchTimer = setTimeout(() => searchProjects(input.value.trim()), 200);
+    });
+}
+
+function searchProjects(query) {
+    // Ignore answers to older queries that arrive late
+    const seq = ++projectSearchSeq;
+    if (!query) {
+        showFilteredProjects();
+        return;
+    }
+    fetchJson(`${API_URL}/api/projects/search?status=live&limit=50&q=${encodeURIComponent(query)}`)
+        .then(data => {
+            if (seq !== projectSearchSeq || !data.success) return;
+            if (data.projects.length === 0) {
+                const projectsGrid = document.getElementById('projectsGrid');
+                if (projectsGrid) {
+                    projectsGrid.innerHTML = '<div style="grid-column: 1/-1; text-align: center; padding: 4rem; color: #888;">No projects match your search.</div>';
+                }
+                return;
+            }
+            updateProjectCards(data.projects);
+            // The hero count stays the total, not the number of matches
+            updateProjectCount(liveProjects.length);
+        })
+        .catch(error => console.error('Error searching projects:', error));
+}
+
+// ============================================
+// STACK FILTERS
+// ============================================
+// The bootstrap document carries the stack tags of the live projects with
+// their counts (backend/facets.py). The project summaries are already on
+// the page, so selecting tags filters them right here - no request - and
+// the chip counts are recomputed over the projects left, the same way the
+// server does it for /api/projects/facets.
+let stackFacets = [];
+const selectedTags = new Set();
+
+function normalizeTag(tag) {
+    return String(tag).trim().split(/\s+/).join(' ').toLowerCase();
+}
+
+function projectTags(project) {
+    return new Set((project.stack || []).map(normalizeTag).filter(Boolean));
+}
+
+function filterProjectsByTags(projects) {
+    if (selectedTags.size === 0) return projects;
+    return projects.filter(project => {
+        const tags = projectTags(project);
+        return Array.from(selectedTags).every(tag => tags.has(tag));
+    });
+}
+
+function renderProjectFilters(matching) {
+    const container = document.getElementById('projectFilters');
+    if (!container) return;
+    
+    const counts = {};
+    matching.forEach(project => {
+        projectTags(project).forEach(tag => {
+            counts[tag] = (counts[tag] || 0) + 1;
+        });
+    });
+    
+    container.innerHTML = stackFacets.map(facet => {
+        const count = counts[facet.tag] || 0;
+        const selected = selectedTags.has(facet.tag);
+        return `<button type="button" class="filter-chip${selected ? ' active' : ''}" data-tag="${encodeURIComponent(facet.tag)}"${count === 0 && !selected ? ' disabled' : ''}>
+            ${escapeHtml(facet.label)} <span class="filter-count">${count}</span>
+        </button>`;
+    }).join('');
+}
+
+function initProjectFilters() {
+    const container = document.getElementById('projectFilters');
+    if (!container) return;
+    
+    container.addEventListener('click', (e) => {
+        const chip = e.target.closest('.filter-chip');
+        if (!chip || chip.disabled) return;
+        const tag = decodeURIComponent(chip.dataset.tag);
+        if (selectedTags.has(tag)) {
+            selectedTags.delete(tag);
+        } else {
+            selectedTags.add(tag);
+        }
+        
+        const searchInput = document.getElementById('projectSearch');
+        if (searchInput && searchInput.value) {
+            searchInput.value = '';
+            projectSearchSeq++;  // drop a search still in flight
+        }
+        showFilteredProjects();
+    });
+}
+
+function showFilteredProjects() {
+    const matching = filterProjectsByTags(liveProjects);
+    renderProjectFilters(matching);
+    updateProjectCards(matching);
+    // The hero count stays the total, not the number of matches
+    updateProjectCount(liveProjects.length);
+}
+
 // Update project count in hero section
 function updateProjectCount(count) {
     const projectCountElement = document.getElementById('projectCount');
@@ -430,6 +627,25 @@ function updateProjectCards(apiProjects) {
     initializeProjectCards();
 }
 
+// Resized image copies made by the backend (project.imageVariants, see
+// backend/images.py). Every current browser decodes WebP; checked once anyway.
+const SUPPORTS_WEBP = (() => {
+    try {
+        return document.createElement('canvas').toDataURL('image/webp').startsWith('data:image/webp');
+    } catch (e) {
+        return false;
+    }
+})();
+
+function variantSrc(variant, size) {
+    const entry = variant.sizes[size];
+    return SUPPORTS_WEBP && entry.webp ? entry.webp : entry.src;
+}
+
+function variantSrcset(variant) {
+    return SUPPORTS_WEBP && variant.srcset.webp ? variant.srcset.webp : variant.srcset.src;
+}
+
 // Create project card element
 function createProjectCard(project) {
     const card = document.createElement('div');
@@ -482,8 +698,15 @@ function createProjectCard(project) {
         ? getImagePath(project.images[0])
         : null;
     
+    const firstVariant = project.images && project.images.length > 0 && project.imageVariants
+        ? project.imageVariants[project.images[0]]
+        : null;
+    const firstImageAttrs = firstVariant
+        ? `src="${variantSrc(firstVariant, 'card')}" srcset="${variantSrcset(firstVariant)}" sizes="(max-width: 768px) 100vw, 400px" loading="lazy" decoding="async"`
+        : `src="${firstImagePath}" loading="lazy"`;
+    
     const firstImage = firstImagePath
-        ? `<img src="${firstImagePath}" alt="${project.name}" style="width: 100%; height: 100%; object-fit: cover;" onerror="this.parentElement.innerHTML='<div class=\\'image-placeholder\\'><span>IMAGE NOT FOUND</span></div>';">`
+        ? `<img ${firstImageAttrs} alt="${project.name}" style="width: 100%; height: 100%; object-fit: cover;" onerror="this.parentElement.innerHTML='<div class=\\'image-placeholder\\'><span>IMAGE NOT FOUND</span></div>';">`
         : '<div class="image-placeholder"><span>PROJECT IMAGE</span></div>';
     
     card.innerHTML = `
@@ -531,6 +754,8 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Load projects from API first
     loadProjectsFromAPI();
+    initProjectSearch();
+    initProjectFilters();
     
     // Initialize 3D effect for project cards
     setTimeout(() => {
@@ -566,14 +791,24 @@ function initializeProjectCards() {
 // ============================================
 // SHOW PROJECT DETAIL
 // ============================================
+// Detail requests by project id: each project is fetched once, so reopening
+// it is instant (and the card's two click handlers share one request)
+const projectDetailRequests = {};
+
 function showProjectDetail(projectId) {
-    // Try to get from API first
-    fetch(`${API_URL}/api/projects/${projectId}`)
-        .then(response => response.json())
+    // Try the static snapshot, then the API
+    if (!projectDetailRequests[projectId]) {
+        const snapshotFile = snapshotManifest && snapshotManifest.files[`project-${projectId}`];
+        projectDetailRequests[projectId] = snapshotFile
+            ? fetchJson(`data/${snapshotFile}`).catch(() => fetchJson(`${API_URL}/api/projects/${projectId}`))
+            : fetch(`${API_URL}/api/projects/${projectId}`).then(response => response.json());
+    }
+    projectDetailRequests[projectId]
         .then(async (data) => {
             if (data && data.success && data.project) {
                 await displayProjectDetail(data.project);
             } else {
+                delete projectDetailRequests[projectId];
                 // Fallback to local data
                 const project = projectsData[projectId];
                 if (project) {
@@ -582,6 +817,7 @@ function showProjectDetail(projectId) {
             }
         })
         .catch(async (error) => {
+            delete projectDetailRequests[projectId];
             console.error('Error loading project detail:', error);
             // Fallback to local data
             const project = projectsData[projectId];
@@ -615,7 +851,7 @@ async function displayProjectDetail(project) {
     
     // Display project images gallery
     console.log('Project images:', project.images);
-    await displayProjectGallery(project.images || []);
+    await displayProjectGallery(project.images || [], project.imageVariants);
     
     // Display LinkedIn link if available
     const linkedInSection = document.getElementById('linkedInLinkSection');
@@ -676,8 +912,16 @@ async function displayProjectDetail(project) {
 // Display project gallery
 let currentImageIndex = 0;
 let projectImages = [];
+let projectImageVariants = {};
+
+// URL to load for a gallery image: the resized copy when the backend made
+// one (size is 'thumb', 'card' or 'full'), else the original file
+function galleryImageSrc(imagePath, size) {
+    const variant = projectImageVariants[imagePath];
+    return variant ? variantSrc(variant, size) : imagePath;
+}
 
-async function displayProjectGallery(images) {
+async function displayProjectGallery(images, imageVariants) {
     const gallerySection = document.getElementById('projectGallery');
     const galleryMainImage = document.getElementById('galleryMainImage');
     const galleryThumbnails = document.getElementById('galleryThumbnails');
@@ -720,6 +964,13 @@ async function displayProjectGallery(images) {
     };
     
     projectImages = images.map(normalizeImagePath).filter(img => img !== null);
+    projectImageVariants = {};
+    images.forEach(img => {
+        const normalized = normalizeImagePath(img);
+        if (normalized && imageVariants && imageVariants[img]) {
+            projectImageVariants[normalized] = imageVariants[img];
+        }
+    });
     
     console.log('Normalized project images:', projectImages);
     console.log('Original images array:', images);
@@ -800,7 +1051,8 @@ async function displayProjectGallery(images) {
                     }
                 };
                 
-                img.src = imagePath;
+                // The thumbnail is enough to know the image exists
+                img.src = galleryImageSrc(imagePath, 'thumb');
             });
         });
         
@@ -830,7 +1082,7 @@ async function displayProjectGallery(images) {
         // Try to show next image if available
         if (loadAttempts < maxLoadAttempts && projectImages.length > 1) {
             currentImageIndex = (currentImageIndex + 1) % projectImages.length;
-            this.src = projectImages[currentImageIndex];
+            this.src = galleryImageSrc(projectImages[currentImageIndex], 'full');
             this.style.display = 'block';
         } else {
             this.style.display = 'none';
@@ -853,7 +1105,7 @@ async function displayProjectGallery(images) {
     // Preload first image to check if it exists
     const testImg = new Image();
     testImg.onload = function() {
-        galleryMainImage.src = projectImages[0];
+        galleryMainImage.src = galleryImageSrc(projectImages[0], 'full');
         galleryMainImage.alt = 'Project Image 1';
     };
     testImg.onerror = function() {
@@ -861,14 +1113,14 @@ async function displayProjectGallery(images) {
         // Try next image
         if (projectImages.length > 1) {
             currentImageIndex = 1;
-            galleryMainImage.src = projectImages[1];
+            galleryMainImage.src = galleryImageSrc(projectImages[1], 'full');
             galleryMainImage.alt = 'Project Image 2';
         } else {
-            galleryMainImage.src = projectImages[0]; // Try anyway
+            galleryMainImage.src = galleryImageSrc(projectImages[0], 'full'); // Try anyway
             galleryMainImage.alt = 'Project Image 1';
         }
     };
-    testImg.src = projectImages[0];
+    testImg.src = galleryImageSrc(projectImages[0], 'full');
     
     // Create thumbnails
     galleryThumbnails.innerHTML = '';
@@ -880,7 +1132,8 @@ async function displayProjectGallery(images) {
         }
         
         const img = document.createElement('img');
-        img.src = imagePath;
+        img.src = galleryImageSrc(imagePath, 'thumb');
+        img.loading = 'lazy';
         img.alt = `Thumbnail ${index + 1}`;
         img.onerror = function() {
             console.error('Failed to load thumbnail:', imagePath);
@@ -959,7 +1212,7 @@ function updateGalleryDisplay() {
         this.style.display = 'block';
     };
     
-    galleryMainImage.src = imagePath;
+    galleryMainImage.src = galleryImageSrc(imagePath, 'full');
     galleryMainImage.alt = `Project Image ${currentImageIndex + 1}`;
     
     thumbnails.forEach((thumb, index) => {
@@ -1012,7 +1265,7 @@ async function displayProjectDetailFromLocal(projectId, project) {
     }
     
     // Display project images gallery (empty for local data)
-    await displayProjectGallery(project.images || []);
+    await displayProjectGallery(project.images || [], project.imageVariants);
     
     // Animate HUD bars
     const status = project.status || project;
@@ -283,25 +283,83 @@ function initProjects3D() {
     });
 }
 
-// Load skills from API
+// Load skills from the bootstrap document (skills + live projects in one
+// request). The last copy is kept in sessionStorage, shared with the
+// projects page, so skills show instantly and are only re-rendered when
+// the version changed.
+const BOOTSTRAP_CACHE_KEY = 'portfolioBootstrap';
+
+// Set to true once the static snapshot (data/, see backend/public_data.py)
+// is published with the site. Off, the page reads the API only and never
+// asks for data/manifest.json.
+const STATIC_SNAPSHOT = false;
+
+// Fetch the bootstrap document from the API and call onData with it. With
+// STATIC_SNAPSHOT, the snapshot is fetched at the same time and shown first
+// if it arrives before the API answers (e.g. while the API wakes up). The
+// API stays the source of truth, so a snapshot that is behind the latest
+// edit is only shown until then.
+function fetchBootstrap(API_URL, onData) {
+    const fetchJson = url => fetch(url, { cache: 'no-cache' }).then(response => {
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+    });
+    const fromApi = fetchJson(`${API_URL}/api/bootstrap`);
+    if (STATIC_SNAPSHOT) {
+        let answered = false;
+        fromApi.then(() => { answered = true; }, () => {});
+        fetchJson('data/manifest.json')
+            .then(manifest => fetchJson(`data/${manifest.files.bootstrap}`))
+            .then(data => {
+                if (!answered) {
+                    onData(data);
+                }
+            })
+            .catch(() => {});
+    }
+    return fromApi.then(onData);
+}
+
 function loadSkills() {
     const API_URL = 'https://shape-portfolio-api.onrender.com';
     const skillsGrid = document.getElementById('skillsGrid');
     
     if (!skillsGrid) return;
     
-    fetch(`${API_URL}/api/skills`)
-        .then(response => response.json())
-        .then(data => {
-            if (data.success && data.skills) {
+    let cached = null;
+    try {
+        cached = JSON.parse(sessionStorage.getItem(BOOTSTRAP_CACHE_KEY));
+    } catch (e) {
+        cached = null;
+    }
+    let shownVersion = null;
+    if (cached && cached.skills) {
+        displaySkills(cached.skills);
+        shownVersion = cached.version;
+    }
+    
+    fetchBootstrap(API_URL, data => {
+        if (data.success && data.skills) {
+            try {
+                sessionStorage.setItem(BOOTSTRAP_CACHE_KEY, JSON.stringify(data));
+            } catch (e) {
+                // Storage full or disabled - just skip caching
+            }
+            if (shownVersion !== data.version) {
                 displaySkills(data.skills);
-            } else {
-                skillsGrid.innerHTML = '<p style="color: #888;">No skills available</p>';
+                shownVersion = data.version;
             }
-        })
+        } else {
+            skillsGrid.innerHTML = '<p style="color: #888;">No skills available</p>';
+        }
+    })
         .catch(error => {
             console.error('Error loading skills:', error);
-            skillsGrid.innerHTML = '<p style="color: #888;">Error loading skills</p>';
+            if (shownVersion === null) {
+                skillsGrid.innerHTML = '<p style="color: #888;">Error loading skills</p>';
+            }
         });
 }
 